@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
-    verbose_name = 'Blog'
\ No newline at end of file
+    verbose_name = 'Blog'
+
+    def ready(self):
+        # Import signals để chúng được đăng ký khi ứng dụng khởi động
+        import blog.signals
\ No newline at end of file
@@ -0,0 +1,27 @@
+# backend/blog/signals.py
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from dbpsports_core import cache_namespaces
+
+from .models import BlogCategory, BlogComment, BlogPost, BlogTag
+
+
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=BlogCategory)
+@receiver([post_save, post_delete], sender=BlogTag)
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def bump_blog_cache(sender, instance, update_fields=None, **kwargs):
+    """Bài viết, danh mục, tag đổi: làm mới các trang blog đã cache (dbpsports_core/page_cache.py)."""
+    if update_fields is not None and set(update_fields) <= {'view_count'}:
+        return  # Chỉ đếm lượt xem
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    cache_namespaces.bump(cache_namespaces.BLOG)
+
+
+@receiver([post_save, post_delete], sender=BlogComment)
+def bump_blog_post_cache(sender, instance, **kwargs):
+    """Bình luận chỉ hiển thị trên trang của bài viết đó."""
+    cache_namespaces.bump(cache_namespaces.blog_post_namespace(instance.post_id))
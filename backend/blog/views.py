@@ -1,6 +1,6 @@
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from django.db.models import Q, Count, F
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
@@ -8,9 +8,20 @@ from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView
 from django.contrib import messages
 
+from dbpsports_core import cache_namespaces, page_cache
+
 from .models import BlogPost, BlogCategory, BlogComment, BlogTag
 
 
+def count_post_view(request, slug):
+    """Tăng lượt xem bằng một câu UPDATE (không qua save() nên không làm mất cache của trang)."""
+    BlogPost.objects.filter(slug=slug, status='published').update(view_count=F('view_count') + 1)
+
+
+# Trang bài viết được trả từ cache cho khách (dbpsports_core/page_cache.py) vẫn được đếm lượt xem
+page_cache.on_cache_hit('blog:post_detail', count_post_view)
+
+
 class BlogListView(ListView):
     """Danh sách bài viết blog"""
     model = BlogPost
@@ -76,11 +87,12 @@ class BlogDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
+        post = self.object
+        page_cache.add_surrogate_keys(self.request, cache_namespaces.blog_post_namespace(post.pk))
         
         # Tăng view count
+        count_post_view(self.request, post.slug)
         post.view_count += 1
-        post.save()
         
         # Bài viết liên quan
         related_posts = BlogPost.objects.filter(
@@ -2,7 +2,8 @@
 
 from django.contrib import admin
 from django.contrib.admin import AdminSite
-from .models import NewsletterSubscription
+from django.conf import settings
+from .models import NewsletterCampaign, NewsletterSubscription, OutboundEmail
 
 # Tùy chỉnh tiêu đề admin
 admin.site.site_header = "🏆 DBP Sports - Trung tâm Quản trị"
@@ -344,7 +345,7 @@ class NewsletterSubscriptionAdmin(admin.ModelAdmin):
         <p>Hẹn gặp lại bạn trong các email tiếp theo!</p>
         """
         
-        result = send_newsletter_bulk(subject, content, test_mode=True)
+        result = send_newsletter_bulk(subject, content, test_mode=True, time_limit=settings.NEWSLETTER_REQUEST_TIME_LIMIT)
         
         if result['success']:
             self.message_user(request, f"Thanh cong! Da gui test newsletter {result['sent']} email.")
@@ -375,7 +376,7 @@ class NewsletterSubscriptionAdmin(admin.ModelAdmin):
         <p>Cảm ơn bạn đã đồng hành cùng DBP Sports!</p>
         """
         
-        result = send_newsletter_bulk(subject, content, test_mode=False)
+        result = send_newsletter_bulk(subject, content, test_mode=False, time_limit=settings.NEWSLETTER_REQUEST_TIME_LIMIT)
         
         if result['success']:
             self.message_user(request, f"Thanh cong! Da gui newsletter {result['sent']}/{result['total']} email.")
@@ -416,7 +417,7 @@ class NewsletterSubscriptionAdmin(admin.ModelAdmin):
         <p>Cam on ban da dong hanh cung DBP Sports!</p>
         """
         
-        result = send_newsletter_bulk(subject, content, test_mode=False)
+        result = send_newsletter_bulk(subject, content, test_mode=False, time_limit=settings.NEWSLETTER_REQUEST_TIME_LIMIT)
         
         if result['success']:
             self.message_user(request, f"Thanh cong! Da gui {result['sent']}/{result['total']} email tu chinh.")
@@ -430,3 +431,70 @@ class NewsletterSubscriptionAdmin(admin.ModelAdmin):
         extra_context = extra_context or {}
         extra_context['newsletter_form_url'] = '/newsletter/send/'
         return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'test_mode', 'total_count', 'sent_count', 'failed_count', 'pending_count', 'created_at', 'finished_at']
+    list_filter = ['status', 'test_mode']
+    search_fields = ['subject']
+    readonly_fields = ['subject', 'content', 'tournament_highlight', 'test_mode', 'status', 'total_count',
+                       'sent_count', 'failed_count', 'created_at', 'finished_at']
+    exclude = ['rendered_html']
+    ordering = ['-created_at']
+    actions = ['resume_sending', 'retry_failed_deliveries', 'cancel_campaigns']
+
+    def pending_count(self, obj):
+        return obj.pending_count
+    pending_count.short_description = "Còn chờ"
+
+    def has_add_permission(self, request):
+        return False
+
+    def resume_sending(self, request, queryset):
+        """Gửi tiếp các chiến dịch đang dở (trong giới hạn thời gian của một request)"""
+        from .newsletter import send_campaign
+        sent = pending = 0
+        for campaign in queryset.filter(status=NewsletterCampaign.STATUS_SENDING):
+            result = send_campaign(campaign, time_limit=settings.NEWSLETTER_REQUEST_TIME_LIMIT)
+            sent += result['sent']
+            pending += result['pending']
+        self.message_user(request, f"Đã gửi thêm {sent} email, còn {pending} email đang chờ.")
+    resume_sending.short_description = "▶️ Gửi tiếp chiến dịch đang dở"
+
+    def retry_failed_deliveries(self, request, queryset):
+        """Đưa các người nhận bị lỗi về hàng chờ"""
+        from .newsletter import retry_failed
+        count = sum(retry_failed(campaign) for campaign in queryset)
+        self.message_user(request, f"Đã đưa {count} người nhận bị lỗi về hàng chờ.")
+    retry_failed_deliveries.short_description = "🔁 Gửi lại cho người nhận bị lỗi"
+
+    def cancel_campaigns(self, request, queryset):
+        count = queryset.filter(status=NewsletterCampaign.STATUS_SENDING).update(status=NewsletterCampaign.STATUS_CANCELLED)
+        self.message_user(request, f"Đã hủy {count} chiến dịch.")
+    cancel_campaigns.short_description = "⏹️ Hủy chiến dịch"
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipient_display', 'category', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['status', 'category']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = ['subject', 'body', 'html_body', 'from_email', 'recipients', 'category', 'status',
+                       'attempts', 'last_error', 'next_attempt_at', 'locked_at', 'created_at', 'sent_at']
+    ordering = ['-created_at']
+    actions = ['retry_emails']
+
+    def recipient_display(self, obj):
+        return ', '.join(obj.recipients)
+    recipient_display.short_description = "Người nhận"
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry_emails(self, request, queryset):
+        """Đưa các email được chọn về hàng đợi để gửi lại"""
+        from .outbox import retry
+        count = retry(queryset)
+        self.message_user(request, f"Đã đưa {count} email về hàng đợi để gửi lại.")
+    retry_emails.short_description = "🔁 Gửi lại email đã chọn"
@@ -0,0 +1,232 @@
+"""
+Các cache backend của DBP Sports (chọn bằng biến môi trường CACHE_BACKEND, xem settings.py).
+
+Mỗi backend là backend gốc của Django cộng thêm bộ đếm hit/miss. Bộ đếm được
+gom trong từng process rồi định kỳ cộng dồn vào chính cache dùng chung, nên
+lệnh `python manage.py cache_report` thấy được tỉ lệ hit của tất cả worker.
+
+incr() gốc của backend file và database là get() + set() với TIMEOUT mặc định:
+hai worker tăng cùng lúc thì mất một lần tăng, và mỗi lần tăng lại gia hạn key (bộ
+đếm rate-limit không bao giờ hết hạn). Hai backend này được thay incr() nguyên tử,
+giữ nguyên thời điểm hết hạn của key, như Redis và LocMem.
+"""
+
+import base64
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+
+from django.core.cache.backends import db, filebased, locmem, redis
+from django.core.files import locks
+from django.core.files.move import file_move_safe
+from django.db import connections, models, router
+from django.utils.timezone import now as tz_now
+
+STATS_HITS_KEY = 'cache_stats:hits'
+STATS_MISSES_KEY = 'cache_stats:misses'
+STATS_FLUSH_EVERY = 100  # Số lần đọc trước khi đẩy bộ đếm của process lên cache dùng chung
+
+_MISSING = object()
+_local = threading.local()
+
+
+class HitRatioMixin:
+    """Đếm số lần đọc trúng/trượt cache của get() và get_many()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._pending_hits = 0
+        self._pending_misses = 0
+
+    def _record(self, hits, misses):
+        if getattr(_local, 'suppress', False):
+            return
+        with self._stats_lock:
+            self._pending_hits += hits
+            self._pending_misses += misses
+            if self._pending_hits + self._pending_misses < STATS_FLUSH_EVERY:
+                return
+            hits, misses = self._pending_hits, self._pending_misses
+            self._pending_hits = self._pending_misses = 0
+        self._flush(hits, misses)
+
+    def _without_stats(self, func, *args, **kwargs):
+        """Gọi func mà không đếm các lần đọc bên trong (tránh đếm trùng/đếm chính bộ đếm)."""
+        previous = getattr(_local, 'suppress', False)
+        _local.suppress = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.suppress = previous
+
+    def _flush(self, hits, misses):
+        for key, value in ((STATS_HITS_KEY, hits), (STATS_MISSES_KEY, misses)):
+            if not value:
+                continue
+            try:
+                self._without_stats(super().add, key, 0, None)
+                self._without_stats(super().incr, key, value)
+            except Exception:
+                # Thống kê không được phép làm hỏng request
+                pass
+
+    def flush_stats(self):
+        """Đẩy ngay bộ đếm đang gom của process hiện tại lên cache dùng chung."""
+        with self._stats_lock:
+            hits, misses = self._pending_hits, self._pending_misses
+            self._pending_hits = self._pending_misses = 0
+        self._flush(hits, misses)
+
+    def get_stats(self):
+        self.flush_stats()
+        stats = self._without_stats(super().get_many, [STATS_HITS_KEY, STATS_MISSES_KEY])
+        hits = stats.get(STATS_HITS_KEY, 0)
+        misses = stats.get(STATS_MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._pending_hits = self._pending_misses = 0
+        super().delete_many([STATS_HITS_KEY, STATS_MISSES_KEY])
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record(0, 1)
+            return default
+        self._record(1, 0)
+        return value
+
+    def incr(self, key, delta=1, version=None):
+        # incr() mặc định đọc giá trị bằng get(), không tính là một lần đọc cache
+        return self._without_stats(super().incr, key, delta, version=version)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # Một số backend cài get_many() bằng cách gọi get() cho từng key
+        found = self._without_stats(super().get_many, keys, version=version)
+        self._record(len(found), len(keys) - len(found))
+        return found
+
+
+class AtomicFileBasedCache(filebased.FileBasedCache):
+    """
+    add(), incr() và touch() chạy dưới một khóa file chung của thư mục cache (khóa
+    giữa các process); incr() ghi lại giá trị với đúng thời điểm hết hạn cũ.
+    """
+
+    lock_filename = 'counters.lock'
+
+    def _counter_lock(self):
+        self._createdir()
+        return open(os.path.join(self._dir, self.lock_filename), 'ab')
+
+    def add(self, key, value, timeout=filebased.DEFAULT_TIMEOUT, version=None):
+        with self._counter_lock() as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                return super().add(key, value, timeout, version)
+            finally:
+                locks.unlock(lock_file)
+
+    def touch(self, key, timeout=filebased.DEFAULT_TIMEOUT, version=None):
+        # touch() gốc ghi đè file tại chỗ: không để nó chen giữa lúc incr() đọc và ghi
+        with self._counter_lock() as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                return super().touch(key, timeout, version)
+            finally:
+                locks.unlock(lock_file)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._counter_lock() as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                try:
+                    with open(fname, 'rb') as f:
+                        expiry = pickle.load(f)
+                        value = pickle.loads(zlib.decompress(f.read()))
+                except FileNotFoundError:
+                    value = None
+                if value is None or (expiry is not None and expiry < time.time()):
+                    raise ValueError("Key '%s' not found" % key)
+                value += delta
+                fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+                renamed = False
+                try:
+                    with open(fd, 'wb') as f:
+                        f.write(pickle.dumps(expiry, self.pickle_protocol))
+                        f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+                    file_move_safe(tmp_path, fname, allow_overwrite=True)
+                    renamed = True
+                finally:
+                    if not renamed:
+                        os.remove(tmp_path)
+                return value
+            finally:
+                locks.unlock(lock_file)
+
+
+class AtomicDatabaseCache(db.DatabaseCache):
+    """
+    incr() bằng compare-and-swap: UPDATE chỉ ghi khi giá trị chưa bị worker khác đổi
+    (nếu đã đổi thì đọc lại và thử lại), không đụng tới cột expires.
+    """
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection = connections[router.db_for_write(self.cache_model_class)]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        expression = models.Expression(output_field=models.DateTimeField())
+        converters = connection.ops.get_db_converters(expression) + expression.get_db_converters(connection)
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    'SELECT %s, %s FROM %s WHERE %s = %%s'
+                    % (quote_name('value'), quote_name('expires'), table, quote_name('cache_key')),
+                    [key],
+                )
+                row = cursor.fetchone()
+                if row is not None:
+                    expires = row[1]
+                    for converter in converters:
+                        expires = converter(expires, expression, connection)
+                if row is None or expires < tz_now():
+                    raise ValueError("Key '%s' not found" % key)
+                current = connection.ops.process_clob(row[0])
+                value = pickle.loads(base64.b64decode(current.encode())) + delta
+                encoded = base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1')
+                cursor.execute(
+                    'UPDATE %s SET %s = %%s WHERE %s = %%s AND %s = %%s'
+                    % (table, quote_name('value'), quote_name('cache_key'), quote_name('value')),
+                    [encoded, key, current],
+                )
+                if cursor.rowcount:
+                    return value
+
+
+class FileBasedCache(HitRatioMixin, AtomicFileBasedCache):
+    pass
+
+
+class DatabaseCache(HitRatioMixin, AtomicDatabaseCache):
+    pass
+
+
+class RedisCache(HitRatioMixin, redis.RedisCache):
+    pass
+
+
+class LocMemCache(HitRatioMixin, locmem.LocMemCache):
+    pass
@@ -0,0 +1,109 @@
+"""
+Cache theo "namespace" có phiên bản.
+
+Thay vì gọi cache.clear() (xóa sạch cả cache thời tiết, bộ đếm rate-limit,
+cache nhạc...), mỗi nhóm dữ liệu có một namespace riêng với số phiên bản
+lưu trong cache. Key của dữ liệu được ghép với phiên bản hiện tại của các
+namespace liên quan; khi dữ liệu thay đổi chỉ cần tăng phiên bản namespace
+đó (bump) là toàn bộ key cũ tự động hết hiệu lực, các namespace khác giữ nguyên.
+
+Ví dụ:
+    key = make_key('standings', tournament_namespace(5))
+    data = cache.get(key)
+    ...
+    bump(tournament_namespace(5))  # khi giải 5 thay đổi
+"""
+
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+VERSION_KEY_PREFIX = 'nsver:'
+
+# Các namespace dùng chung
+HOMEPAGE_BANNERS = 'homepage:banners'
+HOMEPAGE_TOURNAMENTS = 'homepage:tournaments'
+TOURNAMENT_LISTS = 'tournaments'
+JOBS = 'jobs'
+LIVESTREAM = 'livestream'
+BLOG = 'blog'
+# Giá sản phẩm Main Shop / Shop BTC (tổng giỏ hàng đã cache, xem shop/cart_summary.py)
+SHOP_CATALOG = 'shop:catalog'
+# Kệ sản phẩm, danh mục, banner của trang chủ Shop (xem shop/shelves.py)
+SHOP_HOME = 'shop:home'
+
+
+def tournament_namespace(tournament_id):
+    return f'tournament:{tournament_id}'
+
+
+def match_namespace(match_id):
+    return f'match:{match_id}'
+
+
+def team_namespace(team_id):
+    return f'team:{team_id}'
+
+
+def blog_post_namespace(post_id):
+    return f'blog_post:{post_id}'
+
+
+def user_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def _version_key(namespace):
+    return f'{VERSION_KEY_PREFIX}{namespace}'
+
+
+def _new_version():
+    # Dùng thời gian (ms) làm phiên bản khởi tạo: nếu key phiên bản bị đẩy ra khỏi
+    # cache, phiên bản mới vẫn khác mọi phiên bản cũ nên không đọc nhầm dữ liệu cũ.
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces):
+    """Lấy phiên bản hiện tại của nhiều namespace trong một lần đọc cache."""
+    keys = {_version_key(ns): ns for ns in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _new_version(), None)
+            version = cache.get(key)
+        versions[namespace] = version
+    return versions
+
+
+def get_version(namespace):
+    return get_versions(namespace)[namespace]
+
+
+def bump(*namespaces):
+    """Làm mất hiệu lực toàn bộ dữ liệu đã cache thuộc các namespace này."""
+    for namespace in set(namespaces):
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def make_key(key, *namespaces):
+    """Ghép key với phiên bản hiện tại của các namespace."""
+    versions = get_versions(*namespaces)
+    suffix = '|'.join(f'{ns}={versions[ns]}' for ns in sorted(versions))
+    return f'ns:{key}|{suffix}'
+
+
+def get_or_set(key, namespaces, default, timeout=DEFAULT_TIMEOUT):
+    """Đọc giá trị từ cache theo namespace, nếu chưa có thì gọi default() và lưu lại."""
+    full_key = make_key(key, *namespaces)
+    value = cache.get(full_key)
+    if value is None:
+        value = default()
+        cache.set(full_key, value, timeout)
+    return value
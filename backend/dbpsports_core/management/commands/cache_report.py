@@ -0,0 +1,64 @@
+"""
+Management command kiểm tra tình trạng cache và tỉ lệ hit/miss
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Kiểm tra cache đang dùng (đọc/ghi/xóa) và báo cáo tỉ lệ hit của tất cả worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Xóa bộ đếm hit/miss sau khi in báo cáo',
+        )
+
+    def handle(self, *args, **options):
+        config = settings.CACHES['default']
+        self.stdout.write(f"Loại cache: {getattr(settings, 'CACHE_BACKEND', '?')} ({config['BACKEND']})")
+        self.stdout.write(f"Vị trí: {config.get('LOCATION', '')}")
+        self.stdout.write(f"Timeout mặc định: {config.get('TIMEOUT', 300)} giây")
+
+        # 1. Kiểm tra đọc/ghi/xóa
+        key = f'cache_report:{uuid.uuid4().hex}'
+        try:
+            started = time.perf_counter()
+            cache.set(key, 'ok', 30)
+            write_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            value = cache.get(key)
+            read_ms = (time.perf_counter() - started) * 1000
+
+            cache.delete(key)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Cache KHÔNG hoạt động: {e}'))
+            return
+
+        if value != 'ok':
+            self.stdout.write(self.style.ERROR('Cache KHÔNG hoạt động: ghi xong nhưng không đọc lại được.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Cache hoạt động tốt (ghi {write_ms:.1f} ms, đọc {read_ms:.1f} ms)'))
+
+        # 2. Tỉ lệ hit/miss (chỉ có với các backend trong dbpsports_core.cache_backends)
+        if not hasattr(cache, 'get_stats'):
+            self.stdout.write(self.style.WARNING('Backend hiện tại không hỗ trợ thống kê hit/miss.'))
+            return
+
+        stats = cache.get_stats()
+        total = stats['hits'] + stats['misses']
+        self.stdout.write(f"Số lần đọc: {total} (hit: {stats['hits']}, miss: {stats['misses']})")
+        if stats['hit_ratio'] is None:
+            self.stdout.write('Tỉ lệ hit: chưa có dữ liệu')
+        else:
+            self.stdout.write(f"Tỉ lệ hit: {stats['hit_ratio'] * 100:.1f}%")
+
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write('Đã xóa bộ đếm hit/miss.')
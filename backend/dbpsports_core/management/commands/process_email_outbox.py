@@ -0,0 +1,61 @@
+"""
+Management command gửi các email trong hàng đợi (OutboundEmail).
+
+Chạy một lượt (ví dụ theo lịch mỗi phút):
+    python manage.py process_email_outbox
+Chạy liên tục như một worker nền:
+    python manage.py process_email_outbox --loop
+"""
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from dbpsports_core.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Gửi email trong hàng đợi theo lô qua một kết nối SMTP dùng chung (có thử lại khi lỗi)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Số email lấy ra mỗi lô (mặc định: 50)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Chạy liên tục, chờ email mới khi hàng đợi trống',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Số giây chờ khi hàng đợi trống (chỉ dùng với --loop, mặc định: 5)',
+        )
+
+    def handle(self, *args, **options):
+        smtp_connection = get_connection(fail_silently=False)
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = send_pending(options['batch_size'], smtp_connection)
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f'Đã gửi {sent} email, lỗi {failed} email')
+                    continue
+
+                # Hàng đợi trống
+                if not options['loop']:
+                    break
+                smtp_connection.close()  # Không giữ kết nối SMTP khi rảnh
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            smtp_connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Hoàn tất: đã gửi {total_sent} email, lỗi {total_failed} email.'))
@@ -0,0 +1,30 @@
+"""
+Management command dựng lại chỉ mục tìm kiếm (SearchEntry) từ dữ liệu hiện có
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from dbpsports_core import search
+
+
+class Command(BaseCommand):
+    help = 'Dựng lại chỉ mục tìm kiếm cho cầu thủ, đội, giải đấu, việc làm, sản phẩm, người dùng'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            help='Loại cần dựng lại, có thể lặp lại (mặc định: tất cả). Ví dụ: --kind player --kind product',
+        )
+
+    def handle(self, *args, **options):
+        kinds = options.get('kind') or search.registered_kinds()
+        unknown = set(kinds) - set(search.registered_kinds())
+        if unknown:
+            raise CommandError(f"Loại không hợp lệ: {', '.join(sorted(unknown))}. "
+                               f"Các loại có thể dùng: {', '.join(search.registered_kinds())}")
+
+        for kind in kinds:
+            count = search.rebuild(kind)
+            self.stdout.write(f'{kind}: {count} đối tượng')
+
+        self.stdout.write(self.style.SUCCESS(f'Đã dựng lại chỉ mục tìm kiếm cho {len(kinds)} loại.'))
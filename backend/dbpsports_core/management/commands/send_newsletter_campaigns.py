@@ -0,0 +1,65 @@
+"""
+Management command gửi tiếp các chiến dịch newsletter đang dở (NewsletterCampaign).
+
+Chỉ gửi cho những người nhận còn "Chờ gửi", nên chạy lại nhiều lần (ví dụ theo lịch
+mỗi 5 phút) cũng không gửi trùng.
+"""
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from dbpsports_core.models import NewsletterCampaign
+from dbpsports_core.newsletter import send_campaign
+
+
+class Command(BaseCommand):
+    help = 'Gửi tiếp các chiến dịch newsletter còn người nhận đang chờ'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign',
+            type=int,
+            help='ID chiến dịch cần gửi (nếu không chỉ định sẽ gửi tất cả chiến dịch đang dở)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Số người nhận mỗi lô (mặc định: NEWSLETTER_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Số email tối đa mỗi giây, 0 = không giới hạn (mặc định: NEWSLETTER_RATE_PER_SECOND)',
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=float,
+            help='Dừng sau số giây này, phần còn lại gửi ở lần chạy sau',
+        )
+
+    def handle(self, *args, **options):
+        campaigns = NewsletterCampaign.objects.filter(status=NewsletterCampaign.STATUS_SENDING).order_by('created_at')
+        if options.get('campaign'):
+            campaigns = campaigns.filter(pk=options['campaign'])
+
+        if not campaigns.exists():
+            self.stdout.write(self.style.WARNING('Không có chiến dịch nào đang chờ gửi.'))
+            return
+
+        smtp_connection = get_connection(fail_silently=False)
+        try:
+            for campaign in campaigns:
+                result = send_campaign(
+                    campaign,
+                    chunk_size=options.get('chunk_size'),
+                    rate=options.get('rate'),
+                    time_limit=options.get('time_limit'),
+                    smtp_connection=smtp_connection,
+                )
+                self.stdout.write(
+                    f"#{campaign.pk} {campaign.subject}: đã gửi {result['sent']}, lỗi {result['failed']}, "
+                    f"còn chờ {result['pending']}"
+                )
+        finally:
+            smtp_connection.close()
+
+        self.stdout.write(self.style.SUCCESS('Hoàn tất.'))
@@ -1,6 +1,8 @@
 """
 Custom middleware for DBP Sports
 """
+from . import page_cache
+
 
 class PermissionsPolicyMiddleware:
     """
@@ -17,3 +19,22 @@ class PermissionsPolicyMiddleware:
             response['Permissions-Policy'] = 'unload=self, camera=(), microphone=(), geolocation=()'
         
         return response
+
+
+# === Cache toàn trang cho khách chưa đăng nhập ===
+
+class PageCacheMiddleware:
+    """
+    Trả các trang công khai (giải đấu, trận đấu, đội, blog...) từ cache cho khách chưa
+    đăng nhập; cache bị làm mất hiệu lực theo surrogate key của đối tượng thay đổi.
+    Đặt sau AuthenticationMiddleware, MessageMiddleware và CsrfViewMiddleware.
+    Xem page_cache.py.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = page_cache.start(request)
+        if response is not None:
+            return response
+        return page_cache.process(request, self.get_response(request))
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.13 on 2026-10-18 00:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbpsports_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('body', models.TextField(blank=True, verbose_name='Nội dung (text)')),
+                ('html_body', models.TextField(blank=True, verbose_name='Nội dung (HTML)')),
+                ('from_email', models.CharField(max_length=254, verbose_name='Người gửi')),
+                ('recipients', models.JSONField(default=list, verbose_name='Người nhận')),
+                ('category', models.CharField(blank=True, help_text='Ví dụ: shop.order_customer', max_length=50, verbose_name='Loại email')),
+                ('status', models.CharField(choices=[('pending', 'Chờ gửi'), ('sending', 'Đang gửi'), ('sent', 'Đã gửi'), ('failed', 'Lỗi')], default='pending', max_length=10, verbose_name='Trạng thái')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Số lần thử')),
+                ('last_error', models.TextField(blank=True, verbose_name='Lỗi gần nhất')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Gửi lúc')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Bắt đầu gửi lúc')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Ngày gửi')),
+            ],
+            options={
+                'verbose_name': 'Email chờ gửi',
+                'verbose_name_plural': 'Hàng đợi email',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='dbpsports_c_status_39eb0a_idx')],
+            },
+        ),
+    ]
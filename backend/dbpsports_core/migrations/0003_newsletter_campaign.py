@@ -0,0 +1,57 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbpsports_core', '0002_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('content', models.TextField(verbose_name='Nội dung (HTML)')),
+                ('tournament_highlight', models.TextField(blank=True, verbose_name='Giải đấu nổi bật')),
+                ('rendered_html', models.TextField(blank=True, verbose_name='Email đã render')),
+                ('test_mode', models.BooleanField(default=False, verbose_name='Gửi thử')),
+                ('status', models.CharField(choices=[('sending', 'Đang gửi'), ('done', 'Hoàn tất'), ('cancelled', 'Đã hủy')], default='sending', max_length=10, verbose_name='Trạng thái')),
+                ('total_count', models.PositiveIntegerField(default=0, verbose_name='Tổng số người nhận')),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='Đã gửi')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='Lỗi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Ngày hoàn tất')),
+            ],
+            options={
+                'verbose_name': 'Chiến dịch newsletter',
+                'verbose_name_plural': 'Chiến dịch newsletter',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsletterDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, verbose_name='Email')),
+                ('status', models.CharField(choices=[('pending', 'Chờ gửi'), ('sending', 'Đang gửi'), ('sent', 'Đã gửi'), ('failed', 'Lỗi')], default='pending', max_length=10, verbose_name='Trạng thái')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Bắt đầu gửi lúc')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Ngày gửi')),
+                ('error', models.TextField(blank=True, verbose_name='Lỗi')),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='dbpsports_core.newslettercampaign')),
+            ],
+            options={
+                'verbose_name': 'Người nhận newsletter',
+                'verbose_name_plural': 'Người nhận newsletter',
+                'indexes': [models.Index(fields=['campaign', 'status'], name='dbpsports_c_campaig_36d7c0_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='newsletterdelivery',
+            constraint=models.UniqueConstraint(fields=('campaign', 'email'), name='uniq_newsletter_delivery'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbpsports_core', '0003_newsletter_campaign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30, verbose_name='Loại đối tượng')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID đối tượng')),
+                ('term', models.CharField(max_length=40, verbose_name='Từ khóa')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Trọng số')),
+            ],
+            options={
+                'verbose_name': 'Chỉ mục tìm kiếm',
+                'verbose_name_plural': 'Chỉ mục tìm kiếm',
+                'indexes': [models.Index(fields=['kind', 'term', 'object_id'], name='search_entry_lookup')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'term'), name='uniq_search_entry'),
+        ),
+    ]
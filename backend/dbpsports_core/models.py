@@ -37,3 +37,144 @@ class NewsletterSubscription(models.Model):
         self.is_active = False
         self.unsubscribed_at = timezone.now()
         self.save()
+
+
+class OutboundEmail(models.Model):
+    """
+    Hàng đợi email gửi đi (outbox).
+    Request chỉ ghi email vào bảng này; lệnh `python manage.py process_email_outbox`
+    gửi theo lô qua một kết nối SMTP dùng chung, tự thử lại khi lỗi.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Chờ gửi'),
+        (STATUS_SENDING, 'Đang gửi'),
+        (STATUS_SENT, 'Đã gửi'),
+        (STATUS_FAILED, 'Lỗi'),
+    ]
+
+    subject = models.CharField("Tiêu đề", max_length=255)
+    body = models.TextField("Nội dung (text)", blank=True)
+    html_body = models.TextField("Nội dung (HTML)", blank=True)
+    from_email = models.CharField("Người gửi", max_length=254)
+    recipients = models.JSONField("Người nhận", default=list)
+    category = models.CharField("Loại email", max_length=50, blank=True, help_text="Ví dụ: shop.order_customer")
+    status = models.CharField("Trạng thái", max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField("Số lần thử", default=0)
+    last_error = models.TextField("Lỗi gần nhất", blank=True)
+    next_attempt_at = models.DateTimeField("Gửi lúc", default=timezone.now)
+    locked_at = models.DateTimeField("Bắt đầu gửi lúc", null=True, blank=True)
+    created_at = models.DateTimeField("Ngày tạo", auto_now_add=True)
+    sent_at = models.DateTimeField("Ngày gửi", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Email chờ gửi"
+        verbose_name_plural = "Hàng đợi email"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.get_status_display()})"
+
+
+class NewsletterCampaign(models.Model):
+    """
+    Một lần gửi newsletter. Danh sách người nhận được chốt lúc tạo (NewsletterDelivery),
+    nội dung HTML render một lần, việc gửi chạy theo lô và có thể tiếp tục
+    từ chỗ dừng nếu bị gián đoạn (xem dbpsports_core/newsletter.py).
+    """
+    STATUS_SENDING = 'sending'
+    STATUS_DONE = 'done'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_SENDING, 'Đang gửi'),
+        (STATUS_DONE, 'Hoàn tất'),
+        (STATUS_CANCELLED, 'Đã hủy'),
+    ]
+
+    subject = models.CharField("Tiêu đề", max_length=255)
+    content = models.TextField("Nội dung (HTML)")
+    tournament_highlight = models.TextField("Giải đấu nổi bật", blank=True)
+    rendered_html = models.TextField("Email đã render", blank=True)
+    test_mode = models.BooleanField("Gửi thử", default=False)
+    status = models.CharField("Trạng thái", max_length=10, choices=STATUS_CHOICES, default=STATUS_SENDING)
+    total_count = models.PositiveIntegerField("Tổng số người nhận", default=0)
+    sent_count = models.PositiveIntegerField("Đã gửi", default=0)
+    failed_count = models.PositiveIntegerField("Lỗi", default=0)
+    created_at = models.DateTimeField("Ngày tạo", auto_now_add=True)
+    finished_at = models.DateTimeField("Ngày hoàn tất", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Chiến dịch newsletter"
+        verbose_name_plural = "Chiến dịch newsletter"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.subject} ({self.sent_count}/{self.total_count})"
+
+    @property
+    def pending_count(self):
+        return max(self.total_count - self.sent_count - self.failed_count, 0)
+
+
+class NewsletterDelivery(models.Model):
+    """Trạng thái gửi newsletter cho từng người nhận của một chiến dịch."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Chờ gửi'),
+        (STATUS_SENDING, 'Đang gửi'),
+        (STATUS_SENT, 'Đã gửi'),
+        (STATUS_FAILED, 'Lỗi'),
+    ]
+
+    campaign = models.ForeignKey(NewsletterCampaign, on_delete=models.CASCADE, related_name='deliveries')
+    email = models.EmailField("Email")
+    status = models.CharField("Trạng thái", max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    locked_at = models.DateTimeField("Bắt đầu gửi lúc", null=True, blank=True)
+    sent_at = models.DateTimeField("Ngày gửi", null=True, blank=True)
+    error = models.TextField("Lỗi", blank=True)
+
+    class Meta:
+        verbose_name = "Người nhận newsletter"
+        verbose_name_plural = "Người nhận newsletter"
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'email'], name='uniq_newsletter_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.get_status_display()}"
+
+
+class SearchEntry(models.Model):
+    """
+    Chỉ mục tìm kiếm đảo ngược (xem dbpsports_core/search.py): mỗi dòng là một từ
+    (đã bỏ dấu, viết thường) của một đối tượng, kèm trọng số theo trường chứa từ đó.
+    """
+    kind = models.CharField("Loại đối tượng", max_length=30)
+    object_id = models.PositiveBigIntegerField("ID đối tượng")
+    term = models.CharField("Từ khóa", max_length=40)
+    weight = models.PositiveSmallIntegerField("Trọng số", default=1)
+
+    class Meta:
+        verbose_name = "Chỉ mục tìm kiếm"
+        verbose_name_plural = "Chỉ mục tìm kiếm"
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'term'], name='uniq_search_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'term', 'object_id'], name='search_entry_lookup'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id}: {self.term}"
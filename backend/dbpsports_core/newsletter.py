@@ -0,0 +1,209 @@
+"""
+Gửi newsletter theo chiến dịch (NewsletterCampaign).
+
+- Danh sách người nhận được chốt khi tạo chiến dịch (mỗi người một NewsletterDelivery).
+- Template emails/newsletter.html chỉ render MỘT lần với email giả; khi gửi
+  chỉ thay email giả bằng email của từng người nhận.
+- Gửi theo lô qua một kết nối SMTP dùng chung, có giới hạn tốc độ.
+- Trạng thái được ghi cho từng người nhận ngay sau khi gửi, nên nếu tiến trình
+  bị dừng (lỗi, hết thời gian request...) thì lần chạy sau gửi tiếp phần còn lại,
+  không gửi lại từ đầu: `python manage.py send_newsletter_campaigns`.
+
+Cấu hình (settings.py, đều có giá trị mặc định):
+    NEWSLETTER_CHUNK_SIZE          số người nhận mỗi lô (mặc định 100)
+    NEWSLETTER_RATE_PER_SECOND     số email tối đa mỗi giây, 0 = không giới hạn
+    NEWSLETTER_REQUEST_TIME_LIMIT  số giây tối đa gửi trong một request web (mặc định 20)
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+
+from .models import NewsletterCampaign, NewsletterDelivery, NewsletterSubscription
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_PLACEHOLDER = '__dbp_subscriber_email__'
+STALE_LOCK_AFTER = timedelta(minutes=10)  # Người nhận kẹt ở "Đang gửi" (tiến trình chết) -> gửi lại
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def create_campaign(subject, content, tournament_highlight=None, test_mode=False):
+    """Tạo chiến dịch: render nội dung một lần và chốt danh sách người nhận."""
+    rendered_html = render_to_string('emails/newsletter.html', {
+        'subject': subject,
+        'content': content,
+        'subscriber_email': SUBSCRIBER_PLACEHOLDER,
+        'tournament_highlight': tournament_highlight,
+    })
+    with transaction.atomic():
+        campaign = NewsletterCampaign.objects.create(
+            subject=subject,
+            content=content,
+            tournament_highlight=tournament_highlight or '',
+            rendered_html=rendered_html,
+            test_mode=test_mode,
+        )
+        emails = NewsletterSubscription.objects.filter(is_active=True).values_list('email', flat=True)
+        if test_mode:
+            # Test mode - chỉ gửi cho 1 email đầu tiên
+            emails = emails[:1]
+        deliveries = [NewsletterDelivery(campaign=campaign, email=email) for email in emails.iterator()]
+        NewsletterDelivery.objects.bulk_create(deliveries, batch_size=1000)
+        campaign.total_count = len(deliveries)
+        campaign.save(update_fields=['total_count'])
+    return campaign
+
+
+def _claim_chunk(campaign, chunk_size):
+    now = timezone.now()
+    NewsletterDelivery.objects.filter(
+        campaign=campaign, status=NewsletterDelivery.STATUS_SENDING, locked_at__lt=now - STALE_LOCK_AFTER
+    ).update(status=NewsletterDelivery.STATUS_PENDING, locked_at=None)
+
+    claim = {'status': NewsletterDelivery.STATUS_SENDING, 'locked_at': now}
+    with transaction.atomic():
+        pending = NewsletterDelivery.objects.filter(
+            campaign=campaign, status=NewsletterDelivery.STATUS_PENDING
+        ).order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # Các dòng đã bị khóa cho tới hết transaction: người gửi khác bỏ qua chúng
+            chunk = list(pending.select_for_update(skip_locked=True)[:chunk_size])
+            NewsletterDelivery.objects.filter(
+                pk__in=[delivery.pk for delivery in chunk], status=NewsletterDelivery.STATUS_PENDING
+            ).update(**claim)
+            return chunk
+        # Không có SKIP LOCKED (SQLite, MySQL 5.x): request web và lệnh cron có thể đọc cùng
+        # một lô, nên nhận từng người nhận bằng UPDATE có điều kiện, chỉ giữ dòng đã đổi
+        return [
+            delivery for delivery in pending[:chunk_size]
+            if NewsletterDelivery.objects.filter(
+                pk=delivery.pk, status=NewsletterDelivery.STATUS_PENDING
+            ).update(**claim)
+        ]
+
+
+def _refresh_progress(campaign):
+    """Cập nhật số đã gửi/lỗi từ trạng thái từng người nhận; đánh dấu hoàn tất nếu hết việc."""
+    counts = dict(
+        NewsletterDelivery.objects.filter(campaign=campaign).values_list('status').annotate(n=Count('id'))
+    )
+    campaign.sent_count = counts.get(NewsletterDelivery.STATUS_SENT, 0)
+    campaign.failed_count = counts.get(NewsletterDelivery.STATUS_FAILED, 0)
+    fields = ['sent_count', 'failed_count']
+    unfinished = counts.get(NewsletterDelivery.STATUS_PENDING, 0) + counts.get(NewsletterDelivery.STATUS_SENDING, 0)
+    if not unfinished and campaign.status == NewsletterCampaign.STATUS_SENDING:
+        campaign.status = NewsletterCampaign.STATUS_DONE
+        campaign.finished_at = timezone.now()
+        fields += ['status', 'finished_at']
+    campaign.save(update_fields=fields)
+
+
+def _build_message(campaign, email, smtp_connection):
+    message = EmailMultiAlternatives(
+        subject=campaign.subject,
+        body=campaign.content,  # Plain text fallback
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+        connection=smtp_connection,
+    )
+    message.attach_alternative(campaign.rendered_html.replace(SUBSCRIBER_PLACEHOLDER, escape(email)), 'text/html')
+    return message
+
+
+def send_campaign(campaign, chunk_size=None, rate=None, time_limit=None, smtp_connection=None):
+    """
+    Gửi tiếp các người nhận còn chờ của chiến dịch.
+    Dừng khi hết người nhận, khi chiến dịch bị hủy hoặc khi vượt time_limit (giây);
+    phần còn lại giữ trạng thái "Chờ gửi" để lần sau gửi tiếp.
+    Trả về dict: sent, failed (trong lần chạy này), pending (còn lại).
+    """
+    chunk_size = chunk_size or _setting('NEWSLETTER_CHUNK_SIZE', 100)
+    rate = _setting('NEWSLETTER_RATE_PER_SECOND', 0) if rate is None else rate
+    min_interval = 1.0 / rate if rate else 0
+    started = time.monotonic()
+    next_send_at = started
+
+    def out_of_time():
+        return time_limit is not None and time.monotonic() - started >= time_limit
+
+    own_connection = smtp_connection is None
+    if own_connection:
+        smtp_connection = get_connection(fail_silently=False)
+
+    sent = failed = 0
+    try:
+        while not out_of_time():
+            status = NewsletterCampaign.objects.filter(pk=campaign.pk).values_list('status', flat=True).first()
+            if status != NewsletterCampaign.STATUS_SENDING:
+                break
+            chunk = _claim_chunk(campaign, chunk_size)
+            if not chunk:
+                break
+
+            for index, delivery in enumerate(chunk):
+                if out_of_time():
+                    # Trả phần chưa gửi của lô về hàng chờ
+                    NewsletterDelivery.objects.filter(pk__in=[d.pk for d in chunk[index:]]).update(
+                        status=NewsletterDelivery.STATUS_PENDING, locked_at=None
+                    )
+                    break
+                if min_interval:
+                    delay = next_send_at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send_at = max(next_send_at, time.monotonic()) + min_interval
+
+                try:
+                    smtp_connection.open()  # Không làm gì nếu kết nối đang mở
+                    _build_message(campaign, delivery.email, smtp_connection).send()
+                except Exception as e:
+                    logger.error(f"Failed to send newsletter to {delivery.email}: {str(e)}")
+                    NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                        status=NewsletterDelivery.STATUS_FAILED, locked_at=None, error=str(e)[:2000]
+                    )
+                    failed += 1
+                    try:
+                        smtp_connection.close()  # Kết nối có thể đã hỏng, lần sau mở lại
+                    except Exception:
+                        pass
+                else:
+                    NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                        status=NewsletterDelivery.STATUS_SENT, locked_at=None, sent_at=timezone.now()
+                    )
+                    sent += 1
+
+            _refresh_progress(campaign)
+    finally:
+        if own_connection:
+            smtp_connection.close()
+
+    _refresh_progress(campaign)
+    logger.info(
+        f"Newsletter campaign #{campaign.pk}: sent {sent}, failed {failed}, pending {campaign.pending_count}"
+    )
+    return {'sent': sent, 'failed': failed, 'pending': campaign.pending_count}
+
+
+def retry_failed(campaign):
+    """Đưa các người nhận bị lỗi về hàng chờ và mở lại chiến dịch."""
+    count = NewsletterDelivery.objects.filter(
+        campaign=campaign, status=NewsletterDelivery.STATUS_FAILED
+    ).update(status=NewsletterDelivery.STATUS_PENDING, error='')
+    if count:
+        campaign.status = NewsletterCampaign.STATUS_SENDING
+        campaign.finished_at = None
+        campaign.save(update_fields=['status', 'finished_at'])
+        _refresh_progress(campaign)
+    return count
@@ -0,0 +1,152 @@
+"""
+Hàng đợi email gửi đi (outbox) lưu trong database.
+
+Trong request chỉ gọi queue_mail() để ghi email vào bảng OutboundEmail (một INSERT),
+không chờ máy chủ mail. Lệnh `python manage.py process_email_outbox` (chạy nền,
+hoặc theo lịch) lấy email theo lô và gửi qua MỘT kết nối SMTP dùng chung.
+Email lỗi được thử lại với thời gian chờ tăng dần; quá số lần cho phép thì
+chuyển sang trạng thái "Lỗi" để admin xem và gửi lại.
+
+Cấu hình (settings.py, đều có giá trị mặc định):
+    EMAIL_OUTBOX_MAX_ATTEMPTS   số lần thử tối đa (mặc định 5)
+    EMAIL_OUTBOX_RETRY_DELAY    thời gian chờ lần thử lại đầu tiên, giây (mặc định 60)
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 6 * 60 * 60  # Chờ tối đa 6 giờ giữa hai lần thử
+STALE_LOCK_AFTER = timedelta(minutes=15)  # Worker chết giữa chừng -> trả email về hàng đợi
+
+
+def _max_attempts():
+    return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def queue_mail(subject, recipient_list, html_message='', message='', from_email=None, category=''):
+    """Xếp một email vào hàng đợi, trả về OutboundEmail vừa tạo (tham số giống send_mail)."""
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=message or '',
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+        category=category,
+    )
+
+
+def _claim_batch(batch_size):
+    """Lấy một lô email đến hạn gửi và đánh dấu "Đang gửi" để worker khác không lấy trùng."""
+    now = timezone.now()
+    OutboundEmail.objects.filter(
+        status=OutboundEmail.STATUS_SENDING, locked_at__lt=now - STALE_LOCK_AFTER
+    ).update(status=OutboundEmail.STATUS_PENDING)
+
+    claim = {'status': OutboundEmail.STATUS_SENDING, 'locked_at': now}
+    with transaction.atomic():
+        pending = OutboundEmail.objects.filter(
+            status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # Các dòng đã bị khóa cho tới hết transaction: worker khác bỏ qua chúng
+            batch = list(pending.select_for_update(skip_locked=True)[:batch_size])
+            OutboundEmail.objects.filter(
+                pk__in=[email.pk for email in batch], status=OutboundEmail.STATUS_PENDING
+            ).update(**claim)
+            return batch
+        # Không có SKIP LOCKED (SQLite): hai worker có thể đọc cùng một lô, nên nhận
+        # từng email bằng UPDATE có điều kiện và chỉ giữ các email mà UPDATE đã đổi
+        return [
+            email for email in pending[:batch_size]
+            if OutboundEmail.objects.filter(pk=email.pk, status=OutboundEmail.STATUS_PENDING).update(**claim)
+        ]
+
+
+def _build_message(email, smtp_connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=smtp_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _mark_sent(email):
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status=OutboundEmail.STATUS_SENT, attempts=email.attempts + 1,
+        sent_at=timezone.now(), locked_at=None, last_error='',
+    )
+
+
+def _mark_failed(email, error):
+    attempts = email.attempts + 1
+    if attempts >= _max_attempts():
+        status, next_attempt_at = OutboundEmail.STATUS_FAILED, timezone.now()
+    else:
+        status, next_attempt_at = OutboundEmail.STATUS_PENDING, timezone.now() + _retry_delay(attempts)
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status=status, attempts=attempts, next_attempt_at=next_attempt_at,
+        locked_at=None, last_error=str(error)[:2000],
+    )
+    logger.warning(f"[OUTBOX] Lỗi gửi email #{email.pk} '{email.subject}' (lần {attempts}): {error}")
+
+
+def send_pending(batch_size=50, smtp_connection=None):
+    """
+    Gửi một lô email đến hạn. Trả về (số email đã gửi, số email lỗi).
+    Truyền smtp_connection để dùng lại một kết nối đang mở qua nhiều lô.
+    """
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    own_connection = smtp_connection is None
+    if own_connection:
+        smtp_connection = get_connection(fail_silently=False)
+
+    sent = failed = 0
+    try:
+        for email in batch:
+            try:
+                smtp_connection.open()  # Không làm gì nếu kết nối đang mở
+                _build_message(email, smtp_connection).send()
+            except Exception as e:
+                _mark_failed(email, e)
+                failed += 1
+                # Kết nối có thể đã hỏng: đóng để email sau mở kết nối mới
+                try:
+                    smtp_connection.close()
+                except Exception:
+                    pass
+            else:
+                _mark_sent(email)
+                sent += 1
+    finally:
+        if own_connection:
+            smtp_connection.close()
+    return sent, failed
+
+
+def retry(queryset):
+    """Đưa các email (thường là email "Lỗi") về hàng đợi để gửi lại ngay."""
+    return queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+        status=OutboundEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now(), locked_at=None,
+    )
@@ -0,0 +1,186 @@
+"""
+Cache toàn trang cho khách chưa đăng nhập (trang giải đấu, trận đấu, đội, livestream, blog...).
+
+Phần lớn lượt xem trong ngày thi đấu là khán giả không đăng nhập, và với họ các
+trang công khai giống hệt nhau. PageCacheMiddleware (middleware.py) lưu nguyên
+response của các trang trong PAGE_CACHE_ROUTES và trả lại cho khách sau mà
+không chạy view, context processor hay truy vấn nào.
+
+- Người dùng đã đăng nhập, request không phải GET, request có thông báo (messages)
+  đang chờ: bỏ qua cache, view chạy như bình thường.
+- Key của trang = URL đầy đủ (kể cả query string). Mỗi trang được gắn các
+  "surrogate key" của đối tượng nó hiển thị: cố định theo route (vd. 'match:{pk}')
+  và do view thêm vào (add_surrogate_keys(request, 'team:3')). Mỗi surrogate key là
+  một namespace trong cache_namespaces; bản cache chỉ hợp lệ khi phiên bản của mọi
+  key vẫn như lúc lưu. Signal chỉ cần bump key của đối tượng vừa đổi
+  (tournaments/signals.py, blog/signals.py), các trang khác vẫn giữ cache.
+- Token CSRF trong trang được lưu dưới dạng chuỗi giữ chỗ và thay bằng token của
+  từng khách khi trả về, nên các form/AJAX trên trang cache vẫn hợp lệ.
+- Header `Surrogate-Key` liệt kê các key của trang (dùng được với CDN hỗ trợ purge
+  theo key), `X-Page-Cache: HIT/MISS` để kiểm tra.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.urls import Resolver404, resolve
+
+from . import cache_namespaces
+
+CSRF_PLACEHOLDER = 'dbpsports-page-cache-csrf-token'
+KEY_PREFIX = 'pagecache:'
+
+# view_name -> (surrogate key cố định, thời gian cache riêng hoặc None = PAGE_CACHE_SECONDS)
+# {pk} được thay bằng tham số trên URL.
+PAGE_CACHE_ROUTES = {
+    'home': ((cache_namespaces.HOMEPAGE_BANNERS, cache_namespaces.HOMEPAGE_TOURNAMENTS), None),
+    'tournaments_active': ((cache_namespaces.TOURNAMENT_LISTS,), None),
+    'archive': ((cache_namespaces.TOURNAMENT_LISTS,), None),
+    'tournament_detail': (('tournament:{pk}',), None),
+    'tournament_schedule_print': (('tournament:{pk}',), None),
+    'match_detail': (('match:{pk}',), None),
+    'match_print': (('match:{pk}',), None),
+    'public_team_detail': (('team:{pk}',), None),
+    # Livestream chọn trận theo thời gian hiện tại nên chỉ cache ngắn
+    'livestream': ((cache_namespaces.LIVESTREAM,), 60),
+    'livestream_match': (('match:{pk}',), 60),
+    'job_market': ((cache_namespaces.JOBS,), None),
+    'job_detail': ((cache_namespaces.JOBS,), None),
+    'blog:home': ((cache_namespaces.BLOG,), None),
+    'blog:post_list': ((cache_namespaces.BLOG,), None),
+    'blog:post_detail': ((cache_namespaces.BLOG,), None),
+    'blog:category': ((cache_namespaces.BLOG,), None),
+    'blog:tag': ((cache_namespaces.BLOG,), None),
+}
+
+# view_name -> hàm gọi mỗi lần trang được trả từ cache (vd. đếm lượt xem), xem on_cache_hit()
+_hit_callbacks = {}
+
+
+class PageCapture:
+    """Trang đang được tạo để lưu cache: route và các surrogate key đã thu thập."""
+
+    def __init__(self, view_name, kwargs, keys, timeout):
+        self.view_name = view_name
+        self.kwargs = kwargs
+        self.keys = list(keys)
+        self.timeout = timeout
+        self.versions = {}
+
+
+def on_cache_hit(view_name, callback):
+    """Đăng ký callback(request, **url_kwargs) chạy khi trang `view_name` được trả từ cache."""
+    _hit_callbacks[view_name] = callback
+
+
+def add_surrogate_keys(request, *keys):
+    """View gọi để gắn thêm key của các đối tượng nó hiển thị; không làm gì nếu trang không được cache."""
+    capture = getattr(request, '_page_cache', None)
+    if capture is not None:
+        capture.keys.extend(key for key in keys if key not in capture.keys)
+
+
+def csrf_placeholder(request):
+    """Context processor: trang đang được lưu cache dùng chuỗi giữ chỗ thay cho token CSRF thật."""
+    if getattr(request, '_page_cache', None) is not None:
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
+
+
+def _route(request):
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    route = PAGE_CACHE_ROUTES.get(match.view_name)
+    if route is None:
+        return None
+    keys, timeout = route
+    return PageCapture(
+        match.view_name,
+        match.kwargs,
+        [key.format(**match.kwargs) for key in keys],
+        timeout or getattr(settings, 'PAGE_CACHE_SECONDS', 600),
+    )
+
+
+def _cache_key(request):
+    url_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{KEY_PREFIX}{request.get_host()}:{url_hash}'
+
+
+def is_cacheable_request(request):
+    if request.method != 'GET' or not getattr(settings, 'PAGE_CACHE_ENABLED', True):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Thông báo đang chờ hiển thị (vd. sau khi đăng xuất) là nội dung riêng của khách này
+    return not len(messages.get_messages(request))
+
+
+def _with_csrf_token(request, content):
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    return content
+
+
+def start(request):
+    """
+    Trả về response từ cache nếu có và còn hợp lệ; nếu không, đánh dấu request để
+    process() lưu lại response. None nếu trang không thuộc diện cache.
+    """
+    capture = _route(request)
+    if capture is None or not is_cacheable_request(request):
+        return None
+
+    entry = cache.get(_cache_key(request))
+    if entry is not None and cache_namespaces.get_versions(*entry['versions']) == entry['versions']:
+        response = HttpResponse(_with_csrf_token(request, entry['content']), status=entry['status'])
+        for header, value in entry['headers']:
+            response[header] = value
+        response['X-Page-Cache'] = 'HIT'
+        callback = _hit_callbacks.get(capture.view_name)
+        if callback is not None:
+            callback(request, **capture.kwargs)
+        return response
+
+    # Phiên bản được đọc trước khi view chạy: nếu dữ liệu đổi trong lúc tạo trang,
+    # bản cache mang phiên bản cũ và sẽ bị bỏ qua ở lần đọc sau.
+    capture.versions = cache_namespaces.get_versions(*capture.keys)
+    request._page_cache = capture
+    return None
+
+
+def process(request, response):
+    """Lưu response của trang đang được đánh dấu (nếu phù hợp) và thay chuỗi giữ chỗ CSRF."""
+    capture = getattr(request, '_page_cache', None)
+    if capture is None:
+        return response
+    request._page_cache = None
+
+    if response.streaming:
+        return response
+    cacheable = (
+        response.status_code == 200
+        and not response.cookies
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+        and not (hasattr(request, 'session') and request.session.modified)
+    )
+    if cacheable:
+        extra_keys = [key for key in capture.keys if key not in capture.versions]
+        versions = {**capture.versions, **cache_namespaces.get_versions(*extra_keys)}
+        response['Surrogate-Key'] = ' '.join(capture.keys)
+        cache.set(_cache_key(request), {
+            'versions': versions,
+            'status': response.status_code,
+            'headers': list(response.items()),
+            'content': response.content,
+        }, capture.timeout)
+        response['X-Page-Cache'] = 'MISS'
+    response.content = _with_csrf_token(request, response.content)
+    return response
@@ -0,0 +1,162 @@
+"""
+Phân trang theo khóa (keyset / cursor) cho các danh sách dài.
+
+Thay vì OFFSET (database phải đọc rồi bỏ qua mọi dòng của các trang trước, và kết
+quả bị trùng/sót khi có dòng mới chen vào), trang sau được lọc bằng giá trị cột
+sắp xếp của dòng cuối trang trước:
+
+    ORDER BY market_value DESC, id DESC
+    WHERE market_value < :v OR (market_value = :v AND id < :id)
+
+Con trỏ (`cursor`) là chuỗi base64 chứa các giá trị đó, đặt trong query string.
+Khóa chính luôn được thêm vào cuối thứ tự sắp xếp để thứ tự ổn định. Các cột sắp
+xếp phải là cột của chính model hoặc annotation (vd. `search_rank`) và không NULL.
+
+Cách dùng:
+    page = paginate(queryset, ('-market_value', '-pk'), cursor=request.GET.get('cursor'))
+    if wants_json(request):
+        return json_page(page, lambda player: {...})
+    context = {'players': page, **page_links(request, page)}
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse
+
+PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+CURSOR_PARAM = 'cursor'
+
+
+class KeysetPage:
+    """Một trang kết quả; lặp được như list. `offset`: số dòng thuộc các trang trước."""
+
+    def __init__(self, items, next_cursor, offset=0):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.offset = offset
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Không mã hóa được giá trị con trỏ: {value!r}')
+
+
+def encode_cursor(values, offset):
+    data = json.dumps({'v': values, 'n': offset}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Trả về (values, offset), hoặc (None, 0) nếu con trỏ rỗng/không hợp lệ (về trang đầu)."""
+    if not cursor:
+        return None, 0
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values, offset = data['v'], int(data.get('n', 0))
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None, 0
+    if not isinstance(values, list) or len(values) != size:
+        return None, 0
+    return values, max(offset, 0)
+
+
+def _stable_ordering(ordering):
+    ordering = list(ordering)
+    if ordering[-1].lstrip('-') not in ('pk', 'id'):
+        ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+    return ordering
+
+
+def _after(ordering, values):
+    """Điều kiện "đứng sau dòng có giá trị `values`" theo thứ tự `ordering`."""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        for previous, value in zip(ordering[:index], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def paginate(queryset, ordering, cursor=None, per_page=PAGE_SIZE):
+    """Lấy một trang của `queryset` sắp xếp theo `ordering`, bắt đầu sau `cursor`."""
+    ordering = _stable_ordering(ordering)
+    per_page = max(1, min(int(per_page), MAX_PAGE_SIZE))
+    values, offset = decode_cursor(cursor, len(ordering))
+
+    queryset = queryset.order_by(*ordering)
+    rows = None
+    if values is not None:
+        try:
+            rows = list(queryset.filter(_after(ordering, values))[:per_page + 1])
+        except (ValueError, TypeError, ValidationError):
+            # Con trỏ bị sửa (giá trị sai kiểu cột): về trang đầu như con trỏ không hợp lệ
+            offset = 0
+    if rows is None:
+        rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, field.lstrip('-')) for field in ordering], offset + per_page
+        )
+    return KeysetPage(rows, next_cursor, offset)
+
+
+def _page_url(request, cursor):
+    params = request.GET.copy()
+    params.pop('format', None)
+    params.pop(CURSOR_PARAM, None)
+    if cursor:
+        params[CURSOR_PARAM] = cursor
+    return f'?{params.urlencode()}'
+
+
+def page_links(request, page):
+    """
+    Link trang kế tiếp / trang đầu (giữ nguyên bộ lọc hiện tại) cho template
+    partials/_keyset_pager.html; None nếu không có.
+    """
+    return {
+        'next_page_url': _page_url(request, page.next_cursor) if page.has_next else None,
+        'first_page_url': _page_url(request, None) if page.offset else None,
+    }
+
+
+def wants_json(request):
+    return request.GET.get('format') == 'json'
+
+
+def json_page(page, serialize):
+    """JsonResponse cho cuộn vô hạn: results, next_cursor, has_next."""
+    return JsonResponse({
+        'results': [serialize(item) for item in page],
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
+    })
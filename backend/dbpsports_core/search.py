@@ -0,0 +1,264 @@
+"""
+Tìm kiếm toàn văn (cầu thủ, đội, giải đấu, việc làm, sản phẩm, người dùng).
+
+Mỗi loại đối tượng được đăng ký một lần bằng register() (trong signals.py của app)
+với danh sách trường và trọng số. Khi đối tượng được lưu/xóa, các từ của nó
+(đã bỏ dấu tiếng Việt, viết thường) được ghi vào bảng chỉ mục đảo ngược SearchEntry;
+tìm kiếm chỉ tra chỉ mục (kind, term) thay vì quét `icontains` toàn bảng. Trường qua
+quan hệ ('category.name') được đánh chỉ mục lại khi đối tượng liên quan đổi giá trị.
+
+Bảng chỉ mục dùng chung cho mọi loại database (SQLite, MySQL, PostgreSQL) nên kết
+quả và thứ tự xếp hạng giống nhau ở dev và production.
+
+Cách dùng:
+    products = search.filter_queryset(Product.objects.filter(status='published'), 'product', q)
+    page = search.search('player', q, page=request.GET.get('page'))
+
+Tìm "nguyen van" khớp "Nguyễn Văn An": mọi từ phải có trong đối tượng, từ cuối được
+khớp theo tiền tố (gõ dở vẫn ra kết quả). Kết quả xếp theo tổng trọng số các từ khớp.
+Dựng lại toàn bộ chỉ mục: `python manage.py rebuild_search_index [--kind player]`.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import SearchEntry
+
+MAX_TERM_LENGTH = 40
+MAX_QUERY_TERMS = 8
+MAX_WEIGHT = 1000
+PAGE_SIZE = 20
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text):
+    """Bỏ dấu tiếng Việt (kể cả đ/Đ), viết thường: 'Đà Nẵng' -> 'da nang'."""
+    text = unicodedata.normalize('NFD', str(text or ''))
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    return text.replace('đ', 'd').replace('Đ', 'D').lower().strip()
+
+
+def tokenize(text):
+    """Tách văn bản đã chuẩn hóa thành các từ (chữ cái/chữ số)."""
+    return [token[:MAX_TERM_LENGTH] for token in _TOKEN_RE.findall(normalize_text(text))]
+
+
+@dataclass
+class SearchIndex:
+    """Cấu hình tìm kiếm cho một model: trường (có thể qua quan hệ, 'team.name') -> trọng số."""
+    kind: str
+    model: type
+    fields: Dict[str, int]
+    select_related: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def local_fields(self):
+        return {path.split('.')[0] for path in self.fields}
+
+    @property
+    def related_fields(self):
+        """Quan hệ -> các trường của đối tượng liên quan được tìm kiếm: {'category': ('name',)}."""
+        related = {}
+        for path in self.fields:
+            if '.' in path:
+                relation, attr = path.split('.', 1)
+                related.setdefault(relation, ())
+                related[relation] += (attr,)
+        return related
+
+    def terms(self, instance):
+        """Trả về dict: từ -> trọng số (cộng dồn nếu từ có ở nhiều trường)."""
+        weights = {}
+        for path, weight in self.fields.items():
+            value = instance
+            for attr in path.split('.'):
+                value = getattr(value, attr, None) if value is not None else None
+            for token in tokenize(value):
+                weights[token] = min(weights.get(token, 0) + weight, MAX_WEIGHT)
+        return weights
+
+
+_registry = {}
+
+
+def register(kind, model, fields, select_related=()):
+    """Đăng ký một model vào chỉ mục tìm kiếm và kết nối signal để cập nhật dần."""
+    index = SearchIndex(kind=kind, model=model, fields=dict(fields), select_related=tuple(select_related))
+    _registry[kind] = index
+
+    def reindex_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+        if raw:
+            return
+        # Lưu một phần (vd. chỉ cập nhật tồn kho, lượt xem) không đụng trường được tìm kiếm
+        if update_fields is not None and not index.local_fields.intersection(update_fields):
+            return
+        index_object(kind, instance)
+
+    def remove_on_delete(sender, instance, **kwargs):
+        remove_object(kind, instance.pk)
+
+    post_save.connect(reindex_on_save, sender=model, weak=False, dispatch_uid=f'search_index_save:{kind}')
+    post_delete.connect(remove_on_delete, sender=model, weak=False, dispatch_uid=f'search_index_delete:{kind}')
+    for relation, attrs in index.related_fields.items():
+        _connect_related(index, relation, attrs)
+    return index
+
+
+def _connect_related(index, relation, attrs):
+    """
+    Trường qua quan hệ ('category.name'): khi đối tượng liên quan đổi các trường đó
+    (vd. đổi tên danh mục), đánh chỉ mục lại các đối tượng trỏ tới nó.
+    """
+    related_model = index.model._meta.get_field(relation).related_model
+    uid = f'search_index_related:{index.kind}:{relation}'
+
+    def remember_related_values(sender, instance, raw=False, **kwargs):
+        instance._search_related_snapshot = None
+        if instance.pk and not raw:
+            instance._search_related_snapshot = sender._default_manager.filter(pk=instance.pk).values_list(
+                *attrs
+            ).first()
+
+    def reindex_related(sender, instance, created=False, raw=False, **kwargs):
+        old = getattr(instance, '_search_related_snapshot', None)
+        if raw or created or old is None:
+            return
+        if old == tuple(getattr(instance, attr) for attr in attrs):
+            return
+        objects = index.model._default_manager.select_related(*index.select_related).filter(**{relation: instance})
+        for obj in objects.iterator():
+            index_object(index.kind, obj)
+
+    pre_save.connect(remember_related_values, sender=related_model, weak=False, dispatch_uid=f'{uid}:pre')
+    post_save.connect(reindex_related, sender=related_model, weak=False, dispatch_uid=uid)
+
+
+def get_index(kind):
+    return _registry[kind]
+
+
+def registered_kinds():
+    return list(_registry)
+
+
+def index_object(kind, instance):
+    """Cập nhật các từ của một đối tượng; không ghi gì nếu nội dung tìm kiếm không đổi."""
+    terms = get_index(kind).terms(instance)
+    current = dict(
+        SearchEntry.objects.filter(kind=kind, object_id=instance.pk).values_list('term', 'weight')
+    )
+    if current == terms:
+        return False
+    with transaction.atomic():
+        stale = [term for term, weight in current.items() if terms.get(term) != weight]
+        if stale:
+            SearchEntry.objects.filter(kind=kind, object_id=instance.pk, term__in=stale).delete()
+        SearchEntry.objects.bulk_create([
+            SearchEntry(kind=kind, object_id=instance.pk, term=term, weight=weight)
+            for term, weight in terms.items()
+            if current.get(term) != weight
+        ])
+    return True
+
+
+def remove_object(kind, object_id):
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild(kind, batch_size=500):
+    """Dựng lại toàn bộ chỉ mục của một loại đối tượng. Trả về số đối tượng đã đánh chỉ mục."""
+    index = get_index(kind)
+    queryset = index.model._default_manager.select_related(*index.select_related).order_by('pk')
+    count = 0
+    with transaction.atomic():
+        SearchEntry.objects.filter(kind=kind).delete()
+        entries = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            count += 1
+            entries.extend(
+                SearchEntry(kind=kind, object_id=instance.pk, term=term, weight=weight)
+                for term, weight in index.terms(instance).items()
+            )
+            if len(entries) >= batch_size:
+                SearchEntry.objects.bulk_create(entries)
+                entries = []
+        SearchEntry.objects.bulk_create(entries)
+    return count
+
+
+def _query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def has_terms(query):
+    """Query có ít nhất một từ tìm được (không rỗng, không chỉ gồm ký tự đặc biệt)."""
+    return bool(_query_terms(query))
+
+
+def _term_condition(term, prefix):
+    if not prefix:
+        return Q(term=term)
+    # So sánh theo khoảng thay vì LIKE để dùng được chỉ mục (kind, term) ở mọi database
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    return Q(term__gte=term, term__lt=upper)
+
+
+def _matches(kind, query):
+    """
+    Queryset SearchEntry nhóm theo object_id, chỉ gồm đối tượng khớp mọi từ của `query`,
+    kèm cột `score`. None nếu query không có từ nào.
+    """
+    terms = _query_terms(query)
+    if not terms:
+        return None
+    conditions = [_term_condition(term, prefix=index == len(terms) - 1) for index, term in enumerate(terms)]
+    matched_flags = {
+        f'matched_{index}': Max(Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for index, condition in enumerate(conditions)
+    }
+    any_condition = Q()
+    for condition in conditions:
+        any_condition |= condition
+    return (
+        SearchEntry.objects.filter(any_condition, kind=kind)
+        .values('object_id')
+        .annotate(score=Sum('weight'), **matched_flags)
+        .filter(**{name: 1 for name in matched_flags})
+        .order_by()
+    )
+
+
+def filter_queryset(queryset, kind, query, ordered=True):
+    """
+    Lọc `queryset` (của model đã đăng ký với `kind`) theo `query`, thêm cột `search_rank`.
+    ordered=True: sắp xếp theo độ liên quan (gọi order_by() sau đó để sắp xếp khác).
+    Query không có từ nào tìm được (rỗng, chỉ có ký tự đặc biệt): trả về queryset rỗng
+    như search(), vẫn có cột `search_rank`.
+    """
+    matches = _matches(kind, query)
+    if matches is None:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+    rank = matches.filter(object_id=OuterRef('pk')).values('score')[:1]
+    queryset = queryset.filter(pk__in=matches.values('object_id')).annotate(
+        search_rank=Subquery(rank, output_field=IntegerField())
+    )
+    if ordered:
+        queryset = queryset.order_by('-search_rank', '-pk')
+    return queryset
+
+
+def search(kind, query, page=1, per_page=PAGE_SIZE, queryset=None):
+    """Kết quả tìm kiếm đã xếp hạng và phân trang (django.core.paginator.Page)."""
+    index = get_index(kind)
+    if queryset is None:
+        queryset = index.model._default_manager.select_related(*index.select_related)
+    results = filter_queryset(queryset, kind, query)
+    return Paginator(results, per_page).get_page(page)
@@ -59,7 +59,6 @@ INSTALLED_APPS = [
 
 # === Middleware ===
 MIDDLEWARE = [
-    'django.middleware.cache.UpdateCacheMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -70,7 +69,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'shop.middleware.DisableCacheMiddleware',  # Disable cache cho shop API
-    'django.middleware.cache.FetchFromCacheMiddleware',
+    'dbpsports_core.middleware.PageCacheMiddleware',  # Cache toàn trang cho khách chưa đăng nhập (xem page_cache.py)
 ]
 
 ROOT_URLCONF = "dbpsports_core.urls"
@@ -89,11 +88,8 @@ TEMPLATES = [
                 "django.template.context_processors.request",  # bắt buộc cho allauth
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
-                "tournaments.context_processors.unread_announcements_count",
-                "tournaments.context_processors.unread_notifications_count",
-                "tournaments.context_processors.user_cart_context",
-                "users.context_processors.user_roles_context",
-                "shop.context_processors.unified_shop_context",
+                "dbpsports_core.user_chrome.user_chrome",
+                "dbpsports_core.page_cache.csrf_placeholder",
             ],
         },
     },
@@ -107,11 +103,27 @@ DATABASES = {
 }
 
 # === Cache ===
+# Chọn loại cache bằng biến môi trường CACHE_BACKEND (dùng chung giữa các worker Passenger/gunicorn):
+#   file   (mặc định) - thư mục CACHE_LOCATION, dùng chung cho mọi worker trên cùng máy chủ
+#   db     - bảng CACHE_LOCATION trong database (cần chạy `python manage.py createcachetable`)
+#   redis  - REDIS_URL, dùng chung giữa nhiều máy chủ (cần cài gói `redis`)
+#   locmem - bộ nhớ riêng của từng worker (chỉ nên dùng khi dev/test)
+# Xem tình trạng và tỉ lệ hit của cache: `python manage.py cache_report`
+CACHE_BACKEND = env("CACHE_BACKEND", default="file")
+CACHE_BACKEND_CLASSES = {
+    "file": ("dbpsports_core.cache_backends.FileBasedCache", str(BASE_DIR / ".cache")),
+    "db": ("dbpsports_core.cache_backends.DatabaseCache", "dbpsports_cache"),
+    "redis": ("dbpsports_core.cache_backends.RedisCache", env("REDIS_URL", default="redis://127.0.0.1:6379/1")),
+    "locmem": ("dbpsports_core.cache_backends.LocMemCache", "unique-snowflake"),
+}
+_cache_backend, _cache_location = CACHE_BACKEND_CLASSES[CACHE_BACKEND]
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": _cache_backend,
+        "LOCATION": env("CACHE_LOCATION", default=_cache_location),
         "TIMEOUT": 200,  # Thời gian cache (giây), 200s = 3.3 phút
+        "KEY_PREFIX": env("CACHE_KEY_PREFIX", default="dbpsports"),
+        "OPTIONS": {"MAX_ENTRIES": env.int("CACHE_MAX_ENTRIES", default=3000)},
     }
 }
 
@@ -168,6 +180,29 @@ EMAIL_USE_TLS = False
 EMAIL_USE_SSL = True
 DEFAULT_FROM_EMAIL = "DBP Sports <no-reply@dbpsports.com>"
 
+# Hàng đợi email (dbpsports_core/outbox.py): request chỉ xếp email vào hàng đợi,
+# worker `python manage.py process_email_outbox --loop` gửi qua một kết nối SMTP dùng chung
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60  # giây, tăng gấp đôi sau mỗi lần lỗi
+
+# Newsletter (dbpsports_core/newsletter.py): gửi theo lô, phần còn dở được gửi tiếp
+# bằng `python manage.py send_newsletter_campaigns`
+NEWSLETTER_CHUNK_SIZE = 100
+NEWSLETTER_RATE_PER_SECOND = env.float("NEWSLETTER_RATE_PER_SECOND", default=5)  # 0 = không giới hạn
+NEWSLETTER_REQUEST_TIME_LIMIT = 20  # giây tối đa gửi trong một request web
+
+# Luồng sự kiện trực tiếp của trận đấu (tournaments/live_feed.py)
+# Số giây tối đa một request của người xem chờ sự kiện mới (long-poll, mỗi người xem giữ
+# một worker trong lúc chờ); 0 = trả về ngay từ cache, client tự hỏi lại định kỳ
+LIVE_FEED_WAIT_SECONDS = env.int("LIVE_FEED_WAIT_SECONDS", default=0)
+
+# Giá trị phiếu bầu (tournaments/valuation.py): số giây giữ trong cache trước khi đếm lại người dùng
+VOTE_VALUE_REFRESH_SECONDS = env.int("VOTE_VALUE_REFRESH_SECONDS", default=3600)
+
+# Cache toàn trang cho khách chưa đăng nhập (dbpsports_core/page_cache.py)
+PAGE_CACHE_ENABLED = env.bool("PAGE_CACHE_ENABLED", default=True)
+PAGE_CACHE_SECONDS = env.int("PAGE_CACHE_SECONDS", default=600)  # trang bị làm mới sớm hơn khi dữ liệu đổi
+
 # Admin emails for notifications
 ADMIN_EMAILS = [
     ADMIN_EMAIL,
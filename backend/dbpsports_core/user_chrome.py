@@ -0,0 +1,155 @@
+"""
+"User chrome": các số liệu hiển thị trên khung chung của mọi trang
+(số tin chưa đọc, số thông báo, giỏ hàng, vai trò của người dùng).
+
+Trước đây mỗi trang chạy 5 context processor riêng (8-10 truy vấn) kể cả khi
+template không dùng tới. Nay chỉ còn một đối tượng UserChrome cho mỗi request:
+- Các giá trị được đưa vào context dưới dạng hàm, template chỉ gọi (và chỉ
+  truy vấn) khi thực sự dùng tới biến đó; mỗi giá trị tính tối đa một lần/request.
+- Kết quả được cache theo từng người dùng (namespace user:<id>), và bị làm mất
+  hiệu lực khi thông báo, tin tức, giỏ hàng hoặc vai trò thay đổi
+  (xem tournaments/unread_counters.py, shop/signals.py, users/models.py).
+- Số thông báo/tin tức chưa đọc đọc từ bộ đếm UserBadgeCounter (một dòng theo
+  khóa chính) thay vì COUNT(*) trên toàn bộ lịch sử.
+"""
+
+from dbpsports_core import cache_namespaces
+from shop.cart_summary import EMPTY_CART, main_cart_summary, summarize
+
+CHROME_CACHE_TIMEOUT = 60 * 10  # 10 phút
+
+ANONYMOUS_CONTEXT = {
+    'unread_announcements_count': 0,
+    'unread_notifications_count': 0,
+    'user_cart': None,
+    'main_cart_count': 0,
+    'main_cart_total': 0,
+    'org_cart_count': 0,
+    'org_cart_total': 0,
+    'is_player_role': False,
+    'is_organizer_role': False,
+}
+
+
+def bump_users(*user_ids):
+    """Làm mất hiệu lực các số liệu đã cache của những người dùng này."""
+    namespaces = [cache_namespaces.user_namespace(user_id) for user_id in set(user_ids) if user_id]
+    if namespaces:
+        cache_namespaces.bump(*namespaces)
+
+
+class UserChrome:
+    """Các số liệu của khung trang cho người dùng đã đăng nhập, tính lười và ghi nhớ trong request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.user_id = request.user.pk
+        self._values = {}
+
+    def _get(self, name, compute, *extra_namespaces):
+        if name not in self._values:
+            self._values[name] = cache_namespaces.get_or_set(
+                f'chrome:{name}:{self.user_id}',
+                [cache_namespaces.user_namespace(self.user_id), *extra_namespaces],
+                compute,
+                CHROME_CACHE_TIMEOUT,
+            )
+        return self._values[name]
+
+    # --- Tin tức từ BTC & thông báo ---
+
+    def badges(self):
+        return self._get('badges', self._read_badge_counter)
+
+    def _read_badge_counter(self):
+        # Một dòng theo khóa chính, không phụ thuộc số lượng thông báo đã có
+        from tournaments.models import UserBadgeCounter
+        from tournaments.unread_counters import ensure_counters
+
+        counts = UserBadgeCounter.objects.filter(pk=self.user_id).values_list(
+            'unread_notifications', 'unread_announcements'
+        ).first()
+        if counts is None:
+            ensure_counters([self.user_id])
+            counts = UserBadgeCounter.objects.filter(pk=self.user_id).values_list(
+                'unread_notifications', 'unread_announcements'
+            ).first() or (0, 0)
+        return counts
+
+    def unread_notifications_count(self):
+        return max(self.badges()[0], 0)
+
+    def unread_announcements_count(self):
+        return max(self.badges()[1], 0)
+
+    # --- Giỏ hàng ---
+
+    def cart(self):
+        # Dùng chung cache với Cart.summary (shop/cart_summary.py)
+        if 'cart' not in self._values:
+            self._values['cart'] = main_cart_summary(self.user_id)
+        return self._values['cart']
+
+    def org_cart(self):
+        """Giỏ hàng Shop BTC, chỉ có trên các trang thuộc namespace organization_shop."""
+        match = self.request.resolver_match
+        if not match or 'organization_shop' not in match.namespace:
+            return EMPTY_CART
+        org_slug = match.kwargs.get('org_slug')
+        if not org_slug:
+            return EMPTY_CART
+        return self._get(
+            f'org_cart:{org_slug}', lambda: self._org_cart_summary(org_slug), cache_namespaces.SHOP_CATALOG
+        )
+
+    def _org_cart_summary(self, org_slug):
+        from shop.organization_models import OrganizationCartItem
+        return summarize(OrganizationCartItem.objects.filter(
+            cart__user_id=self.user_id, cart__organization__slug=org_slug,
+        ))
+
+    # --- Vai trò ---
+
+    def roles(self):
+        return self._get('roles', self._role_ids)
+
+    def _role_ids(self):
+        from users.models import Profile
+
+        role_ids = frozenset(
+            Profile.roles.through.objects.filter(profile__user_id=self.user_id).values_list('role_id', flat=True)
+        )
+        if not role_ids:
+            # Tự động tạo profile nếu user chưa có
+            Profile.objects.get_or_create(user_id=self.user_id)
+        return role_ids
+
+    def as_context(self):
+        # Template tự gọi các hàm này khi (và chỉ khi) dùng tới biến tương ứng
+        return {
+            'unread_announcements_count': self.unread_announcements_count,
+            'unread_notifications_count': self.unread_notifications_count,
+            'user_cart': self.cart,
+            'main_cart_count': lambda: self.cart().total_items,
+            'main_cart_total': lambda: self.cart().total_price,
+            'org_cart_count': lambda: self.org_cart().total_items,
+            'org_cart_total': lambda: self.org_cart().total_price,
+            'is_player_role': lambda: 'PLAYER' in self.roles(),
+            'is_organizer_role': lambda: 'ORGANIZER' in self.roles(),
+        }
+
+
+def get_user_chrome(request):
+    """UserChrome của request hiện tại (tạo một lần cho mỗi request)."""
+    chrome = getattr(request, '_user_chrome', None)
+    if chrome is None:
+        chrome = request._user_chrome = UserChrome(request)
+    return chrome
+
+
+def user_chrome(request):
+    """Context processor thay cho unread_announcements_count, unread_notifications_count,
+    user_cart_context, user_roles_context và unified_shop_context."""
+    if not request.user.is_authenticated:
+        return dict(ANONYMOUS_CONTEXT)
+    return get_user_chrome(request).as_context()
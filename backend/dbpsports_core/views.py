@@ -6,8 +6,6 @@ from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.utils import timezone
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.views.decorators.csrf import csrf_protect
 from django.contrib.auth.decorators import login_required
@@ -15,6 +13,7 @@ import json
 import logging
 
 from .models import NewsletterSubscription
+from .newsletter import create_campaign, send_campaign
 
 logger = logging.getLogger(__name__)
 
@@ -103,69 +102,29 @@ def unsubscribe_newsletter(request, email):
     return render(request, 'newsletter_unsubscribed.html')
 
 
-def send_newsletter_email(subject, content, subscriber_email, tournament_highlight=None):
+def send_newsletter_bulk(subject, content, tournament_highlight=None, test_mode=False, time_limit=None):
     """
-    Gửi email newsletter cho một subscriber
+    Gửi newsletter cho tất cả subscribers hoạt động.
+    Tạo một chiến dịch (NewsletterCampaign) rồi gửi theo lô; nếu có time_limit (giây)
+    thì dừng khi hết giờ, phần còn lại được gửi tiếp bằng lệnh send_newsletter_campaigns.
     """
     try:
-        # Render HTML template
-        html_content = render_to_string('emails/newsletter.html', {
-            'subject': subject,
-            'content': content,
-            'subscriber_email': subscriber_email,
-            'tournament_highlight': tournament_highlight
-        })
-        
-        # Create email
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=content,  # Plain text fallback
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[subscriber_email]
-        )
-        
-        # Attach HTML version
-        email.attach_alternative(html_content, "text/html")
-        
-        # Send email
-        email.send()
-        
-        logger.info(f"Newsletter sent successfully to {subscriber_email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send newsletter to {subscriber_email}: {str(e)}")
-        return False
-
-
-def send_newsletter_bulk(subject, content, tournament_highlight=None, test_mode=False):
-    """
-    Gửi newsletter cho tất cả subscribers hoạt động
-    """
-    try:
-        # Lấy tất cả subscribers hoạt động
-        active_subscribers = NewsletterSubscription.objects.filter(is_active=True)
-        
+        campaign = create_campaign(subject, content, tournament_highlight, test_mode=test_mode)
         if test_mode:
-            # Test mode - chỉ gửi cho 1 email đầu tiên
-            active_subscribers = active_subscribers[:1]
             logger.info(f"Test mode: Sending newsletter to first subscriber only")
-        
-        success_count = 0
-        total_count = active_subscribers.count()
-        
-        for subscriber in active_subscribers:
-            if send_newsletter_email(subject, content, subscriber.email, tournament_highlight):
-                success_count += 1
-        
-        logger.info(f"Newsletter bulk send completed: {success_count}/{total_count} successful")
+
+        result = send_campaign(campaign, time_limit=time_limit)
+
+        logger.info(f"Newsletter bulk send: {campaign.sent_count}/{campaign.total_count} successful")
         return {
             'success': True,
-            'sent': success_count,
-            'total': total_count,
-            'failed': total_count - success_count
+            'campaign_id': campaign.pk,
+            'sent': campaign.sent_count,
+            'total': campaign.total_count,
+            'failed': campaign.failed_count,
+            'pending': result['pending'],
         }
-        
+
     except Exception as e:
         logger.error(f"Failed to send newsletter bulk: {str(e)}")
         return {
@@ -187,13 +146,18 @@ def newsletter_form_view(request):
             messages.error(request, 'Vui lòng nhập đầy đủ tiêu đề và nội dung!')
         else:
             try:
-                result = send_newsletter_bulk(subject, content, test_mode=test_mode)
+                result = send_newsletter_bulk(
+                    subject, content, test_mode=test_mode,
+                    time_limit=getattr(settings, 'NEWSLETTER_REQUEST_TIME_LIMIT', 20),
+                )
                 
                 if result['success']:
                     if test_mode:
                         messages.success(request, f'✅ Gửi newsletter test thành công! Đã gửi {result["sent"]} email.')
                     else:
                         messages.success(request, f'✅ Gửi newsletter thành công! Đã gửi {result["sent"]}/{result["total"]} email.')
+                    if result['pending']:
+                        messages.info(request, f'⏳ Còn {result["pending"]} email đang chờ, sẽ được gửi tiếp bởi tiến trình nền (send_newsletter_campaigns).')
                 else:
                     messages.error(request, f'❌ Lỗi khi gửi newsletter: {result["error"]}')
                     
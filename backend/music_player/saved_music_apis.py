@@ -32,15 +32,23 @@ def rate_limit(max_requests=10, window=60):
                 ip = request.META.get('REMOTE_ADDR', '')
                 key = f'rate_limit_{view_func.__name__}_{ip}'
             
-            current = cache.get(key, 0)
+            # add() chỉ tạo key khi chưa có, incr() tăng bộ đếm trên cache dùng chung
+            # giữa các worker (thay cho get() + set() dễ bị ghi đè lẫn nhau). Mọi cache
+            # backend của dự án tăng nguyên tử và giữ hạn `window` của key (cache_backends.py)
+            cache.add(key, 0, window)
+            try:
+                current = cache.incr(key)
+            except ValueError:
+                # Key vừa hết hạn giữa add() và incr()
+                cache.set(key, 1, window)
+                current = 1
             
-            if current >= max_requests:
+            if current > max_requests:
                 return JsonResponse({
                     'success': False,
                     'error': f'Quá nhiều requests. Vui lòng chờ {window} giây.'
                 }, status=429)
             
-            cache.set(key, current + 1, window)
             return view_func(request, *args, **kwargs)
         return wrapped
     return decorator
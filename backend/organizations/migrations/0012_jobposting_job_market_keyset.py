@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0011_auto_20251016_1319'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='job_market_keyset'),
+        ),
+    ]
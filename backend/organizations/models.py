@@ -144,6 +144,9 @@ class JobPosting(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=["status", "-created_at", "-id"], name="job_market_keyset"),
+        ]
         verbose_name = "Tin Tuyển dụng"
         verbose_name_plural = "Các Tin Tuyển dụng"
 
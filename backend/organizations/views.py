@@ -43,7 +43,10 @@ from tournaments.models import (
     TournamentPhoto,
     TournamentStaff,
 )
-from tournaments.utils import send_notification_email, send_schedule_notification
+from tournaments.utils import send_notification_email
+from tournaments.bulk_fixtures import create_fixtures
+from tournaments.standings import get_tournament_standings
+from tournaments import scoring
 
 from shop.organization_models import OrganizationShopSettings
 
@@ -288,6 +291,7 @@ def manage_tournament(request, pk):
                 match.team1_score = s1
                 match.team2_score = s2
                 match.save()
+                scoring.record_final_result(match)
                 messages.success(request, f"Đã lưu nhanh kết quả trận: {match}.")
             except (Match.DoesNotExist, ValueError):
                 messages.error(request, "Có lỗi xảy ra khi lưu nhanh trận đấu.")
@@ -306,6 +310,7 @@ def manage_tournament(request, pk):
                         match.team1_score = s1
                         match.team2_score = s2
                         match.save()
+                        scoring.record_final_result(match)
                 messages.success(request, "Đã cập nhật thành công tất cả tỉ số.")
             except (Match.DoesNotExist, ValueError):
                 messages.error(request, "Có lỗi xảy ra khi cập nhật tỉ số.")
@@ -379,8 +384,9 @@ def manage_tournament(request, pk):
     elif view_name == 'groups':
         context['groups'] = tournament.groups.all().order_by('name')
         standings_by_group = {}
+        all_standings = get_tournament_standings(tournament, paid_only=False)
         for group in context['groups']:
-            standings = group.get_standings()
+            standings = all_standings[group.id]
             standings_by_group[group.id] = {'name': group.name, 'standings': standings}
         context['standings_by_group'] = standings_by_group
 
@@ -704,8 +710,9 @@ def manage_knockout(request, pk):
     standings_by_group = {}
     qualified_teams_list = []
     num_qualified_per_group = 2 # Mặc định lấy 2 đội mỗi bảng
+    all_standings = get_tournament_standings(tournament, paid_only=False)
     for group in groups:
-        standings = group.get_standings()
+        standings = all_standings[group.id]
         standings_by_group[group.id] = {'name': group.name, 'standings': standings}
         qualified_teams_list.extend([s['team_obj'] for s in standings[:num_qualified_per_group]])
     
@@ -734,21 +741,22 @@ def manage_knockout(request, pk):
             quarter_final_form = QuarterFinalCreationForm(request.POST, qualified_teams=qualified_teams_queryset)
             if quarter_final_form.is_valid():
                 data = quarter_final_form.cleaned_data
-                tournament.matches.filter(match_round='QUARTER').delete()
-                for i in range(1, 5):
-                    Match.objects.create(
-                        tournament=tournament, match_round='QUARTER',
-                        team1=data[f'qf{i}_team1'], team2=data[f'qf{i}_team2'],
-                        match_time=data[f'qf{i}_datetime'] or timezone.now() + timezone.timedelta(days=1)
-                    )
+                # Tạo các cặp đấu bằng một lần bulk_create, thông báo gửi một lần qua schedule_created
+                create_fixtures(
+                    tournament,
+                    [
+                        Match(
+                            match_round='QUARTER',
+                            team1=data[f'qf{i}_team1'], team2=data[f'qf{i}_team2'],
+                            match_time=data[f'qf{i}_datetime'] or timezone.now() + timezone.timedelta(days=1)
+                        )
+                        for i in range(1, 5)
+                    ],
+                    replace_rounds=['QUARTER'],
+                    title=f"Giải '{tournament.name}' có lịch Tứ kết",
+                    message="Các cặp đấu Tứ kết đã được thiết lập. Xem ngay!",
+                )
                 messages.success(request, "Đã tạo thành công các cặp đấu Tứ kết!")
-                # GỬI THÔNG BÁO
-                send_schedule_notification(
-                    tournament, Notification.NotificationType.SCHEDULE_CREATED,
-                    f"Giải '{tournament.name}' có lịch Tứ kết",
-                    "Các cặp đấu Tứ kết đã được thiết lập. Xem ngay!",
-                    'tournament_detail'
-                )                
                 return redirect('organizations:manage_knockout', pk=pk)
 
         elif action == 'create_semi_finals':
@@ -756,53 +764,51 @@ def manage_knockout(request, pk):
             semi_final_form = SemiFinalCreationForm(request.POST, quarter_final_winners=source_teams)
             if semi_final_form.is_valid():
                 data = semi_final_form.cleaned_data
-                tournament.matches.filter(match_round='SEMI').delete()
-                Match.objects.create(tournament=tournament, match_round='SEMI', team1=data['sf1_team1'], team2=data['sf1_team2'], match_time=data['sf1_datetime'] or timezone.now() + timezone.timedelta(days=1))
-                Match.objects.create(tournament=tournament, match_round='SEMI', team1=data['sf2_team1'], team2=data['sf2_team2'], match_time=data['sf2_datetime'] or timezone.now() + timezone.timedelta(days=1))
+                create_fixtures(
+                    tournament,
+                    [
+                        Match(match_round='SEMI', team1=data['sf1_team1'], team2=data['sf1_team2'], match_time=data['sf1_datetime'] or timezone.now() + timezone.timedelta(days=1)),
+                        Match(match_round='SEMI', team1=data['sf2_team1'], team2=data['sf2_team2'], match_time=data['sf2_datetime'] or timezone.now() + timezone.timedelta(days=1)),
+                    ],
+                    replace_rounds=['SEMI'],
+                    title=f"Giải '{tournament.name}' có lịch Bán kết",
+                    message="Các cặp đấu Bán kết đã được thiết lập. Xem ngay!",
+                )
                 messages.success(request, "Đã tạo thành công các cặp đấu Bán kết!")
-                # GỬI THÔNG BÁO
-                send_schedule_notification(
-                    tournament, Notification.NotificationType.SCHEDULE_CREATED,
-                    f"Giải '{tournament.name}' có lịch Bán kết",
-                    "Các cặp đấu Bán kết đã được thiết lập. Xem ngay!",
-                    'tournament_detail'
-                )                
                 return redirect('organizations:manage_knockout', pk=pk)
         
         elif action == 'create_final':
             final_form = FinalCreationForm(request.POST, semi_final_winners=semi_final_winners_queryset)
             if final_form.is_valid():
                 data = final_form.cleaned_data
-                tournament.matches.filter(match_round='FINAL').delete()
-                Match.objects.create(tournament=tournament, match_round='FINAL', team1=data['final_team1'], team2=data['final_team2'], match_time=data['final_datetime'] or timezone.now() + timezone.timedelta(days=1))
+                create_fixtures(
+                    tournament,
+                    [Match(match_round='FINAL', team1=data['final_team1'], team2=data['final_team2'], match_time=data['final_datetime'] or timezone.now() + timezone.timedelta(days=1))],
+                    replace_rounds=['FINAL'],
+                    title=f"Giải '{tournament.name}' có lịch Chung kết",
+                    message="Trận Chung kết đã được thiết lập. Xem ngay!",
+                )
                 messages.success(request, "Đã tạo thành công trận Chung kết!")
-                # GỬI THÔNG BÁO
-                send_schedule_notification(
-                    tournament, Notification.NotificationType.SCHEDULE_CREATED,
-                    f"Giải '{tournament.name}' có lịch Chung kết",
-                    "Trận Chung kết đã được thiết lập. Xem ngay!",
-                    'tournament_detail'
-                )                
                 return redirect('organizations:manage_knockout', pk=pk)
         
         elif action == 'create_third_place':
             third_place_form = ThirdPlaceCreationForm(request.POST, semi_final_losers=semi_final_losers_queryset)
             if third_place_form.is_valid():
                 data = third_place_form.cleaned_data
-                tournament.matches.filter(match_round='THIRD_PLACE').delete()
-                Match.objects.create(
-                    tournament=tournament, match_round='THIRD_PLACE',
-                    team1=data['tp_team1'], team2=data['tp_team2'],
-                    match_time=data['tp_datetime'] or timezone.now() + timezone.timedelta(days=1)
+                create_fixtures(
+                    tournament,
+                    [
+                        Match(
+                            match_round='THIRD_PLACE',
+                            team1=data['tp_team1'], team2=data['tp_team2'],
+                            match_time=data['tp_datetime'] or timezone.now() + timezone.timedelta(days=1)
+                        )
+                    ],
+                    replace_rounds=['THIRD_PLACE'],
+                    title=f"Giải '{tournament.name}' có lịch Tranh Hạng Ba",
+                    message="Trận Tranh Hạng Ba đã được thiết lập. Xem ngay!",
                 )
                 messages.success(request, "Đã tạo thành công trận Tranh Hạng Ba!")
-                # GỬI THÔNG BÁO
-                send_schedule_notification(
-                    tournament, Notification.NotificationType.SCHEDULE_CREATED,
-                    f"Giải '{tournament.name}' có lịch Tranh Hạng Ba",
-                    "Trận Tranh Hạng Ba đã được thiết lập. Xem ngay!",
-                    'tournament_detail'
-                )                
                 return redirect('organizations:manage_knockout', pk=pk)
 
     # Khởi tạo form cho GET request
@@ -0,0 +1,109 @@
+"""
+Tổng hợp giỏ hàng (Main Shop và Shop BTC) bằng một truy vấn aggregate.
+
+Trước đây Cart.total_items / Cart.total_price lặp qua self.items.all() trong Python
+và mỗi CartItem.total_price tải riêng Product của nó; một trang thanh toán gọi
+cart.total_price nhiều lần nên số truy vấn tăng theo số sản phẩm trong giỏ.
+
+CartSummary được tính bằng một câu SELECT ... SUM() JOIN sản phẩm:
+- total_items: tổng số lượng
+- subtotal: tạm tính theo giá gốc
+- discounted_subtotal (= total_price): tạm tính theo giá hiện tại (ưu tiên giá khuyến mãi)
+- total_profit: tiền lãi (giá hiện tại - giá vốn) của các sản phẩm có giá vốn,
+  dùng để tính giảm giá lệ phí giải cho đội đã đóng lệ phí
+
+Kết quả được cache theo người dùng (namespace user:<id>, bump khi giỏ hàng thay
+đổi, xem signals.py / organization_signals.py) và namespace SHOP_CATALOG (bump khi
+giá sản phẩm thay đổi). Cart.summary ghi nhớ kết quả trên đối tượng giỏ hàng nên
+mỗi request chỉ đọc cache tối đa một lần.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Prefetch, Sum, Value, When, prefetch_related_objects
+from django.db.models.functions import Coalesce
+
+from dbpsports_core import cache_namespaces
+
+SUMMARY_CACHE_TIMEOUT = 60 * 10
+
+_MONEY = DecimalField(max_digits=14, decimal_places=0)
+
+
+class CartSummary(namedtuple('CartSummary', ['total_items', 'subtotal', 'discounted_subtotal', 'total_profit'])):
+    __slots__ = ()
+
+    @property
+    def total_price(self):
+        """Tổng tiền giỏ hàng (giá hiện tại), như Cart.total_price trước đây."""
+        return self.discounted_subtotal
+
+    @property
+    def savings(self):
+        return self.subtotal - self.discounted_subtotal
+
+
+EMPTY_CART = CartSummary(0, Decimal('0'), Decimal('0'), Decimal('0'))
+
+
+def _money_sum(expression):
+    return Coalesce(Sum(expression, output_field=_MONEY), Decimal('0'))
+
+
+def summarize(items):
+    """CartSummary của queryset CartItem / OrganizationCartItem, trong một truy vấn."""
+    current_price = Case(
+        When(product__sale_price__gt=0, then=F('product__sale_price')),
+        default=F('product__price'),
+    )
+    totals = items.aggregate(
+        total_items=Coalesce(Sum('quantity'), 0),
+        subtotal=_money_sum(F('quantity') * F('product__price')),
+        discounted_subtotal=_money_sum(F('quantity') * current_price),
+        total_profit=_money_sum(Case(
+            When(product__cost_price__gt=0, then=F('quantity') * (current_price - F('product__cost_price'))),
+            default=Value(Decimal('0')),
+            output_field=_MONEY,
+        )),
+    )
+    return CartSummary(**totals)
+
+
+def _cached(key, user_id, compute):
+    return cache_namespaces.get_or_set(
+        key,
+        [cache_namespaces.user_namespace(user_id), cache_namespaces.SHOP_CATALOG],
+        compute,
+        SUMMARY_CACHE_TIMEOUT,
+    )
+
+
+def main_cart_summary(user_id):
+    """Giỏ hàng Main Shop của người dùng."""
+    from .models import CartItem
+    return _cached(
+        f'cart_summary:main:{user_id}', user_id,
+        lambda: summarize(CartItem.objects.filter(cart__user_id=user_id)),
+    )
+
+
+def organization_cart_summary(user_id, organization_id):
+    """Giỏ hàng Shop BTC của người dùng tại một ban tổ chức."""
+    from .organization_models import OrganizationCartItem
+    return _cached(
+        f'cart_summary:org:{organization_id}:{user_id}', user_id,
+        lambda: summarize(OrganizationCartItem.objects.filter(
+            cart__user_id=user_id, cart__organization_id=organization_id,
+        )),
+    )
+
+
+def prefetch_items(cart, *related):
+    """
+    Tải các dòng của giỏ hàng kèm sản phẩm, size (và `related`) trong một truy vấn để
+    template lặp cart.items.all / gọi cart.items.count không truy vấn thêm.
+    """
+    items = cart.items.model.objects.select_related('product', 'size', *related)
+    prefetch_related_objects([cart], Prefetch('items', queryset=items))
+    return cart
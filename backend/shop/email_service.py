@@ -1,9 +1,10 @@
 """
 Email service for shop orders - Simple and reliable
 Learning from tournaments email system that works perfectly
+Email được xếp vào hàng đợi (dbpsports_core.outbox), đặt hàng không phải chờ máy chủ mail
 """
 
-from django.core.mail import send_mail
+from dbpsports_core.outbox import queue_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from .models import Order
@@ -25,18 +26,18 @@ def send_customer_order_email(order_id):
             'order': order
         })
         
-        # Gửi email - ĐÚNG NHƯ TOURNAMENT
-        send_mail(
+        # Xếp email vào hàng đợi - worker process_email_outbox sẽ gửi
+        queue_mail(
             subject=f'Xác nhận đơn hàng #{order.order_number} - DBP Sports',
             message='',  # Plain text empty - giống tournament
             from_email=settings.EMAIL_HOST_USER,  # Dùng EMAIL_HOST_USER - giống tournament
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,  # Không im lặng - để thấy lỗi
+            category='shop.order_customer',
         )
         
-        logger.info(f"[OK] Customer email sent to {order.customer_email} for order {order.order_number}")
-        print(f"[OK] Da gui email xac nhan cho khach hang: {order.customer_email}")
+        logger.info(f"[OK] Customer email queued to {order.customer_email} for order {order.order_number}")
+        print(f"[OK] Da xep hang email xac nhan cho khach hang: {order.customer_email}")
         return True
         
     except Order.DoesNotExist:
@@ -71,18 +72,18 @@ def send_admin_order_email(order_id):
             'order': order
         })
         
-        # Gửi email - ĐÚNG NHƯ TOURNAMENT
-        send_mail(
+        # Xếp email vào hàng đợi - worker process_email_outbox sẽ gửi
+        queue_mail(
             subject=f'🔔 Đơn hàng mới #{order.order_number} - {order.customer_name}',
             message='',  # Plain text empty
             from_email=settings.EMAIL_HOST_USER,  # Dùng EMAIL_HOST_USER
             recipient_list=admin_emails,
             html_message=html_message,
-            fail_silently=False,
+            category='shop.order_admin',
         )
         
-        logger.info(f"[OK] Admin email sent for order {order.order_number}")
-        print(f"[OK] Da gui email thong bao cho admin")
+        logger.info(f"[OK] Admin email queued for order {order.order_number}")
+        print(f"[OK] Da xep hang email thong bao cho admin")
         return True
         
     except Order.DoesNotExist:
@@ -110,18 +111,18 @@ def send_payment_confirmed_email(order_id):
             'order': order
         })
         
-        # Gửi email - ĐÚNG NHƯ TOURNAMENT
-        send_mail(
+        # Xếp email vào hàng đợi - worker process_email_outbox sẽ gửi
+        queue_mail(
             subject=f'✓ Xác nhận thanh toán #{order.order_number} - DBP Sports',
             message='',  # Plain text empty
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
+            category='shop.payment_confirmed',
         )
         
-        logger.info(f"[OK] Payment confirmation email sent to {order.customer_email} for order {order.order_number}")
-        print(f"[OK] Da gui email cam on cho khach hang: {order.customer_email}")
+        logger.info(f"[OK] Payment confirmation email queued to {order.customer_email} for order {order.order_number}")
+        print(f"[OK] Da xep hang email cam on cho khach hang: {order.customer_email}")
         return True
         
     except Order.DoesNotExist:
@@ -0,0 +1,25 @@
+"""
+Management command để đếm lại số sản phẩm đã xuất bản của danh mục
+(Category.published_product_count) và tính lại các kệ sản phẩm của trang chủ Shop
+"""
+from django.core.management.base import BaseCommand
+from shop.shelves import refresh_category_counts, refresh_shelves
+
+
+class Command(BaseCommand):
+    help = 'Đếm lại số sản phẩm của các danh mục và tính lại kệ sản phẩm trang chủ Shop'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--category',
+            type=int,
+            action='append',
+            help='ID của danh mục cần đếm lại, có thể lặp lại (nếu không chỉ định sẽ đếm lại tất cả)',
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_category_counts(options.get('category'))
+        shelves = refresh_shelves()
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã đếm lại số sản phẩm cho {updated} danh mục và tính lại {len(shelves)} kệ sản phẩm.'
+        ))
@@ -0,0 +1,38 @@
+"""
+Management command cộng các dòng đơn hàng mới vào bảng doanh số theo ngày
+(shop/sales_rollup.py). Chạy định kỳ bằng cron, vd. 5 phút một lần:
+
+    */5 * * * * python manage.py rollup_sales
+"""
+from django.core.management.base import BaseCommand
+from shop import sales_rollup
+
+
+class Command(BaseCommand):
+    help = 'Cộng các dòng đơn hàng mới vào bảng doanh số sản phẩm theo ngày (Main Shop và Shop BTC)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            choices=sorted(sales_rollup.SOURCES),
+            action='append',
+            help='Nguồn cần tổng hợp, có thể lặp lại (nếu không chỉ định sẽ tổng hợp tất cả)',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Xóa bảng doanh số và tổng hợp lại từ toàn bộ lịch sử đơn hàng',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=sales_rollup.BATCH_SIZE,
+            help=f'Số dòng đơn hàng mỗi transaction (mặc định: {sales_rollup.BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        run = sales_rollup.rebuild if options['rebuild'] else sales_rollup.roll_up
+        batch_size = max(1, options['batch_size'])
+        for name in options.get('source') or sales_rollup.SOURCES:
+            processed = run(sales_rollup.SOURCES[name], batch_size)
+            self.stdout.write(self.style.SUCCESS(f'{name}: đã cộng {processed} dòng đơn hàng.'))
@@ -0,0 +1,89 @@
+"""
+Management command kiểm tra giữ hàng (shop/stock.py) dưới tải đồng thời: nhiều luồng
+cùng đặt một sản phẩm, sau đó đối chiếu tồn kho còn lại với số lượt đặt thành công
+"""
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections, transaction
+
+from shop import stock
+from shop.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = 'Nhiều luồng cùng đặt một sản phẩm tạm; báo lỗi nếu tồn kho bị bán quá'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=50, help='Tồn kho ban đầu (mặc định: 50)')
+        parser.add_argument('--threads', type=int, default=20, help='Số luồng (mặc định: 20)')
+        parser.add_argument('--attempts', type=int, default=10, help='Số lượt đặt mỗi luồng (mặc định: 10)')
+        parser.add_argument('--quantity', type=int, default=1, help='Số lượng mỗi lượt đặt (mặc định: 1)')
+
+    def handle(self, *args, **options):
+        initial_stock = options['stock']
+        threads = options['threads']
+        attempts = options['attempts']
+        quantity = options['quantity']
+        if min(initial_stock, threads, attempts, quantity) < 1:
+            raise CommandError('--stock, --threads, --attempts, --quantity phải lớn hơn 0')
+
+        token = uuid.uuid4().hex[:12]
+        category = Category.objects.create(name=f'Stress {token}', slug=f'stress-{token}')
+        product = Product.objects.create(
+            name=f'Stress {token}', slug=f'stress-{token}', sku=f'STRESS-{token}', description='',
+            price=1000, category=category, stock_quantity=initial_stock,
+        )
+        counts = {'reserved': 0, 'shortfall': 0, 'error': 0}
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def worker():
+            line = SimpleNamespace(product=product, product_id=product.pk, size=None, size_id=None, quantity=quantity)
+            try:
+                start.wait()
+                for _ in range(attempts):
+                    try:
+                        with transaction.atomic():
+                            stock.reserve(stock.MAIN_SHOP, [line])
+                        result = 'reserved'
+                    except stock.InsufficientStock:
+                        result = 'shortfall'
+                    except DatabaseError:
+                        # vd. SQLite "database is locked": lượt đặt thất bại, không trừ kho
+                        result = 'error'
+                    with lock:
+                        counts[result] += 1
+            finally:
+                connections.close_all()
+
+        try:
+            started = time.monotonic()
+            pool = [threading.Thread(target=worker) for _ in range(threads)]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+            elapsed = time.monotonic() - started
+
+            remaining = Product.objects.values_list('stock_quantity', flat=True).get(pk=product.pk)
+        finally:
+            product.delete()
+            category.delete()
+
+        expected = initial_stock - counts['reserved'] * quantity
+        self.stdout.write(
+            f"{connection.vendor}: {threads} luồng x {attempts} lượt, {elapsed:.2f}s - "
+            f"thành công {counts['reserved']}, hết hàng {counts['shortfall']}, lỗi database {counts['error']}"
+        )
+        self.stdout.write(f'Tồn kho: ban đầu {initial_stock}, còn lại {remaining}, mong đợi {expected}')
+        if remaining != expected or remaining < 0:
+            raise CommandError('Tồn kho không khớp với số lượt đặt thành công: có lượt trừ kho bị mất hoặc bán quá.')
+        if counts['error']:
+            self.stdout.write(self.style.WARNING(
+                'Một số lượt đặt lỗi do database khóa (thường gặp với SQLite); tồn kho vẫn nhất quán.'
+            ))
+        self.stdout.write(self.style.SUCCESS('Không có lượt bán quá tồn kho.'))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.13 on 2026-10-18 03:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_published_product_count(apps, schema_editor):
+    Category = apps.get_model('shop', 'Category')
+    Product = apps.get_model('shop', 'Product')
+    counts = (
+        Product.objects.filter(category_id=OuterRef('pk'), status='published')
+        .order_by().values('category_id').annotate(total=Count('pk')).values('total')
+    )
+    Category.objects.update(published_product_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0021_organizationshopsettings_shop_lock_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Số sản phẩm đã xuất bản'),
+        ),
+        migrations.RunPython(fill_published_product_count, migrations.RunPython.noop),
+    ]
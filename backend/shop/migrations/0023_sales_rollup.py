@@ -0,0 +1,61 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0022_category_published_product_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=30, unique=True, verbose_name='Nguồn')),
+                ('last_item_id', models.BigIntegerField(default=0, verbose_name='ID dòng đơn hàng đã xử lý')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Mốc tổng hợp doanh số',
+                'verbose_name_plural': 'Mốc tổng hợp doanh số',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Số lượng bán')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Doanh thu')),
+                ('profit', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Tiền lãi')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='shop.product', verbose_name='Sản phẩm')),
+            ],
+            options={
+                'verbose_name': 'Doanh số sản phẩm theo ngày',
+                'verbose_name_plural': 'Doanh số sản phẩm theo ngày',
+                'indexes': [models.Index(fields=['day', 'product'], name='shop_sales_day_product')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OrganizationProductSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Số lượng bán')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Doanh thu')),
+                ('profit', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Tiền lãi')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='shop.organizationproduct', verbose_name='Sản phẩm')),
+            ],
+            options={
+                'verbose_name': 'Doanh số sản phẩm Shop BTC theo ngày',
+                'verbose_name_plural': 'Doanh số sản phẩm Shop BTC theo ngày',
+                'indexes': [models.Index(fields=['day', 'product'], name='org_shop_sales_day_product')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
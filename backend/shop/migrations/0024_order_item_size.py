@@ -0,0 +1,24 @@
+# Generated by Django 4.2.13 on 2026-10-18 02:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0023_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='size',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='shop.productsize', verbose_name='Size'),
+        ),
+        migrations.AddField(
+            model_name='organizationorderitem',
+            name='size',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='shop.productsize', verbose_name='Size'),
+        ),
+    ]
@@ -13,6 +13,7 @@ from .organization_models import (
     OrganizationCartItem,
     OrganizationOrder,
     OrganizationOrderItem,
+    OrganizationProductSalesDay,
     OrganizationShopSettings,
 )
 
@@ -24,6 +25,8 @@ class Category(models.Model):
     description = models.TextField(blank=True, verbose_name="Mô tả")
     image = models.ImageField(upload_to='shop/categories/', blank=True, null=True, verbose_name="Hình ảnh")
     is_active = models.BooleanField(default=True, verbose_name="Kích hoạt")
+    # Số sản phẩm đã xuất bản, cập nhật dần khi lưu/xóa sản phẩm (xem shelves.py)
+    published_product_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Số sản phẩm đã xuất bản")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -238,15 +241,27 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart of {self.user.username}"
 
+    @property
+    def summary(self):
+        """Tổng hợp giỏ hàng (CartSummary, xem shop/cart_summary.py), ghi nhớ trên đối tượng"""
+        if getattr(self, '_summary', None) is None:
+            from .cart_summary import main_cart_summary
+            self._summary = main_cart_summary(self.user_id)
+        return self._summary
+
+    def refresh_summary(self):
+        """Bỏ kết quả đã ghi nhớ sau khi thay đổi giỏ hàng trong cùng request"""
+        self._summary = None
+
     @property
     def total_items(self):
         """Tổng số sản phẩm trong giỏ"""
-        return sum(item.quantity for item in self.items.all())
+        return self.summary.total_items
 
     @property
     def total_price(self):
         """Tổng giá trị giỏ hàng"""
-        return sum(item.total_price for item in self.items.all())
+        return self.summary.total_price
 
 
 class CartItem(models.Model):
@@ -360,6 +375,8 @@ class OrderItem(models.Model):
     """Sản phẩm trong đơn hàng"""
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # Size đã trừ tồn kho biến thể lúc đặt hàng, để hoàn lại đúng dòng khi hủy đơn (xem stock.py)
+    size = models.ForeignKey(ProductSize, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Size")
     quantity = models.PositiveIntegerField(verbose_name="Số lượng")
     price = models.DecimalField(max_digits=10, decimal_places=0, verbose_name="Giá tại thời điểm đặt hàng")
 
@@ -378,6 +395,38 @@ class OrderItem(models.Model):
         return 0
 
 
+class ProductSalesDay(models.Model):
+    """Doanh số của một sản phẩm trong một ngày, cộng dồn từ OrderItem (xem sales_rollup.py)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_days', verbose_name="Sản phẩm")
+    day = models.DateField(verbose_name="Ngày")
+    units = models.PositiveIntegerField(default=0, verbose_name="Số lượng bán")
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0, verbose_name="Doanh thu")
+    profit = models.DecimalField(max_digits=14, decimal_places=0, default=0, verbose_name="Tiền lãi")
+
+    class Meta:
+        verbose_name = "Doanh số sản phẩm theo ngày"
+        verbose_name_plural = "Doanh số sản phẩm theo ngày"
+        unique_together = ('product', 'day')
+        indexes = [models.Index(fields=['day', 'product'], name='shop_sales_day_product')]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.day}: {self.units}"
+
+
+class SalesRollupState(models.Model):
+    """Mốc OrderItem / OrganizationOrderItem đã cộng vào bảng doanh số theo ngày"""
+    source = models.CharField(max_length=30, unique=True, verbose_name="Nguồn")
+    last_item_id = models.BigIntegerField(default=0, verbose_name="ID dòng đơn hàng đã xử lý")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Mốc tổng hợp doanh số"
+        verbose_name_plural = "Mốc tổng hợp doanh số"
+
+    def __str__(self):
+        return f"{self.source}: {self.last_item_id}"
+
+
 class ShopBanner(models.Model):
     """Banner trang chủ shop"""
     title = models.CharField(max_length=200, verbose_name="Tiêu đề chính")
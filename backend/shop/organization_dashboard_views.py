@@ -7,6 +7,7 @@ from .organization_models import (
     OrganizationOrder, OrganizationProduct, OrganizationCategory, 
     OrganizationCart, OrganizationCartItem, OrganizationShopSettings
 )
+from . import sales_rollup
 from organizations.models import Organization
 
 
@@ -69,8 +70,8 @@ def organization_shop_dashboard(request, org_slug):
     # Sản phẩm bán chạy
     bestseller_products = OrganizationProduct.objects.filter(
         organization=organization
-    ).annotate(
-        total_sold=Sum('orderitem__quantity')
+    ).select_related('category').annotate(
+        total_sold=sales_rollup.units_sold()
     ).order_by('-total_sold')[:5]
     
     # Thống kê theo tháng (7 tháng gần nhất)
@@ -112,8 +113,8 @@ def organization_shop_dashboard(request, org_slug):
     top_categories = OrganizationCategory.objects.filter(
         organization=organization
     ).annotate(
-        product_count=Count('products'),
-        order_count=Sum('products__orderitem__quantity')
+        product_count=Count('products', distinct=True),
+        order_count=sales_rollup.units_sold(prefix='products__')
     ).order_by('-order_count')[:5]
     
     # Shop settings
@@ -1,9 +1,10 @@
 """
 Email service for Organization Shop orders
 Tương tự như shop chính nhưng gửi cho BTC và khách hàng
+Email được xếp vào hàng đợi (dbpsports_core.outbox), đặt hàng không phải chờ máy chủ mail
 """
 
-from django.core.mail import send_mail
+from dbpsports_core.outbox import queue_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from .organization_models import OrganizationOrder
@@ -27,18 +28,18 @@ def send_org_customer_order_email(order_id):
             'shop_settings': order.organization.shop_settings
         })
         
-        # Gửi email
-        send_mail(
+        # Xếp email vào hàng đợi - worker process_email_outbox sẽ gửi
+        queue_mail(
             subject=f'Xác nhận đơn hàng #{order.order_number} - {order.organization.name}',
             message='',
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
+            category='org_shop.order_customer',
         )
         
-        logger.info(f"[OK] Organization customer email sent to {order.customer_email} for order {order.order_number}")
-        print(f"[OK] Da gui email xac nhan cho khach hang: {order.customer_email}")
+        logger.info(f"[OK] Organization customer email queued to {order.customer_email} for order {order.order_number}")
+        print(f"[OK] Da xep hang email xac nhan cho khach hang: {order.customer_email}")
         return True
         
     except OrganizationOrder.DoesNotExist:
@@ -85,18 +86,18 @@ def send_org_admin_order_email(order_id):
             'shop_settings': organization.shop_settings
         })
         
-        # Gửi email
-        send_mail(
+        # Xếp email vào hàng đợi - worker process_email_outbox sẽ gửi
+        queue_mail(
             subject=f'🔔 Đơn hàng mới #{order.order_number} - {order.customer_name}',
             message='',
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=admin_emails,
             html_message=html_message,
-            fail_silently=False,
+            category='org_shop.order_admin',
         )
         
-        logger.info(f"[OK] Organization admin email sent for order {order.order_number}")
-        print(f"[OK] Da gui email thong bao cho BTC")
+        logger.info(f"[OK] Organization admin email queued for order {order.order_number}")
+        print(f"[OK] Da xep hang email thong bao cho BTC")
         return True
         
     except OrganizationOrder.DoesNotExist:
@@ -126,18 +127,18 @@ def send_org_payment_confirmed_email(order_id):
             'shop_settings': order.organization.shop_settings
         })
         
-        # Gửi email
-        send_mail(
+        # Xếp email vào hàng đợi - worker process_email_outbox sẽ gửi
+        queue_mail(
             subject=f'Cảm ơn bạn đã mua hàng! #{order.order_number} - {order.organization.name}',
             message='',
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=[order.customer_email],
             html_message=html_message,
-            fail_silently=False,
+            category='org_shop.payment_confirmed',
         )
         
-        logger.info(f"[OK] Organization payment confirmation email sent for order {order.order_number}")
-        print(f"[OK] Da gui email cam on cho khach hang: {order.customer_email}")
+        logger.info(f"[OK] Organization payment confirmation email queued for order {order.order_number}")
+        print(f"[OK] Da xep hang email cam on cho khach hang: {order.customer_email}")
         return True
         
     except OrganizationOrder.DoesNotExist:
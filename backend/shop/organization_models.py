@@ -215,15 +215,27 @@ class OrganizationCart(models.Model):
     def __str__(self):
         return f"Cart of {self.user.username} for {self.organization.name}"
 
+    @property
+    def summary(self):
+        """Tổng hợp giỏ hàng (CartSummary, xem shop/cart_summary.py), ghi nhớ trên đối tượng"""
+        if getattr(self, '_summary', None) is None:
+            from .cart_summary import organization_cart_summary
+            self._summary = organization_cart_summary(self.user_id, self.organization_id)
+        return self._summary
+
+    def refresh_summary(self):
+        """Bỏ kết quả đã ghi nhớ sau khi thay đổi giỏ hàng trong cùng request"""
+        self._summary = None
+
     @property
     def total_items(self):
         """Tổng số sản phẩm trong giỏ"""
-        return sum(item.quantity for item in self.items.all())
+        return self.summary.total_items
 
     @property
     def total_price(self):
         """Tổng giá trị giỏ hàng"""
-        return sum(item.total_price for item in self.items.all())
+        return self.summary.total_price
 
 
 class OrganizationCartItem(models.Model):
@@ -339,6 +351,8 @@ class OrganizationOrderItem(models.Model):
     """Sản phẩm trong đơn hàng Organization"""
     order = models.ForeignKey(OrganizationOrder, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(OrganizationProduct, on_delete=models.CASCADE)
+    # Size đã trừ tồn kho biến thể lúc đặt hàng (xem stock.py)
+    size = models.ForeignKey('shop.ProductSize', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Size")
     quantity = models.PositiveIntegerField(verbose_name="Số lượng")
     price = models.DecimalField(max_digits=10, decimal_places=0, verbose_name="Giá tại thời điểm đặt hàng")
 
@@ -357,6 +371,23 @@ class OrganizationOrderItem(models.Model):
         return 0
 
 
+class OrganizationProductSalesDay(models.Model):
+    """Doanh số của một sản phẩm Shop BTC trong một ngày, cộng dồn từ OrganizationOrderItem"""
+    product = models.ForeignKey(OrganizationProduct, on_delete=models.CASCADE, related_name='sales_days', verbose_name="Sản phẩm")
+    day = models.DateField(verbose_name="Ngày")
+    units = models.PositiveIntegerField(default=0, verbose_name="Số lượng bán")
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0, verbose_name="Doanh thu")
+    profit = models.DecimalField(max_digits=14, decimal_places=0, default=0, verbose_name="Tiền lãi")
+
+    class Meta:
+        verbose_name = "Doanh số sản phẩm Shop BTC theo ngày"
+        verbose_name_plural = "Doanh số sản phẩm Shop BTC theo ngày"
+        unique_together = ('product', 'day')
+        indexes = [models.Index(fields=['day', 'product'], name='org_shop_sales_day_product')]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.day}: {self.units}"
+
 class OrganizationShopSettings(models.Model):
     """Cài đặt shop của Organization"""
     organization = models.OneToOneField(Organization, on_delete=models.CASCADE, related_name='shop_settings', verbose_name="Ban tổ chức")
@@ -2,9 +2,10 @@
 Organization Shop signals - Tự động gửi email khi có thay đổi
 """
 
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .organization_models import OrganizationOrder
+from dbpsports_core.user_chrome import bump_users
+from .organization_models import OrganizationCart, OrganizationCartItem, OrganizationOrder
 from .organization_email_service import send_org_payment_confirmed_email
 import logging
 
@@ -36,3 +37,14 @@ def organization_order_payment_status_changed(sender, instance, **kwargs):
         except OrganizationOrder.DoesNotExist:
             # Đơn hàng mới, không làm gì
             pass
+
+
+@receiver([post_save, post_delete], sender=OrganizationCart)
+def bump_user_chrome_on_cart_change(sender, instance, **kwargs):
+    bump_users(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=OrganizationCartItem)
+def bump_user_chrome_on_cart_item_change(sender, instance, **kwargs):
+    """Số lượng/tổng tiền giỏ hàng trên thanh điều hướng được cache theo người dùng."""
+    bump_users(OrganizationCart.objects.filter(pk=instance.cart_id).values_list('user_id', flat=True).first())
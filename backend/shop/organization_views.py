@@ -128,6 +128,30 @@ from .organization_models import (
     OrganizationCartItem, OrganizationOrder, OrganizationOrderItem,
     OrganizationShopSettings
 )
+from . import sales_rollup, stock
+
+
+def _team_fee_discount(user, organization, summary):
+    """
+    Giảm giá cho đội trưởng của đội đã đóng lệ phí giải của BTC: phần trăm tiền lãi
+    của giỏ hàng (summary.total_profit, xem cart_summary.py), tối đa bằng phí đăng ký.
+    Trả về (đủ điều kiện, số tiền giảm).
+    """
+    from tournaments.models import TeamRegistration
+    paid_registrations = TeamRegistration.objects.filter(
+        team__captain=user,
+        tournament__organization=organization,
+        payment_status='PAID'
+    )
+    if not paid_registrations.exists():
+        return False, 0
+    
+    # Lấy tournament để tính discount percentage
+    tournament = organization.tournaments.first()
+    if not tournament or tournament.shop_discount_percentage <= 0:
+        return True, 0
+    discount_amount = summary.total_profit * (tournament.shop_discount_percentage / 100)
+    return True, min(discount_amount, tournament.registration_fee)
 
 
 def organization_shop_home(request, org_slug):
@@ -160,12 +184,14 @@ def organization_shop_home(request, org_slug):
         is_featured=True
     )[:6]
     
-    # Lấy sản phẩm bán chạy
-    bestseller_products = OrganizationProduct.objects.filter(
+    # Lấy sản phẩm bán chạy (bảng doanh số, bổ sung sản phẩm gắn cờ bán chạy)
+    published_products = OrganizationProduct.objects.filter(
         organization=organization,
-        status='published',
-        is_bestseller=True
-    )[:6]
+        status='published'
+    )
+    bestseller_products = sales_rollup.top_selling(
+        published_products, 6, fallback=published_products.filter(is_bestseller=True)
+    )
     
     # Lấy danh mục
     categories = OrganizationCategory.objects.filter(
@@ -302,12 +328,14 @@ def organization_product_detail(request, org_slug, product_slug):
         messages.warning(request, "Ban tổ chức này chưa thiết lập shop.")
         return redirect('tournament_detail', pk=organization.tournaments.first().pk)
     
-    # Lấy sản phẩm liên quan
+    # Lấy sản phẩm liên quan, bán chạy gần đây trước
     related_products = OrganizationProduct.objects.filter(
         organization=organization,
         category=product.category,
         status='published'
-    ).exclude(id=product.id)[:4]
+    ).exclude(id=product.id).annotate(
+        recent_sold=sales_rollup.units_sold(sales_rollup.RELATED_DAYS)
+    ).order_by('-recent_sold', '-created_at')[:4]
     
     # Lấy variants nếu có
     variants = product.variants.all() if product.has_sizes else []
@@ -344,37 +372,10 @@ def organization_cart_view(request, org_slug):
         organization=organization
     )
     
-    cart_items = cart.items.all()
+    cart_items = list(cart.items.select_related('product', 'size'))
     
     # Tính toán giảm giá cho các đội đã đóng lệ phí giải đấu
-    discount_amount = 0
-    eligible_for_discount = False
-    
-    # Kiểm tra user có phải là captain của đội đã đóng lệ phí không
-    from tournaments.models import TeamRegistration
-    paid_registrations = TeamRegistration.objects.filter(
-        team__captain=request.user,
-        tournament__organization=organization,
-        payment_status='PAID'
-    )
-    
-    if paid_registrations.exists():
-        eligible_for_discount = True
-        # Tính discount dựa trên profit của sản phẩm
-        total_profit = 0
-        for item in cart_items:
-            if item.product.cost_price:
-                profit_per_item = item.product.profit_amount
-                total_profit += profit_per_item * item.quantity
-        
-        # Lấy tournament để tính discount percentage
-        tournament = organization.tournaments.first()
-        if tournament and tournament.shop_discount_percentage > 0:
-            # Tính phần trăm tiền lãi được trừ vào phí đăng ký
-            discount_amount = total_profit * (tournament.shop_discount_percentage / 100)
-            # Giới hạn giảm giá tối đa bằng phí đăng ký
-            max_discount = tournament.registration_fee
-            discount_amount = min(discount_amount, max_discount)
+    eligible_for_discount, discount_amount = _team_fee_discount(request.user, organization, cart.summary)
     
     # Tính tổng cuối cùng
     final_subtotal = cart.total_price - discount_amount
@@ -544,7 +545,7 @@ def organization_checkout(request, org_slug):
     # Lấy cart
     try:
         cart = OrganizationCart.objects.get(user=request.user, organization=organization)
-        cart_items = cart.items.all()
+        cart_items = list(cart.items.select_related('product', 'size'))
         
         if not cart_items:
             messages.warning(request, "Giỏ hàng trống")
@@ -563,34 +564,7 @@ def organization_checkout(request, org_slug):
         shipping_fee = 0
     
     # Tính toán giảm giá cho các đội đã đóng lệ phí giải đấu
-    discount_amount = 0
-    eligible_for_discount = False
-    
-    # Kiểm tra user có phải là captain của đội đã đóng lệ phí không
-    from tournaments.models import TeamRegistration
-    paid_registrations = TeamRegistration.objects.filter(
-        team__captain=request.user,
-        tournament__organization=organization,
-        payment_status='PAID'
-    )
-    
-    if paid_registrations.exists():
-        eligible_for_discount = True
-        # Tính discount dựa trên profit của sản phẩm
-        total_profit = 0
-        for item in cart_items:
-            if item.product.cost_price:
-                profit_per_item = item.product.profit_amount
-                total_profit += profit_per_item * item.quantity
-        
-        # Lấy tournament để tính discount percentage
-        tournament = organization.tournaments.first()
-        if tournament and tournament.shop_discount_percentage > 0:
-            # Tính phần trăm tiền lãi được trừ vào phí đăng ký
-            discount_amount = total_profit * (tournament.shop_discount_percentage / 100)
-            # Giới hạn giảm giá tối đa bằng phí đăng ký
-            max_discount = tournament.registration_fee
-            discount_amount = min(discount_amount, max_discount)
+    eligible_for_discount, discount_amount = _team_fee_discount(request.user, organization, cart.summary)
     
     # Tính tổng cuối cùng
     final_subtotal = subtotal - discount_amount
@@ -629,7 +603,7 @@ def organization_place_order(request, org_slug):
     try:
         # Lấy cart
         cart = OrganizationCart.objects.get(user=request.user, organization=organization)
-        cart_items = cart.items.all()
+        cart_items = list(cart.items.select_related('product', 'size'))
         
         if not cart_items:
             return JsonResponse({'success': False, 'error': 'Giỏ hàng trống'})
@@ -665,47 +639,14 @@ def organization_place_order(request, org_slug):
         if not shipping_district:
             return JsonResponse({'success': False, 'error': 'Vui lòng nhập quận/huyện'})
         
-        # Kiểm tra tồn kho
-        for cart_item in cart_items:
-            if cart_item.product.has_sizes and cart_item.size:
-                variant = cart_item.product.variants.filter(size=cart_item.size).first()
-                if not variant or variant.stock_quantity < cart_item.quantity:
-                    return JsonResponse({'success': False, 'error': f'Sản phẩm "{cart_item.product.name}" không đủ hàng trong kho'})
-            else:
-                if cart_item.product.stock_quantity < cart_item.quantity:
-                    return JsonResponse({'success': False, 'error': f'Sản phẩm "{cart_item.product.name}" không đủ hàng trong kho'})
-        
+        # Tồn kho được kiểm tra và trừ cùng lúc khi tạo đơn (shop/stock.py)
+
         # Tính tổng tiền
         subtotal = cart.total_price
         shipping_fee = shop_settings.shipping_fee
         
         # Tính toán giảm giá cho các đội đã đóng lệ phí giải đấu
-        discount_amount = 0
-        
-        # Kiểm tra user có phải là captain của đội đã đóng lệ phí không
-        from tournaments.models import TeamRegistration
-        paid_registrations = TeamRegistration.objects.filter(
-            team__captain=request.user,
-            tournament__organization=organization,
-            payment_status='PAID'
-        )
-        
-        if paid_registrations.exists():
-            # Tính discount dựa trên profit của sản phẩm
-            total_profit = 0
-            for item in cart_items:
-                if item.product.cost_price:
-                    profit_per_item = item.product.profit_amount
-                    total_profit += profit_per_item * item.quantity
-            
-            # Lấy tournament để tính discount percentage
-            tournament = organization.tournaments.first()
-            if tournament and tournament.shop_discount_percentage > 0:
-                # Tính phần trăm tiền lãi được trừ vào phí đăng ký
-                discount_amount = total_profit * (tournament.shop_discount_percentage / 100)
-                # Giới hạn giảm giá tối đa bằng phí đăng ký
-                max_discount = tournament.registration_fee
-                discount_amount = min(discount_amount, max_discount)
+        _, discount_amount = _team_fee_discount(request.user, organization, cart.summary)
         
         # Tính subtotal sau giảm giá
         final_subtotal = subtotal - discount_amount
@@ -715,49 +656,35 @@ def organization_place_order(request, org_slug):
         
         total_amount = final_subtotal + shipping_fee
         
-        # Tạo đơn hàng
-        with transaction.atomic():
-            order = OrganizationOrder.objects.create(
-                organization=organization,
-                user=request.user,
-                customer_name=customer_name,
-                customer_email=customer_email,
-                customer_phone=customer_phone,
-                shipping_address=shipping_address,
-                shipping_city=shipping_city,
-                shipping_district=shipping_district,
-                subtotal=subtotal,
-                discount_amount=discount_amount,
-                shipping_fee=shipping_fee,
-                total_amount=total_amount,
-                payment_method=request.POST.get('payment_method', 'cod'),
-                notes=request.POST.get('notes', ''),
-            )
-            
-            # Xử lý payment proof upload
-            if 'payment_proof' in request.FILES:
-                order.payment_proof = request.FILES['payment_proof']
-                order.save()
-            
-            # Tạo order items
-            for cart_item in cart_items:
-                OrganizationOrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.current_price
+        # Trừ tồn kho, tạo đơn hàng và order items trong cùng một transaction
+        try:
+            with transaction.atomic():
+                stock.reserve(stock.ORGANIZATION_SHOP, cart_items)
+                order = OrganizationOrder.objects.create(
+                    organization=organization,
+                    user=request.user,
+                    customer_name=customer_name,
+                    customer_email=customer_email,
+                    customer_phone=customer_phone,
+                    shipping_address=shipping_address,
+                    shipping_city=shipping_city,
+                    shipping_district=shipping_district,
+                    subtotal=subtotal,
+                    discount_amount=discount_amount,
+                    shipping_fee=shipping_fee,
+                    total_amount=total_amount,
+                    payment_method=request.POST.get('payment_method', 'cod'),
+                    notes=request.POST.get('notes', ''),
+                    payment_proof=request.FILES.get('payment_proof'),
                 )
-                
-                # Cập nhật tồn kho
-                if cart_item.product.has_sizes and cart_item.size:
-                    variant = cart_item.product.variants.filter(size=cart_item.size).first()
-                    if variant:
-                        variant.stock_quantity -= cart_item.quantity
-                        variant.save()
-                else:
-                    cart_item.product.stock_quantity -= cart_item.quantity
-                    cart_item.product.save()
-            
+                stock.create_order_items(stock.ORGANIZATION_SHOP, order, cart_items)
+        except stock.InsufficientStock as shortage:
+            return JsonResponse({
+                'success': False,
+                'error': shortage.shortfalls[0].message,
+                'shortfalls': shortage.as_dict(),
+            })
+        
         # Xóa cart
         cart.delete()
         
@@ -1600,8 +1527,8 @@ def organization_shop_dashboard(request, org_slug):
     # Sản phẩm bán chạy
     bestseller_products = OrganizationProduct.objects.filter(
         organization=organization
-    ).annotate(
-        total_sold=Sum('organizationorderitem__quantity')
+    ).select_related('category').annotate(
+        total_sold=sales_rollup.units_sold()
     ).order_by('-total_sold')[:5]
     
     # Thống kê theo tháng (7 tháng gần nhất)
@@ -1643,8 +1570,8 @@ def organization_shop_dashboard(request, org_slug):
     top_categories = OrganizationCategory.objects.filter(
         organization=organization
     ).annotate(
-        product_count=Count('products'),
-        order_count=Sum('products__organizationorderitem__quantity')
+        product_count=Count('products', distinct=True),
+        order_count=sales_rollup.units_sold(prefix='products__')
     ).order_by('-order_count')[:5]
     
     # Shop settings
@@ -0,0 +1,175 @@
+"""
+Bảng doanh số theo ngày (sản phẩm x ngày: số lượng, doanh thu, tiền lãi) của Main
+Shop và Shop BTC.
+
+Trước đây dashboard, kệ "bán chạy" và "sản phẩm liên quan" cộng
+Sum('orderitem__quantity') trên toàn bộ lịch sử đơn hàng ở mỗi lượt xem. Bảng
+ProductSalesDay / OrganizationProductSalesDay được cộng dồn dần từ các dòng đơn
+hàng mới: SalesRollupState lưu id dòng đơn hàng lớn nhất đã cộng của mỗi nguồn, mỗi
+lần chạy chỉ đọc các dòng có id lớn hơn. Các truy vấn xếp hạng (units_sold,
+top_selling_ids) chỉ đọc bảng doanh số.
+
+- Ngày bán là ngày tạo đơn hàng; doanh thu = số lượng x giá lúc đặt; tiền lãi tính
+  theo giá vốn (cost_price) của sản phẩm lúc tổng hợp, sản phẩm chưa có giá vốn
+  tính lãi 0. Như các thống kê trước đây, mọi đơn hàng đều được tính (kể cả đơn đã hủy).
+- Dòng đơn hàng mới hơn SETTLE_DELAY chưa được cộng, để đơn đang tạo dở (transaction
+  chưa commit, id nhỏ hơn) không bị bỏ qua.
+
+Chạy định kỳ (cron, vài phút một lần): `python manage.py rollup_sales`.
+Tính lại từ đầu: `python manage.py rollup_sales --rebuild`.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from dbpsports_core import cache_namespaces
+
+from .models import OrderItem, ProductSalesDay, SalesRollupState
+from .organization_models import OrganizationOrderItem, OrganizationProductSalesDay
+
+SETTLE_DELAY = timedelta(minutes=5)
+BATCH_SIZE = 5000
+
+# Khoảng thời gian xếp hạng "bán chạy" và "sản phẩm liên quan"
+BESTSELLER_DAYS = 30
+RELATED_DAYS = 90
+
+_MONEY = DecimalField(max_digits=14, decimal_places=0)
+
+
+@dataclass(frozen=True)
+class SalesSource:
+    """Dòng đơn hàng của một loại shop và bảng doanh số tương ứng."""
+    name: str
+    item_model: type
+    rollup_model: type
+
+
+MAIN_SHOP = SalesSource('main', OrderItem, ProductSalesDay)
+ORGANIZATION_SHOP = SalesSource('organization', OrganizationOrderItem, OrganizationProductSalesDay)
+SOURCES = {source.name: source for source in (MAIN_SHOP, ORGANIZATION_SHOP)}
+
+
+def _daily_totals(source, first_id, last_id):
+    """Tổng theo (sản phẩm, ngày) của các dòng đơn hàng first_id < id <= last_id."""
+    return (
+        source.item_model.objects.filter(pk__gt=first_id, pk__lte=last_id)
+        .values('product_id', day=TruncDate('order__created_at'))
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('price'), output_field=_MONEY),
+            profit=Sum(Case(
+                When(product__cost_price__gt=0, then=F('quantity') * (F('price') - F('product__cost_price'))),
+                default=Value(0),
+                output_field=_MONEY,
+            )),
+        )
+        .order_by()
+    )
+
+
+def _apply(source, totals):
+    """Cộng các tổng theo ngày vào bảng doanh số (cập nhật dòng đã có, tạo dòng mới)."""
+    totals = {(row['product_id'], row['day']): row for row in totals}
+    if not totals:
+        return
+    existing = source.rollup_model.objects.filter(
+        product_id__in={product_id for product_id, _ in totals},
+        day__in={day for _, day in totals},
+    )
+    changed = []
+    for rollup in existing:
+        row = totals.pop((rollup.product_id, rollup.day), None)
+        if row is None:
+            continue
+        rollup.units += row['units']
+        rollup.revenue += row['revenue']
+        rollup.profit += row['profit']
+        changed.append(rollup)
+    source.rollup_model.objects.bulk_update(changed, ['units', 'revenue', 'profit'])
+    source.rollup_model.objects.bulk_create([
+        source.rollup_model(
+            product_id=product_id, day=day, units=row['units'], revenue=row['revenue'], profit=row['profit'],
+        )
+        for (product_id, day), row in totals.items()
+    ])
+
+
+def roll_up(source, batch_size=BATCH_SIZE):
+    """
+    Cộng các dòng đơn hàng mới của `source` vào bảng doanh số, mỗi lô batch_size
+    dòng trong một transaction. Trả về số dòng đơn hàng đã cộng.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            # Khóa mốc của nguồn: hai lần chạy cùng lúc không cộng trùng một dòng
+            state, _ = SalesRollupState.objects.select_for_update().get_or_create(source=source.name)
+            cutoff = timezone.now() - SETTLE_DELAY
+            batch = list(
+                source.item_model.objects.filter(pk__gt=state.last_item_id)
+                .order_by('pk').values_list('pk', 'order__created_at')[:batch_size]
+            )
+            # Dừng ở dòng đầu tiên chưa đủ SETTLE_DELAY: mốc chỉ tăng qua các dòng liên tiếp
+            settled = []
+            for item_id, created_at in batch:
+                if created_at > cutoff:
+                    break
+                settled.append(item_id)
+            if not settled:
+                break
+            _apply(source, _daily_totals(source, state.last_item_id, settled[-1]))
+            state.last_item_id = settled[-1]
+            state.save(update_fields=['last_item_id', 'updated_at'])
+        processed += len(settled)
+        if len(settled) < batch_size:
+            break
+    if processed:
+        # Kệ "bán chạy" của trang chủ Shop xếp hạng theo bảng doanh số
+        cache_namespaces.bump(cache_namespaces.SHOP_HOME)
+    return processed
+
+
+def rebuild(source, batch_size=BATCH_SIZE):
+    """Xóa bảng doanh số của `source` và tổng hợp lại từ toàn bộ lịch sử đơn hàng."""
+    with transaction.atomic():
+        SalesRollupState.objects.update_or_create(source=source.name, defaults={'last_item_id': 0})
+        source.rollup_model.objects.all().delete()
+    return roll_up(source, batch_size)
+
+
+def units_sold(days=None, prefix=''):
+    """
+    Biểu thức annotate số lượng đã bán theo bảng doanh số (days=None: mọi thời gian).
+    `prefix`: đường dẫn tới sản phẩm, vd. 'products__' khi annotate trên danh mục.
+    """
+    condition = None
+    if days is not None:
+        condition = Q(**{f'{prefix}sales_days__day__gte': timezone.now().date() - timedelta(days=days)})
+    return Coalesce(Sum(f'{prefix}sales_days__units', filter=condition), 0)
+
+
+def top_selling_ids(products, limit, days=BESTSELLER_DAYS, fallback=None):
+    """
+    Id của tối đa `limit` sản phẩm trong queryset `products` bán nhiều nhất trong
+    `days` ngày gần đây. Chưa đủ thì bổ sung từ queryset `fallback` (đã sắp xếp).
+    """
+    ids = list(
+        products.annotate(recent_sold=units_sold(days)).filter(recent_sold__gt=0)
+        .order_by('-recent_sold', '-created_at').values_list('pk', flat=True)[:limit]
+    )
+    if fallback is not None and len(ids) < limit:
+        ids.extend(fallback.exclude(pk__in=ids).values_list('pk', flat=True)[:limit - len(ids)])
+    return ids
+
+
+def top_selling(products, limit, days=BESTSELLER_DAYS, fallback=None):
+    """Như top_selling_ids nhưng trả về danh sách sản phẩm theo thứ tự xếp hạng."""
+    ids = top_selling_ids(products, limit, days, fallback)
+    found = products.model.objects.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
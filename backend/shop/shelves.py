@@ -0,0 +1,232 @@
+# backend/shop/shelves.py
+"""
+Các kệ sản phẩm (shelf) và các khối dữ liệu của trang chủ Shop.
+
+- Nhóm danh mục (CATEGORY_GROUPS) đặt tên cho các danh sách slug dùng chung: các kệ
+  và bộ lọc ?category= / ?type= / ?sport= của shop_home đều tham chiếu theo tên nhóm.
+- Mỗi kệ (Shelf) là một tập điều kiện lọc + thứ tự + số lượng, đăng ký bằng
+  register(). Danh sách id sản phẩm của mọi kệ được tính sẵn và cache trong một
+  key; sản phẩm của các kệ được cache trong một key khác (mỗi sản phẩm một lần dù
+  nằm ở nhiều kệ).
+- Category.published_product_count (số sản phẩm đã xuất bản) được cập nhật dần
+  khi lưu/xóa sản phẩm (xem signals.py) thay vì annotate(Count) mỗi request.
+  Đếm lại toàn bộ: `python manage.py rebuild_category_counts`.
+- Mọi khối đều cache theo namespace SHOP_HOME, bump khi lưu/xóa Product, Category,
+  ShopBanner, ContactSettings. Giá trị được đưa vào context dưới dạng hàm (như
+  tournaments/homepage.py): trang chủ Shop khi cache còn hạn chỉ đọc vài key cache.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from dbpsports_core import cache_namespaces
+
+SECTION_CACHE_TIMEOUT = 60 * 10
+SHELF_SIZE = 8
+
+# Nhóm danh mục theo slug
+CATEGORY_GROUPS = {
+    'shoes-and-clothing': (
+        'football-shoes', 'basketball-shoes', 'running-shoes', 'badminton-shoes',
+        'polo-shirts', 't-shirts', 'jackets', 'pants',
+    ),
+    'shoes': ('football-shoes', 'basketball-shoes', 'running-shoes', 'badminton-shoes', 'pickleball-shoes'),
+    'clothing': ('football-apparel', 'polo-shirts', 't-shirts', 'jackets', 'pants', 'pickleball-apparel'),
+    'football': ('football-shoes', 'football-apparel', 'team-uniforms'),
+    'pickleball': ('pickleball-shoes', 'pickleball-apparel'),
+    'basketball': ('basketball-shoes',),
+    'badminton': ('badminton-shoes',),
+    'running': ('running-shoes',),
+}
+
+# Tham số lọc của shop_home: {tham số: {giá trị: nhóm danh mục}}
+FILTER_GROUPS = {
+    'category': {'men': 'shoes-and-clothing', 'women': 'shoes-and-clothing'},
+    'type': {'shoes': 'shoes', 'clothing': 'clothing'},
+    'sport': {
+        'football': 'football', 'pickleball': 'pickleball', 'basketball': 'basketball',
+        'badminton': 'badminton', 'running': 'running',
+    },
+}
+
+
+def filter_by_groups(queryset, params):
+    """Lọc sản phẩm theo các tham số category/type/sport (giá trị không hợp lệ bị bỏ qua)."""
+    for param, groups in FILTER_GROUPS.items():
+        group = groups.get(params.get(param))
+        if group:
+            queryset = queryset.filter(category__slug__in=CATEGORY_GROUPS[group])
+    return queryset
+
+
+@dataclass(frozen=True)
+class Shelf:
+    """
+    Một kệ sản phẩm trên trang chủ Shop; `filters`: điều kiện lọc thêm cho Product.
+    `sales_days`: xếp theo số lượng bán trong chừng ấy ngày (bảng doanh số, xem
+    sales_rollup.py), chưa đủ thì bổ sung các sản phẩm khớp `filters`.
+    """
+    name: str
+    filters: Dict[str, Any] = field(default_factory=dict)
+    category_group: Optional[str] = None
+    ordering: Tuple[str, ...] = ('-created_at',)
+    limit: int = SHELF_SIZE
+    sales_days: Optional[int] = None
+
+    def _products(self):
+        from .models import Product
+
+        products = Product.objects.filter(status='published')
+        if self.category_group:
+            products = products.filter(category__slug__in=CATEGORY_GROUPS[self.category_group])
+        return products
+
+    def queryset(self):
+        return self._products().filter(**self.filters).order_by(*self.ordering)[:self.limit]
+
+    def product_ids(self):
+        if self.sales_days is None:
+            return list(self.queryset().values_list('id', flat=True))
+        from .sales_rollup import top_selling_ids
+
+        fallback = self._products().filter(**self.filters).order_by(*self.ordering)
+        return top_selling_ids(self._products(), self.limit, self.sales_days, fallback)
+
+
+SHELVES = {}
+
+
+def register(shelf):
+    """
+    Thêm (hoặc thay) một kệ; context của shop_home có biến `<tên kệ>_products`.
+    Danh sách id đã cache được tính lại khi hết hạn hoặc sau refresh_shelves().
+    """
+    SHELVES[shelf.name] = shelf
+    return shelf
+
+
+register(Shelf('featured', filters={'is_featured': True}))
+register(Shelf('bestseller', filters={'is_bestseller': True}, sales_days=30))
+register(Shelf('new'))
+register(Shelf('football', category_group='football'))
+register(Shelf('pickleball', category_group='pickleball'))
+
+
+def _shelf_ids():
+    return {name: shelf.product_ids() for name, shelf in SHELVES.items()}
+
+
+def _cached(name, compute):
+    return cache_namespaces.get_or_set(
+        f'shop_home:{name}', [cache_namespaces.SHOP_HOME], compute, SECTION_CACHE_TIMEOUT
+    )
+
+
+def shelf_ids():
+    """{tên kệ: [id sản phẩm]} của mọi kệ, tính sẵn và cache."""
+    return _cached('shelf_ids', _shelf_ids)
+
+
+def refresh_shelves():
+    """Làm mới mọi khối của trang chủ Shop và tính lại ngay danh sách id của các kệ."""
+    cache_namespaces.bump(cache_namespaces.SHOP_HOME)
+    return shelf_ids()
+
+
+def refresh_category_counts(category_ids=None):
+    """
+    Đếm lại Category.published_product_count (category_ids=None: mọi danh mục) và
+    làm mới trang chủ Shop. Trả về số danh mục đã cập nhật.
+    """
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+
+    from .models import Category, Product
+
+    counts = (
+        Product.objects.filter(category_id=OuterRef('pk'), status='published')
+        .order_by().values('category_id').annotate(total=Count('pk')).values('total')
+    )
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    updated = categories.update(published_product_count=Coalesce(Subquery(counts), 0))
+    if updated:
+        cache_namespaces.bump(cache_namespaces.SHOP_HOME)
+    return updated
+
+
+def shift_category_count(category_id, delta):
+    """Cộng/trừ dần số sản phẩm đã xuất bản của một danh mục."""
+    from django.db.models import F
+
+    from .models import Category
+
+    if category_id and delta:
+        Category.objects.filter(pk=category_id).update(
+            published_product_count=F('published_product_count') + delta
+        )
+
+
+def _shelf_products():
+    from .models import Product
+
+    ids = {product_id for product_ids in shelf_ids().values() for product_id in product_ids}
+    return Product.objects.in_bulk(ids)
+
+
+def _categories():
+    from .models import Category
+
+    return list(Category.objects.filter(is_active=True, published_product_count__gt=0).order_by('name'))
+
+
+def _page():
+    from .models import ContactSettings, ShopBanner
+
+    try:
+        contact_settings = ContactSettings.objects.get(is_active=True)
+    except ContactSettings.DoesNotExist:
+        contact_settings = None
+    return {
+        'banners': list(
+            ShopBanner.objects.filter(is_active=True).select_related('product').order_by('order', '-created_at')
+        ),
+        'contact_settings': contact_settings,
+    }
+
+
+class ShopHomeSections:
+    """Các khối của trang chủ Shop, đọc từ cache theo từng khối và ghi nhớ trong request."""
+
+    def __init__(self):
+        self._values = {}
+
+    def _get(self, name, compute):
+        if name not in self._values:
+            self._values[name] = _cached(name, compute)
+        return self._values[name]
+
+    def shelf(self, name):
+        products = self._get('shelf_products', _shelf_products)
+        ids = self._get('shelf_ids', _shelf_ids).get(name, [])
+        return [products[product_id] for product_id in ids if product_id in products]
+
+    def categories(self):
+        return self._get('categories', _categories)
+
+    def banners(self):
+        return self._get('page', _page)['banners']
+
+    def contact_settings(self):
+        return self._get('page', _page)['contact_settings']
+
+    def as_context(self):
+        context = {
+            'categories': self.categories,
+            'banners': self.banners,
+            'contact_settings': self.contact_settings,
+        }
+        for name in SHELVES:
+            context[f'{name}_products'] = lambda name=name: self.shelf(name)
+        return context
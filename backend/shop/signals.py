@@ -2,14 +2,24 @@
 Shop signals - Tự động gửi email khi có thay đổi
 """
 
-from django.db.models.signals import pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Order
+from dbpsports_core import cache_namespaces, search
+from dbpsports_core.user_chrome import bump_users
+from .models import Cart, CartItem, Category, ContactSettings, Order, OrganizationProduct, Product, ShopBanner
+from . import shelves
 from .email_service import send_payment_confirmed_email
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Chỉ mục tìm kiếm sản phẩm (dbpsports_core/search.py): trường -> trọng số
+search.register(
+    'product', Product,
+    {'name': 10, 'short_description': 3, 'description': 1, 'category.name': 2},
+    select_related=('category',),
+)
+
 
 @receiver(pre_save, sender=Order)
 def order_payment_status_changed(sender, instance, **kwargs):
@@ -37,3 +47,70 @@ def order_payment_status_changed(sender, instance, **kwargs):
             # Đơn hàng mới, không làm gì
             pass
 
+
+@receiver([post_save, post_delete], sender=Cart)
+def bump_user_chrome_on_cart_change(sender, instance, **kwargs):
+    bump_users(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def bump_user_chrome_on_cart_item_change(sender, instance, **kwargs):
+    """Số lượng/tổng tiền giỏ hàng trên thanh điều hướng được cache theo người dùng."""
+    bump_users(Cart.objects.filter(pk=instance.cart_id).values_list('user_id', flat=True).first())
+
+
+# Các trường giá dùng để tính tổng giỏ hàng (shop/cart_summary.py)
+CART_PRICE_FIELDS = {'price', 'sale_price', 'cost_price'}
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=OrganizationProduct)
+def bump_cart_summaries_on_price_change(sender, instance, update_fields=None, **kwargs):
+    """Tổng giỏ hàng đã cache tính theo giá sản phẩm: đổi giá thì tính lại cho mọi giỏ."""
+    if update_fields is not None and not CART_PRICE_FIELDS.intersection(update_fields):
+        return
+    cache_namespaces.bump(cache_namespaces.SHOP_CATALOG)
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_listing(sender, instance, **kwargs):
+    instance._listing_snapshot = None
+    if instance.pk:
+        instance._listing_snapshot = Product.objects.filter(pk=instance.pk).values_list(
+            'category_id', 'status'
+        ).first()
+
+
+@receiver(post_save, sender=Product)
+def update_category_count_on_product_save(sender, instance, **kwargs):
+    """Sản phẩm được xuất bản/ẩn hoặc đổi danh mục -> cộng/trừ số sản phẩm của danh mục."""
+    old = getattr(instance, '_listing_snapshot', None)
+    new = (instance.category_id, instance.status)
+    if old == new:
+        return
+    if old and old[1] == 'published':
+        shelves.shift_category_count(old[0], -1)
+    if instance.status == 'published':
+        shelves.shift_category_count(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Product)
+def update_category_count_on_product_delete(sender, instance, **kwargs):
+    if instance.status == 'published':
+        shelves.shift_category_count(instance.category_id, -1)
+
+
+@receiver(post_save, sender=Category)
+def recount_category_on_save(sender, instance, created, **kwargs):
+    # save() ghi lại số đếm đã tải cùng đối tượng, có thể đã cũ: đếm lại danh mục này
+    if not created:
+        shelves.refresh_category_counts([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ShopBanner)
+@receiver([post_save, post_delete], sender=ContactSettings)
+def bump_shop_home(sender, instance, **kwargs):
+    """Kệ sản phẩm, danh mục, banner và cài đặt liên hệ của trang chủ Shop (shelves.py)."""
+    cache_namespaces.bump(cache_namespaces.SHOP_HOME)
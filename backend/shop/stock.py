@@ -0,0 +1,170 @@
+"""
+Giữ hàng trong kho khi đặt hàng (Main Shop và Shop BTC).
+
+Trước đây view kiểm tra tồn kho trong vòng lặp rồi trừ bằng
+`product.stock_quantity -= qty; product.save()`: hai đơn đặt cùng lúc đều thấy đủ
+hàng và cùng trừ, tồn kho bị bán quá (hoặc bị ghi đè bằng giá trị cũ).
+
+Ở đây mỗi dòng tồn kho được trừ bằng một câu UPDATE có điều kiện:
+
+    UPDATE ... SET stock_quantity = stock_quantity - :qty
+    WHERE id = :id AND stock_quantity >= :qty
+
+Database tự khóa dòng khi cập nhật nên không thể trừ quá số hàng còn lại. Mọi câu
+UPDATE của một đơn nằm trong cùng một transaction: chỉ cần một dòng không đủ hàng
+là InsufficientStock được raise kèm danh sách các dòng thiếu (Shortfall) và toàn
+bộ phần đã trừ được hoàn lại. Các dòng được cập nhật theo thứ tự khóa chính để hai
+đơn chung sản phẩm không khóa chéo nhau.
+
+Cách dùng (trong view):
+    try:
+        with transaction.atomic():
+            stock.reserve(stock.MAIN_SHOP, cart_items)
+            order = Order.objects.create(...)
+            stock.create_order_items(stock.MAIN_SHOP, order, cart_items)
+    except stock.InsufficientStock as shortage:
+        for shortfall in shortage.shortfalls:
+            messages.error(request, shortfall.message)
+
+Kiểm tra dưới tải đồng thời: `python manage.py stress_stock_reservation`.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import OrderItem, Product, ProductVariant
+from .organization_models import OrganizationOrderItem, OrganizationProduct, OrganizationProductVariant
+
+
+@dataclass(frozen=True)
+class ShopStock:
+    """Model tồn kho của một loại shop và cách trừ kho cho sản phẩm có size."""
+    product_model: type
+    variant_model: type
+    item_model: type
+    # True: sản phẩm có size trừ cả tồn kho biến thể lẫn tồn kho tổng của sản phẩm
+    # (Main Shop kiểm tra tồn kho tổng ở giỏ hàng). False: chỉ trừ tồn kho biến thể.
+    sized_lines_use_product_stock: bool
+
+
+MAIN_SHOP = ShopStock(Product, ProductVariant, OrderItem, sized_lines_use_product_stock=True)
+ORGANIZATION_SHOP = ShopStock(
+    OrganizationProduct, OrganizationProductVariant, OrganizationOrderItem, sized_lines_use_product_stock=False,
+)
+
+
+@dataclass
+class Shortfall:
+    """Một dòng tồn kho không đủ cho đơn hàng."""
+    product_id: int
+    product_name: str
+    size: Optional[str]
+    requested: int
+    available: int
+
+    @property
+    def message(self):
+        name = f'{self.product_name} (size {self.size})' if self.size else self.product_name
+        if self.available <= 0:
+            return f'Sản phẩm "{name}" đã hết hàng'
+        return f'Sản phẩm "{name}" không đủ hàng trong kho. Số lượng còn lại: {self.available}'
+
+    def as_dict(self):
+        return {**asdict(self), 'message': self.message}
+
+
+class InsufficientStock(Exception):
+    """Không đủ hàng cho ít nhất một dòng của đơn; `shortfalls` liệt kê các dòng thiếu."""
+
+    def __init__(self, shortfalls):
+        self.shortfalls = list(shortfalls)
+        super().__init__('; '.join(shortfall.message for shortfall in self.shortfalls))
+
+    def as_dict(self):
+        return [shortfall.as_dict() for shortfall in self.shortfalls]
+
+
+def _is_sized(line):
+    return bool(line.product.has_sizes and line.size_id)
+
+
+def _stock_rows(shop, lines):
+    """
+    Gộp các dòng giỏ hàng thành số lượng cần trừ cho từng dòng tồn kho:
+    {(model, điều kiện lọc): (số lượng, product, size)}.
+    """
+    rows = {}
+
+    def add(model, lookup, line):
+        key = (model, tuple(sorted(lookup.items())))
+        quantity, product, size = rows.get(key, (0, line.product, None))
+        rows[key] = (quantity + line.quantity, product, size or (line.size if 'size_id' in lookup else None))
+
+    for line in lines:
+        if _is_sized(line):
+            add(shop.variant_model, {'product_id': line.product_id, 'size_id': line.size_id}, line)
+            if not shop.sized_lines_use_product_stock:
+                continue
+        add(shop.product_model, {'pk': line.product_id}, line)
+    return rows
+
+
+def reserve(shop, lines):
+    """
+    Trừ tồn kho cho các dòng `lines` (CartItem / OrganizationCartItem hoặc đối tượng
+    có product, size_id, quantity). Không đủ hàng: raise InsufficientStock và không
+    trừ dòng nào. Nên gọi trong transaction.atomic() cùng với việc tạo đơn hàng.
+    """
+    rows = _stock_rows(shop, lines)
+    # Thứ tự cố định (biến thể trước, rồi theo khóa) để các đơn đồng thời khóa dòng cùng một thứ tự
+    ordered = sorted(rows.items(), key=lambda item: (item[0][0] is shop.product_model, item[0][1]))
+    shortfalls = []
+    with transaction.atomic():
+        for (model, lookup), (quantity, product, size) in ordered:
+            lookup = dict(lookup)
+            updated = model.objects.filter(stock_quantity__gte=quantity, **lookup).update(
+                stock_quantity=F('stock_quantity') - quantity
+            )
+            if updated:
+                continue
+            available = model.objects.filter(**lookup).values_list('stock_quantity', flat=True).first()
+            shortfalls.append(Shortfall(
+                product_id=product.pk,
+                product_name=product.name,
+                size=size.name if size is not None else None,
+                requested=quantity,
+                available=available or 0,
+            ))
+        if shortfalls:
+            raise InsufficientStock(shortfalls)
+
+
+def release(shop, items):
+    """
+    Hoàn lại tồn kho cho các dòng của đơn bị hủy (OrderItem / OrganizationOrderItem),
+    đúng các dòng tồn kho mà reserve() đã trừ. Dòng của đơn cũ chưa lưu size chỉ hoàn
+    tồn kho tổng của sản phẩm.
+    """
+    rows = _stock_rows(shop, items)
+    with transaction.atomic():
+        for (model, lookup), (quantity, _product, _size) in sorted(
+            rows.items(), key=lambda item: (item[0][0] is shop.product_model, item[0][1])
+        ):
+            model.objects.filter(**dict(lookup)).update(stock_quantity=F('stock_quantity') + quantity)
+
+
+def create_order_items(shop, order, lines):
+    """Tạo các dòng của đơn hàng `order` trong một câu INSERT, giá tại thời điểm đặt hàng."""
+    return shop.item_model.objects.bulk_create([
+        shop.item_model(
+            order=order,
+            product=line.product,
+            size_id=line.size_id if _is_sized(line) else None,
+            quantity=line.quantity,
+            price=line.product.current_price,
+        )
+        for line in lines
+    ])
@@ -2,12 +2,14 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.db import transaction
 from django.db.models import Q, Count, F, Sum, Avg
 from django.core.paginator import Paginator
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
+from dbpsports_core import search as search_index
 import json
 from datetime import datetime, timedelta
 
@@ -18,6 +20,8 @@ from .models import (
 )
 # NEW: Sử dụng email service mới - đơn giản và hoạt động tốt
 from .email_service import send_order_emails
+from . import sales_rollup, shelves, stock
+from .cart_summary import prefetch_items
 
 def payment_info(request):
     """Trang thông tin thanh toán"""
@@ -57,10 +61,9 @@ def shop_home(request):
     if suggestions and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         if search and len(search) >= 2:
             # Lấy gợi ý từ tên sản phẩm và danh mục
-            product_suggestions = Product.objects.filter(
-                status='published',
-                name__icontains=search
-            ).values_list('name', flat=True).distinct()[:5]
+            product_suggestions = search_index.filter_queryset(
+                Product.objects.filter(status='published'), 'product', search
+            ).values_list('name', flat=True)[:5]
             
             category_suggestions = Category.objects.filter(
                 is_active=True,
@@ -86,122 +89,30 @@ def shop_home(request):
     
     # Filter theo search
     if search:
-        products_queryset = products_queryset.filter(
-            Q(name__icontains=search) | 
-            Q(description__icontains=search) |
-            Q(category__name__icontains=search)
-        )
-    
-    # Filter theo category
-    if category == 'men':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['football-shoes', 'basketball-shoes', 'running-shoes', 'badminton-shoes', 'polo-shirts', 't-shirts', 'jackets', 'pants']
-        )
-    elif category == 'women':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['football-shoes', 'basketball-shoes', 'running-shoes', 'badminton-shoes', 'polo-shirts', 't-shirts', 'jackets', 'pants']
-        )
+        products_queryset = search_index.filter_queryset(products_queryset, 'product', search)
     
-    # Filter theo type
-    if type_filter == 'shoes':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['football-shoes', 'basketball-shoes', 'running-shoes', 'badminton-shoes', 'pickleball-shoes']
-        )
-    elif type_filter == 'clothing':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['football-apparel', 'polo-shirts', 't-shirts', 'jackets', 'pants', 'pickleball-apparel']
-        )
-    
-    # Filter theo sport
-    if sport == 'football':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['football-shoes', 'football-apparel', 'team-uniforms']
-        )
-    elif sport == 'pickleball':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['pickleball-shoes', 'pickleball-apparel']
-        )
-    elif sport == 'basketball':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['basketball-shoes']
-        )
-    elif sport == 'badminton':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['badminton-shoes']
-        )
-    elif sport == 'running':
-        products_queryset = products_queryset.filter(
-            category__slug__in=['running-shoes']
-        )
+    # Filter theo category / type / sport (nhóm danh mục trong shelves.py)
+    products_queryset = shelves.filter_by_groups(products_queryset, request.GET)
     
     # Filter theo sale
     if sale == 'true':
         products_queryset = products_queryset.filter(sale_price__isnull=False).exclude(sale_price__gte=F('price'))
     
-    # Lấy sản phẩm nổi bật
-    featured_products = Product.objects.filter(
-        status='published',
-        is_featured=True
-    ).order_by('-created_at')[:8]
-    
-    # Lấy sản phẩm bán chạy
-    bestseller_products = Product.objects.filter(
-        status='published',
-        is_bestseller=True
-    ).order_by('-created_at')[:8]
-    
-    # Lấy sản phẩm mới nhất
-    new_products = Product.objects.filter(
-        status='published'
-    ).order_by('-created_at')[:8]
-    
-    # Lấy sản phẩm bóng đá
-    football_products = Product.objects.filter(
-        status='published',
-        category__slug__in=['football-shoes', 'football-apparel', 'team-uniforms']
-    ).order_by('-created_at')[:8]
-    
-    # Lấy sản phẩm pickleball
-    pickleball_products = Product.objects.filter(
-        status='published',
-        category__slug__in=['pickleball-shoes', 'pickleball-apparel']
-    ).order_by('-created_at')[:8]
-    
-    # Lấy danh mục có sản phẩm
-    categories = Category.objects.filter(
-        is_active=True,
-        products__status='published'
-    ).distinct().annotate(
-        product_count=Count('products', filter=Q(products__status='published'))
-    ).order_by('name')
-    
     # Nếu có filter, hiển thị sản phẩm được filter
-    filtered_products = products_queryset.order_by('-created_at')[:12] if any([category, type_filter, sport, sale, search]) else None
-    
-    # Lấy banner
-    banners = ShopBanner.objects.filter(is_active=True).order_by('order', '-created_at')
-    
-    # Lấy cài đặt liên hệ
-    try:
-        contact_settings = ContactSettings.objects.get(is_active=True)
-    except ContactSettings.DoesNotExist:
-        contact_settings = None
+    # Khi tìm kiếm: giữ thứ tự theo độ liên quan
+    if not search:
+        products_queryset = products_queryset.order_by('-created_at')
+    filtered_products = products_queryset[:12] if any([category, type_filter, sport, sale, search]) else None
     
+    # Kệ sản phẩm, danh mục, banner, cài đặt liên hệ: đọc từ cache khi template dùng tới
     context = {
-        'featured_products': featured_products,
-        'bestseller_products': bestseller_products,
-        'new_products': new_products,
-        'football_products': football_products,
-        'pickleball_products': pickleball_products,
-        'categories': categories,
+        **shelves.ShopHomeSections().as_context(),
         'filtered_products': filtered_products,
         'current_category': category,
         'current_type': type_filter,
         'current_sport': sport,
         'current_search': search,
         'current_sale': sale,
-        'banners': banners,
-        'contact_settings': contact_settings,
     }
     
     return render(request, 'shop/shop_home.html', context)
@@ -222,14 +133,10 @@ def product_list(request):
     # Lọc theo từ khóa
     search = request.GET.get('search')
     if search:
-        products = products.filter(
-            Q(name__icontains=search) |
-            Q(description__icontains=search) |
-            Q(short_description__icontains=search)
-        )
+        products = search_index.filter_queryset(products, 'product', search)
     
-    # Sắp xếp
-    sort_by = request.GET.get('sort', 'newest')
+    # Sắp xếp (khi tìm kiếm mà không chọn cách sắp xếp: theo độ liên quan)
+    sort_by = request.GET.get('sort', 'relevance' if search else 'newest')
     if sort_by == 'price_low':
         products = products.order_by('price')
     elif sort_by == 'price_high':
@@ -238,6 +145,8 @@ def product_list(request):
         products = products.order_by('name')
     elif sort_by == 'bestseller':
         products = products.filter(is_bestseller=True).order_by('-created_at')
+    elif sort_by == 'relevance' and search:
+        pass  # filter_queryset đã sắp xếp theo độ liên quan
     else:  # newest
         products = products.order_by('-created_at')
     
@@ -264,17 +173,19 @@ def product_detail(request, slug):
     """Chi tiết sản phẩm"""
     product = get_object_or_404(Product.objects.prefetch_related('available_sizes'), slug=slug, status='published')
     
-    # Sản phẩm liên quan (cùng danh mục)
+    # Sản phẩm liên quan (cùng danh mục), bán chạy gần đây trước
     related_products = Product.objects.filter(
         category=product.category,
         status='published'
-    ).exclude(id=product.id).order_by('-created_at')[:4]
+    ).exclude(id=product.id).annotate(
+        recent_sold=sales_rollup.units_sold(sales_rollup.RELATED_DAYS)
+    ).order_by('-recent_sold', '-created_at')[:4]
     
-    # Sản phẩm bán chạy khác
-    other_bestsellers = Product.objects.filter(
-        is_bestseller=True,
-        status='published'
-    ).exclude(id=product.id).order_by('-created_at')[:4]
+    # Sản phẩm bán chạy khác (theo bảng doanh số, bổ sung sản phẩm gắn cờ bán chạy)
+    other_products = Product.objects.filter(status='published').exclude(id=product.id)
+    other_bestsellers = sales_rollup.top_selling(
+        other_products, 4, fallback=other_products.filter(is_bestseller=True).order_by('-created_at')
+    )
     
     context = {
         'product': product,
@@ -295,6 +206,7 @@ def test_size(request, slug):
 def cart_view(request):
     """Xem giỏ hàng"""
     cart, created = Cart.objects.get_or_create(user=request.user)
+    prefetch_items(cart, 'product__category')
     
     # Tính số tiền cần mua thêm để được miễn phí vận chuyển
     free_shipping_threshold = 500000
@@ -627,7 +539,7 @@ def remove_from_cart(request, item_id):
 @login_required
 def checkout(request):
     """Trang thanh toán"""
-    cart = get_object_or_404(Cart, user=request.user)
+    cart = prefetch_items(get_object_or_404(Cart, user=request.user))
     
     if cart.items.count() == 0:
         messages.warning(request, 'Giỏ hàng của bạn đang trống')
@@ -666,7 +578,7 @@ def checkout(request):
 @login_required
 def order_confirm(request):
     """Trang xác nhận đơn hàng"""
-    cart = get_object_or_404(Cart, user=request.user)
+    cart = prefetch_items(get_object_or_404(Cart, user=request.user), 'product__category')
     
     if cart.items.count() == 0:
         messages.warning(request, 'Giỏ hàng của bạn đang trống')
@@ -703,20 +615,13 @@ def place_order(request):
     """Đặt hàng"""
     try:
         cart = get_object_or_404(Cart, user=request.user)
+        cart_items = list(cart.items.select_related('product', 'size'))
         
-        if cart.items.count() == 0:
+        if not cart_items:
             messages.error(request, 'Giỏ hàng của bạn đang trống')
             return redirect('shop:cart')
         
-        # Kiểm tra tồn kho sản phẩm
-        for cart_item in cart.items.all():
-            if cart_item.product.stock_quantity < cart_item.quantity:
-                messages.error(request, f'Sản phẩm "{cart_item.product.name}" không đủ hàng trong kho. Số lượng còn lại: {cart_item.product.stock_quantity}')
-                return redirect('shop:cart')
-            
-            if cart_item.product.stock_quantity == 0:
-                messages.error(request, f'Sản phẩm "{cart_item.product.name}" đã hết hàng')
-                return redirect('shop:cart')
+        # Tồn kho được kiểm tra và trừ cùng lúc khi tạo đơn (shop/stock.py)
         
         # Lấy thông tin từ form
         customer_name = request.POST.get('customer_name')
@@ -758,35 +663,30 @@ def place_order(request):
         shipping_fee = 0 if cart.total_price >= 500000 else 30000
         total_amount = cart.total_price + shipping_fee
         
-        # Tạo đơn hàng
-        order = Order.objects.create(
-            user=request.user,
-            customer_name=customer_name,
-            customer_email=customer_email,
-            customer_phone=customer_phone,
-            shipping_address=shipping_address,
-            shipping_city=shipping_city,
-            shipping_district=shipping_district,
-            payment_method=payment_method,
-            subtotal=cart.total_price,
-            shipping_fee=shipping_fee,
-            total_amount=total_amount,
-            notes=notes,
-            payment_proof=payment_proof
-        )
-        
-        # Tạo các sản phẩm trong đơn hàng
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.current_price
-            )
-            
-            # Cập nhật số lượng tồn kho
-            cart_item.product.stock_quantity -= cart_item.quantity
-            cart_item.product.save()
+        # Trừ tồn kho, tạo đơn hàng và các sản phẩm trong đơn trong cùng một transaction
+        try:
+            with transaction.atomic():
+                stock.reserve(stock.MAIN_SHOP, cart_items)
+                order = Order.objects.create(
+                    user=request.user,
+                    customer_name=customer_name,
+                    customer_email=customer_email,
+                    customer_phone=customer_phone,
+                    shipping_address=shipping_address,
+                    shipping_city=shipping_city,
+                    shipping_district=shipping_district,
+                    payment_method=payment_method,
+                    subtotal=cart.total_price,
+                    shipping_fee=shipping_fee,
+                    total_amount=total_amount,
+                    notes=notes,
+                    payment_proof=payment_proof
+                )
+                stock.create_order_items(stock.MAIN_SHOP, order, cart_items)
+        except stock.InsufficientStock as shortage:
+            for shortfall in shortage.shortfalls:
+                messages.error(request, shortfall.message)
+            return redirect('shop:cart')
         
         # Lưu thông tin giao hàng để dùng lại lần sau
         CustomerShippingInfo.objects.update_or_create(
@@ -859,22 +759,22 @@ def cancel_order(request, order_id):
     try:
         order = get_object_or_404(Order, id=order_id, user=request.user)
         
-        # Chỉ cho phép hủy đơn hàng đang chờ xử lý
-        if order.status != 'pending':
+        # Chỉ cho phép hủy đơn hàng đang chờ xử lý. Đổi trạng thái bằng UPDATE có điều kiện:
+        # hai request hủy cùng lúc thì chỉ một request đổi được dòng và hoàn lại tồn kho
+        with transaction.atomic():
+            cancelled = Order.objects.filter(pk=order.pk, status='pending').update(
+                status='cancelled', updated_at=timezone.now()
+            )
+            if cancelled:
+                # Hoàn lại số lượng tồn kho
+                stock.release(stock.MAIN_SHOP, order.items.select_related('product', 'size'))
+        
+        if not cancelled:
             return JsonResponse({
                 'success': False,
                 'message': 'Chỉ có thể hủy đơn hàng đang chờ xử lý'
             })
         
-        # Cập nhật trạng thái đơn hàng
-        order.status = 'cancelled'
-        order.save()
-        
-        # Hoàn lại số lượng tồn kho
-        for item in order.items.all():
-            item.product.stock_quantity += item.quantity
-            item.product.save()
-        
         return JsonResponse({
             'success': True,
             'message': 'Đã hủy đơn hàng thành công'
@@ -1020,9 +920,9 @@ def shop_dashboard(request):
     # Đơn hàng gần đây
     recent_orders = Order.objects.select_related('user').order_by('-created_at')[:10]
     
-    # Sản phẩm bán chạy
-    bestseller_products = Product.objects.annotate(
-        total_sold=Sum('orderitem__quantity')
+    # Sản phẩm bán chạy (bảng doanh số theo ngày, xem sales_rollup.py)
+    bestseller_products = Product.objects.select_related('category').annotate(
+        total_sold=sales_rollup.units_sold()
     ).order_by('-total_sold')[:5]
     
     # Thống kê theo tháng (7 tháng gần nhất)
@@ -1058,8 +958,8 @@ def shop_dashboard(request):
     
     # Top categories
     top_categories = Category.objects.annotate(
-        product_count=Count('products'),
-        order_count=Sum('products__orderitem__quantity')
+        product_count=Count('products', distinct=True),
+        order_count=sales_rollup.units_sold(prefix='products__')
     ).order_by('-order_count')[:5]
     
     context = {
@@ -15,8 +15,9 @@ from django.db.models import Count
 from .models import (Tournament, Team, Player, Match, Lineup, Group, Goal, Card, 
                      HomeBanner, Announcement, TournamentPhoto, Notification, TeamAchievement,
                      TeamRegistration, TournamentBudget, RevenueItem, ExpenseItem, BudgetHistory,
-                     TournamentStaff, MatchNote, CoachRecruitment, PlayerTeamExit, StaffPayment) # <-- Import model mới
+                     TournamentStaff, MatchNote, CoachRecruitment, PlayerTeamExit, StaffPayment, TeamStanding, PlayerCareerStats) # <-- Import model mới
 from .utils import send_notification_email, send_schedule_notification
+from . import scoring
 
 # Admin configuration
 
@@ -483,6 +484,7 @@ class MatchAdmin(ModelAdmin):
     )
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
+        scoring.record_final_result(obj)
         if (obj.match_round != 'GROUP' and obj.team1_score is not None and obj.team1_score == obj.team2_score and (obj.team1_penalty_score is None or obj.team2_penalty_score is None)):
             self.message_user(request, "Cảnh báo: Trận đấu có tỉ số hòa, vui lòng cập nhật tỉ số luân lưu để xác định đội thắng.", messages.WARNING)
     @admin.display(description='Vòng đấu', ordering='match_round')
@@ -550,6 +552,17 @@ class CardAdmin(ModelAdmin):
     class Meta:
         verbose_name = "Thẻ phạt"
         verbose_name_plural = "Thẻ phạt"
+
+@admin.register(TeamStanding)
+class TeamStandingAdmin(ModelAdmin):
+    list_display = ("team", "tournament", "group", "played", "wins", "draws", "losses", "goals_for", "goals_against", "points", "updated_at"); list_filter = ("tournament",); search_fields = ("team__name",); list_select_related = ("team", "tournament", "group"); list_per_page = 50
+    readonly_fields = ("tournament", "group", "team", "played", "wins", "draws", "losses", "goals_for", "goals_against", "points", "updated_at")
+
+@admin.register(PlayerCareerStats)
+class PlayerCareerStatsAdmin(ModelAdmin):
+    list_display = ("player", "tournament", "team", "goals", "own_goals", "yellow_cards", "red_cards", "matches_played", "updated_at"); list_filter = ("tournament",); search_fields = ("player__full_name",); list_select_related = ("player", "tournament", "team"); list_per_page = 50
+    readonly_fields = ("player", "tournament", "team", "goals", "own_goals", "yellow_cards", "red_cards", "matches_played", "updated_at")
+
 @admin.register(HomeBanner)
 class HomeBannerAdmin(ModelAdmin): 
     list_display = ("title", "order", "is_active", "preview"); list_editable = ("order", "is_active"); search_fields = ("title",); list_per_page = 50
@@ -0,0 +1,62 @@
+# backend/tournaments/bulk_fixtures.py
+"""
+Tạo hàng loạt trận đấu (lịch vòng bảng/league, các cặp knock-out).
+
+Match.objects.create() chạy toàn bộ receiver post_save của Match cho TỪNG trận
+(xóa cache, thông báo kết quả, đếm trận để gửi thông báo lịch, trao danh hiệu...).
+create_fixtures() chèn tất cả trận bằng MỘT bulk_create trong một transaction,
+sau đó làm các việc cần thiết một lần cho cả lịch và phát MỘT tín hiệu
+`schedule_created` (receiver trong signals.py gửi thông báo cho người theo dõi).
+
+Chỉ dùng cho các trận chưa diễn ra: logic trao danh hiệu (trận Chung kết/Tranh
+Hạng Ba đã có kết quả) không chạy với các trận tạo qua đây.
+"""
+
+from django.db import transaction
+from django.dispatch import Signal
+
+from dbpsports_core import cache_namespaces
+
+from .models import Match, Tournament
+from .standings import apply_result, snapshot_match
+from .stats import TournamentStatsService
+
+# Gửi sau khi transaction tạo lịch hoàn tất.
+# Tham số: tournament, matches (list Match đã lưu), title, message
+schedule_created = Signal()
+
+BULK_BATCH_SIZE = 500
+
+
+def create_fixtures(tournament, matches, replace_rounds=(), title=None, message=None):
+    """
+    Lưu danh sách Match (chưa lưu) của `tournament` và trả về danh sách đã lưu.
+
+    replace_rounds: các match_round cần xóa trước khi tạo (tạo lại lịch).
+    title/message: nội dung thông báo "đã có lịch thi đấu"; bỏ trống thì dùng mặc định.
+    """
+    matches = list(matches)
+    for match in matches:
+        match.tournament = tournament
+
+    with transaction.atomic():
+        if replace_rounds:
+            # Xóa từng trận qua ORM để BXH/thống kê của trận cũ được trừ đúng
+            Match.objects.filter(tournament=tournament, match_round__in=list(replace_rounds)).delete()
+        created = Match.objects.bulk_create(matches, batch_size=BULK_BATCH_SIZE)
+        for match in created:
+            apply_result(snapshot_match(match), 1)  # Không truy vấn với trận chưa có tỉ số
+
+    if not created:
+        return created
+
+    cache_namespaces.bump(cache_namespaces.tournament_namespace(tournament.pk))
+    TournamentStatsService.invalidate(tournament.pk)
+    schedule_created.send(
+        sender=Tournament,
+        tournament=tournament,
+        matches=created,
+        title=title or f"Giải đấu '{tournament.name}' đã có lịch thi đấu",
+        message=message or "Lịch thi đấu mới đã được tạo. Hãy vào xem chi tiết.",
+    )
+    return created
@@ -0,0 +1,144 @@
+# backend/tournaments/career_stats.py
+"""
+Thống kê cầu thủ được lưu sẵn (PlayerCareerStats).
+
+Mỗi bàn thắng, thẻ phạt hoặc lượt có tên trong đội hình được cộng (hoặc trừ)
+trực tiếp vào hai dòng của cầu thủ: dòng của giải đấu và dòng tổng sự nghiệp
+(tournament = NULL), thông qua signal của Goal/Card/Lineup. Hồ sơ cầu thủ chỉ cần
+đọc các dòng này thay vì đếm lại toàn bộ lịch sử.
+
+Danh hiệu "Vua phá lưới"/"Cột trụ đội bóng" được xác định theo thứ hạng trên các
+cột đã tổng hợp (có chỉ mục theo giải), không phải annotate mọi cầu thủ của giải.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Card, Goal, Lineup, Match, PlayerCareerStats
+
+
+def snapshot_event(instance):
+    """
+    Lưu lại các giá trị của bàn thắng/thẻ/đội hình ảnh hưởng tới thống kê
+    (dùng để so sánh trước/sau khi lưu). Trả về (player_id, match_id, team_id, field).
+    """
+    if isinstance(instance, Goal):
+        field = 'own_goals' if instance.is_own_goal else 'goals'
+    elif isinstance(instance, Card):
+        field = 'red_cards' if instance.card_type == 'RED' else 'yellow_cards'
+    else:
+        field = 'matches_played'
+    return (instance.player_id, instance.match_id, instance.team_id, field)
+
+
+def _ensure_row(player_id, tournament_id, team_id):
+    PlayerCareerStats.objects.get_or_create(
+        player_id=player_id, tournament_id=tournament_id,
+        defaults={'team_id': team_id},
+    )
+
+
+def apply_event(snapshot, sign, tournament_id=None):
+    """
+    Cộng (sign=1) hoặc trừ (sign=-1) một sự kiện vào thống kê đã lưu của cầu thủ.
+    `snapshot` là tuple trả về từ snapshot_event().
+    """
+    player_id, match_id, team_id, field = snapshot
+    if player_id is None:
+        return
+    if tournament_id is None:
+        tournament_id = Match.objects.filter(pk=match_id).values_list('tournament_id', flat=True).first()
+
+    # Dòng của giải và dòng tổng sự nghiệp (trận đã bị xóa thì chỉ còn dòng sự nghiệp)
+    row_tournament_ids = (tournament_id, None) if tournament_id else (None,)
+    with transaction.atomic():
+        for row_tournament_id in row_tournament_ids:
+            if sign > 0:
+                _ensure_row(player_id, row_tournament_id, team_id if row_tournament_id else None)
+            # Khi trừ không tạo dòng mới (dòng có thể đang bị xóa theo cầu thủ/giải)
+            PlayerCareerStats.objects.filter(player_id=player_id, tournament_id=row_tournament_id).update(
+                **{field: F(field) + sign}
+            )
+
+
+def _is_leader(row, field):
+    """Cầu thủ có đứng đầu giải theo `field` không (đồng hạng nhất cũng tính)."""
+    if row is None or getattr(row, field) <= 0:
+        return False
+    return not PlayerCareerStats.objects.filter(
+        tournament_id=row.tournament_id, **{f'{field}__gt': getattr(row, field)}
+    ).exists()
+
+
+def player_profile_stats(player, tournament_id=None):
+    """
+    Thống kê cho hồ sơ cầu thủ. Trả về dict:
+    career (dòng tổng sự nghiệp hoặc None), tournament_ids, team_ids (các giải/đội đã thi đấu),
+    is_top_scorer, is_most_played (trong giải `tournament_id`).
+    """
+    rows = list(PlayerCareerStats.objects.filter(player=player))
+    career = next((row for row in rows if row.tournament_id is None), None)
+    tournament_row = next((row for row in rows if tournament_id and row.tournament_id == tournament_id), None)
+    return {
+        'career': career,
+        'tournament_ids': [row.tournament_id for row in rows if row.tournament_id],
+        'team_ids': {row.team_id for row in rows if row.team_id},
+        'is_top_scorer': _is_leader(tournament_row, 'goals'),
+        'is_most_played': _is_leader(tournament_row, 'matches_played'),
+    }
+
+
+def rebuild_player_stats(players=None):
+    """
+    Tính lại toàn bộ thống kê đã lưu từ lịch sử bàn thắng/thẻ/đội hình.
+    `players`: queryset/danh sách cầu thủ cần tính lại (None = tất cả). Trả về số dòng đã tạo.
+    """
+    goals = Goal.objects.all()
+    cards = Card.objects.all()
+    lineups = Lineup.objects.all()
+    existing = PlayerCareerStats.objects.all()
+    if players is not None:
+        player_ids = [getattr(player, 'pk', player) for player in players]
+        goals = goals.filter(player_id__in=player_ids)
+        cards = cards.filter(player_id__in=player_ids)
+        lineups = lineups.filter(player_id__in=player_ids)
+        existing = existing.filter(player_id__in=player_ids)
+
+    totals = defaultdict(lambda: defaultdict(int))
+    teams = {}
+    grouped = (
+        (lineups, {'matches_played': Count('id')}),
+        (cards, {
+            'yellow_cards': Count('id', filter=Q(card_type='YELLOW')),
+            'red_cards': Count('id', filter=Q(card_type='RED')),
+        }),
+        (goals, {
+            'goals': Count('id', filter=Q(is_own_goal=False)),
+            'own_goals': Count('id', filter=Q(is_own_goal=True)),
+        }),
+    )
+    for queryset, counters in grouped:
+        rows = queryset.values('player_id', 'match__tournament_id', 'team_id').annotate(**counters).order_by()
+        for row in rows:
+            player_id, tournament_id = row['player_id'], row['match__tournament_id']
+            for key in ((player_id, tournament_id), (player_id, None)):
+                for field in counters:
+                    totals[key][field] += row[field]
+            # Đội lấy từ đội hình trước, sau đó từ thẻ/bàn thắng
+            teams.setdefault((player_id, tournament_id), row['team_id'])
+
+    rows = [
+        PlayerCareerStats(
+            player_id=player_id, tournament_id=tournament_id,
+            team_id=teams.get((player_id, tournament_id)) if tournament_id else None,
+            **counts,
+        )
+        for (player_id, tournament_id), counts in totals.items()
+    ]
+
+    with transaction.atomic():
+        existing.delete()
+        PlayerCareerStats.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
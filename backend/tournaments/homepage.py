@@ -0,0 +1,121 @@
+# backend/tournaments/homepage.py
+"""
+Các khối dữ liệu của trang chủ (banner, giải nổi bật, giải nhiều người theo dõi,
+giải đang hoạt động).
+
+- Xếp hạng dùng cột Tournament.followers_count (cập nhật khi theo dõi/bỏ theo dõi,
+  xem signals.py) thay vì annotate(Count('followers')) trên mọi giải.
+  Đếm lại toàn bộ: `python manage.py rebuild_followers_count`.
+- Mỗi khối được cache riêng theo namespace (dbpsports_core/cache_namespaces.py):
+  banner theo HOMEPAGE_BANNERS, các khối giải đấu theo HOMEPAGE_TOURNAMENTS; lưu
+  giải, đổi số người theo dõi... sẽ bump namespace tương ứng.
+- Giá trị được đưa vào context dưới dạng hàm (như dbpsports_core/user_chrome.py):
+  chỉ đọc cache/truy vấn khi template dùng tới, tối đa một lần mỗi request.
+"""
+
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from dbpsports_core import cache_namespaces
+
+from .models import HomeBanner, Tournament
+
+SECTION_CACHE_TIMEOUT = 60 * 10
+FEATURED_COUNT = 4
+MOST_FOLLOWED_COUNT = 6
+ACTIVE_COUNT = 12
+
+
+def refresh_followers_count(tournament_ids=None):
+    """
+    Đếm lại Tournament.followers_count (tournament_ids=None: mọi giải) và làm mới
+    các khối giải đấu trên trang chủ. Trả về số giải đã cập nhật.
+    """
+    Follow = Tournament.followers.through
+    counts = (
+        Follow.objects.filter(tournament_id=OuterRef('pk'))
+        .order_by().values('tournament_id').annotate(total=Count('pk')).values('total')
+    )
+    tournaments = Tournament.objects.all()
+    if tournament_ids is not None:
+        tournaments = tournaments.filter(pk__in=tournament_ids)
+    updated = tournaments.update(followers_count=Coalesce(Subquery(counts), 0))
+    if updated:
+        cache_namespaces.bump(cache_namespaces.HOMEPAGE_TOURNAMENTS)
+    return updated
+
+
+def _active_tournaments():
+    return Tournament.objects.exclude(status=Tournament.Status.FINISHED).select_related('organization')
+
+
+def _banners():
+    return list(HomeBanner.objects.filter(is_active=True).order_by('order', 'id'))
+
+
+def _ranking():
+    """Giải nổi bật (giải của Super Admin, bù thêm giải nhiều người theo dõi) và giải nhiều người theo dõi."""
+    # 1. Giải của Super Admin (không có organization) luôn được ưu tiên
+    featured = list(
+        _active_tournaments().filter(organization__isnull=True).order_by('-followers_count', '-start_date')
+    )
+    # 2. Còn thiếu thì lấy thêm giải có nhiều người theo dõi nhất từ BTC khác
+    remaining_count = FEATURED_COUNT - len(featured)
+    if remaining_count > 0:
+        featured.extend(
+            _active_tournaments()
+            .exclude(id__in=[t.id for t in featured])
+            .filter(followers_count__gt=0)
+            .order_by('-followers_count', '-start_date')[:remaining_count]
+        )
+    # Giải nhiều người theo dõi nhất (loại trừ các giải đã ở featured)
+    most_followed = list(
+        _active_tournaments()
+        .exclude(id__in=[t.id for t in featured])
+        .filter(followers_count__gt=0)
+        .order_by('-followers_count', '-start_date')[:MOST_FOLLOWED_COUNT]
+    )
+    return {'featured': featured, 'most_followed': most_followed}
+
+
+def _active():
+    tournaments = _active_tournaments().order_by('-start_date')
+    return {'items': list(tournaments[:ACTIVE_COUNT]), 'count': tournaments.count()}
+
+
+class HomepageSections:
+    """Các khối của trang chủ, đọc từ cache theo từng khối và ghi nhớ trong request."""
+
+    def __init__(self):
+        self._values = {}
+
+    def _get(self, name, compute, namespace):
+        if name not in self._values:
+            self._values[name] = cache_namespaces.get_or_set(
+                f'homepage:{name}', [namespace], compute, SECTION_CACHE_TIMEOUT
+            )
+        return self._values[name]
+
+    def banners(self):
+        return self._get('banners', _banners, cache_namespaces.HOMEPAGE_BANNERS)
+
+    def featured_tournaments(self):
+        return self._get('ranking', _ranking, cache_namespaces.HOMEPAGE_TOURNAMENTS)['featured']
+
+    def most_followed_tournaments(self):
+        return self._get('ranking', _ranking, cache_namespaces.HOMEPAGE_TOURNAMENTS)['most_followed']
+
+    def active_tournaments(self):
+        return self._get('active', _active, cache_namespaces.HOMEPAGE_TOURNAMENTS)['items']
+
+    def active_tournament_count(self):
+        return self._get('active', _active, cache_namespaces.HOMEPAGE_TOURNAMENTS)['count']
+
+    def as_context(self):
+        return {
+            'banners': self.banners,
+            'featured_tournaments': self.featured_tournaments,
+            'most_followed_tournaments': self.most_followed_tournaments,
+            'active_tournaments': self.active_tournaments,
+            'active_tournament_count': self.active_tournament_count,
+        }
@@ -0,0 +1,149 @@
+# backend/tournaments/live_feed.py
+"""
+Luồng sự kiện trực tiếp của trận đấu (tỉ số, bàn thắng, thẻ, thay người, sự kiện trận).
+
+Phòng điều khiển (match_control_view, delete_match_event) gọi publish() sau mỗi
+lần ghi; người xem (trang livestream, chi tiết trận, overlay) hỏi định kỳ
+`/match/<pk>/live/?since=<cursor>` và chỉ nhận các sự kiện mới hơn cursor. Mặc
+định request trả về ngay (short-poll, chỉ đọc cache) để không giữ worker; long-poll
+chỉ bật khi đặt LIVE_FEED_WAIT_SECONDS > 0 trên máy chủ có nhiều worker.
+
+Sự kiện được lưu trong cache dùng chung (xem CACHE_BACKEND trong settings), mỗi
+sự kiện một key theo số thứ tự tăng dần, giữ FEED_SIZE sự kiện gần nhất. Số thứ
+tự được cấp bằng cache.incr() (nguyên tử trên mọi backend, xem
+dbpsports_core/cache_backends.py) nên hai người ghi cùng lúc không trùng số. Người
+xem chỉ đọc cache nên hàng nghìn người xem không tạo thêm truy vấn database;
+tỉ số hiện tại chỉ đọc từ database khi cache chưa có (cache tỉ số bị xóa khi lưu
+Match hoặc khi scoring.py đổi tỉ số, xem signals.py).
+
+Nếu cursor của người xem quá cũ (sự kiện đã bị đẩy khỏi cache) hoặc không hợp lệ,
+phản hồi có `reset: true` kèm tỉ số hiện tại để trang tự đồng bộ lại.
+
+Cấu hình (settings.py, đều có giá trị mặc định):
+    LIVE_FEED_WAIT_SECONDS   số giây tối đa giữ một request chờ sự kiện mới (long-poll), 0 (mặc định) = trả về ngay
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Match
+
+FEED_SIZE = 200  # Số sự kiện gần nhất được giữ lại cho mỗi trận
+FEED_TIMEOUT = 6 * 60 * 60  # Giữ luồng sự kiện 6 giờ kể từ lần ghi cuối
+POLL_INTERVAL = 0.5  # Khoảng cách giữa hai lần đọc cache khi long-poll (giây)
+
+
+def _seq_key(match_id):
+    return f'live:{match_id}:seq'
+
+
+def _event_key(match_id, seq):
+    return f'live:{match_id}:event:{seq}'
+
+
+def _state_key(match_id):
+    return f'live:{match_id}:state'
+
+
+def current_cursor(match_id):
+    """Số thứ tự của sự kiện mới nhất (dùng làm cursor ban đầu khi render trang)."""
+    seq = cache.get(_seq_key(match_id))
+    if seq is None:
+        # Khởi tạo bằng thời gian (ms): nếu key bị đẩy khỏi cache, cursor mới vẫn
+        # lớn hơn mọi cursor cũ nên người xem nhận "reset" thay vì bỏ sót sự kiện.
+        seq = int(time.time() * 1000)
+        if not cache.add(_seq_key(match_id), seq, FEED_TIMEOUT):
+            seq = cache.get(_seq_key(match_id), seq)
+    return seq
+
+
+def _scores(match):
+    return {'team1_score': match.team1_score, 'team2_score': match.team2_score}
+
+
+def get_state(match_id):
+    """Tỉ số hiện tại của trận; None nếu trận không tồn tại."""
+    state = cache.get(_state_key(match_id))
+    if state is None:
+        match = Match.objects.filter(pk=match_id).only('team1_score', 'team2_score').first()
+        if match is None:
+            return None
+        state = _scores(match)
+        cache.set(_state_key(match_id), state, FEED_TIMEOUT)
+    return state
+
+
+def forget_state(match_id):
+    """
+    Xóa tỉ số đã cache của trận: tỉ số được ghi không qua publish() (match.save() từ
+    trang BTC/admin, scoring.py) thì lần đọc sau lấy lại từ database.
+    """
+    cache.delete(_state_key(match_id))
+
+
+def publish(match, event_type, data=None, scores=None):
+    """
+    Ghi một sự kiện vào luồng của trận.
+    event_type: 'goal', 'card', 'substitution', 'match_event', 'score', '<loại>_deleted'...
+    scores: tỉ số mới (nếu sự kiện làm thay đổi tỉ số).
+    """
+    while True:
+        current_cursor(match.pk)
+        try:
+            seq = cache.incr(_seq_key(match.pk))
+            break
+        except ValueError:
+            # Key vừa hết hạn giữa hai lệnh: khởi tạo lại rồi tăng tiếp (không set()
+            # trực tiếp, để hai người ghi cùng lúc không nhận cùng một số thứ tự)
+            continue
+    cache.touch(_seq_key(match.pk), FEED_TIMEOUT)
+
+    event = {
+        'seq': seq,
+        'type': event_type,
+        'data': data or {},
+        'scores': scores,
+        'at': timezone.now().isoformat(),
+    }
+    values = {_event_key(match.pk, seq): event}
+    if scores is not None:
+        values[_state_key(match.pk)] = scores
+    cache.set_many(values, FEED_TIMEOUT)
+    return event
+
+
+def publish_scores(match):
+    """Ghi sự kiện thay đổi tỉ số (nhập tỉ số trực tiếp, xóa bàn thắng...)."""
+    return publish(match, 'score', scores=_scores(match))
+
+
+def read(match_id, since):
+    """
+    Trả về (cursor, events). events là None nếu người xem cần đồng bộ lại
+    (since không hợp lệ, quá cũ, hoặc sự kiện đã bị đẩy khỏi cache).
+    """
+    seq = current_cursor(match_id)
+    if since is None or since > seq or since < seq - FEED_SIZE:
+        return seq, None
+    if since == seq:
+        return seq, []
+    keys = [_event_key(match_id, n) for n in range(since + 1, seq + 1)]
+    found = cache.get_many(keys)
+    if len(found) != len(keys):
+        return seq, None
+    return seq, [found[key] for key in keys]
+
+
+def wait_for_events(match_id, since, timeout=None):
+    """Như read(), nhưng chờ tối đa `timeout` giây nếu chưa có sự kiện mới."""
+    if timeout is None:
+        timeout = getattr(settings, 'LIVE_FEED_WAIT_SECONDS', 0)
+    deadline = time.monotonic() + timeout
+    while True:
+        cursor, events = read(match_id, since)
+        if events != [] or time.monotonic() + POLL_INTERVAL > deadline:
+            return cursor, events
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,104 @@
+"""
+Management command đo hiệu năng bộ máy xếp lịch (tournaments.scheduling).
+
+Không dùng database: chạy trên ID đội giả với các kích thước giải, số lượt
+và số sân khác nhau, so sánh có/không bước tối ưu cục bộ.
+"""
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from tournaments.scheduling import ScheduleConstraints, ScheduleEngine, build_fixtures, parse_time_slots
+
+
+class Command(BaseCommand):
+    help = 'Đo thời gian và chất lượng xếp lịch vòng tròn theo số đội, số lượt và số sân'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--teams',
+            type=int,
+            nargs='+',
+            default=[8, 16, 32, 64],
+            help='Danh sách số đội cần đo (mặc định: 8 16 32 64)',
+        )
+        parser.add_argument(
+            '--legs',
+            type=int,
+            nargs='+',
+            default=[1, 2],
+            help='Số lượt vòng tròn (mặc định: 1 2)',
+        )
+        parser.add_argument(
+            '--venues',
+            type=int,
+            nargs='+',
+            default=[1, 4],
+            help='Số sân thi đấu (mặc định: 1 4)',
+        )
+        parser.add_argument(
+            '--groups',
+            type=int,
+            default=1,
+            help='Chia đều các đội vào số bảng này (mặc định: 1 - một bảng league)',
+        )
+        parser.add_argument(
+            '--max-per-week',
+            type=int,
+            default=2,
+            help='Số trận tối đa mỗi đội mỗi tuần, 0 = không giới hạn (mặc định: 2)',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Seed ngẫu nhiên (mặc định: 1)')
+
+    def handle(self, *args, **options):
+        header = (
+            f"{'Đội':>4} | {'Lượt':>4} | {'Sân':>3} | {'Tối ưu':>6} | {'Thời gian (ms)':>14} | "
+            f"{'Đã xếp':>6} | {'Chưa xếp':>8} | {'Số ngày':>7}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for team_count in options['teams']:
+            for legs in options['legs']:
+                for venues in options['venues']:
+                    for optimize in (False, True):
+                        row = self._run(team_count, legs, venues, optimize, options)
+                        self.stdout.write(
+                            f"{team_count:>4} | {legs:>4} | {venues:>3} | {'có' if optimize else 'không':>6} | "
+                            f"{row['elapsed_ms']:>14.1f} | {row['scheduled']:>6} | {row['unscheduled']:>8} | {row['span']:>7}"
+                        )
+
+    def _run(self, team_count, legs, venues, optimize, options):
+        rng = random.Random(options['seed'])
+        group_count = max(1, options['groups'])
+        groups = {
+            index: (f'Bảng {index + 1}', list(range(index + 1, team_count + 1, group_count)))
+            for index in range(group_count)
+        }
+        start_date = date(2025, 1, 6)  # Thứ Hai
+        constraints = ScheduleConstraints(
+            start_date=start_date,
+            weekdays={2, 5, 6},  # Thứ Tư, Thứ Bảy, Chủ Nhật
+            time_slots=parse_time_slots(['08:00', '15:00', '19:00']),
+            locations=[f'Sân {i + 1}' for i in range(venues)],
+            rest_days=2,
+            max_matches_per_team_per_week=options['max_per_week'] or None,
+        )
+
+        started = time.perf_counter()
+        fixtures = build_fixtures(groups, legs, rng)
+        result = ScheduleEngine(constraints, rng=rng, optimize=optimize).generate(fixtures)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        span = 0
+        if result.scheduled:
+            last_day = max(m.match_time for m in result.scheduled).date()
+            span = (last_day - start_date).days + 1
+        return {
+            'elapsed_ms': elapsed_ms,
+            'scheduled': len(result.scheduled),
+            'unscheduled': len(result.unscheduled),
+            'span': span,
+        }
+
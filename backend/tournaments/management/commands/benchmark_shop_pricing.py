@@ -0,0 +1,119 @@
+"""
+Management command đo hiệu năng bộ tính phí đăng ký kèm giỏ hàng (tournaments.shop_pricing).
+
+Không dùng database: sinh giỏ hàng giả (Shop chính + Shop BTC) với số dòng khác
+nhau, kiểm tra kết quả của quote() với cách tính cũ (mỗi hàm duyệt giỏ hàng một
+lượt) rồi so sánh thời gian.
+
+Cột "Cách cũ" chỉ đo phần tính toán của 6 lượt duyệt, không tính truy vấn: trong
+code cũ mỗi lượt còn tải lại giỏ hàng và từng sản phẩm (1 + số dòng truy vấn mỗi
+lượt), còn quote_registration() tải giỏ hàng một lần (2-4 truy vấn). quote() tạo
+thêm kết quả từng dòng (LineQuote) nên phần tính toán thuần có thể chậm hơn cách
+cũ một chút; cột "Truy vấn cũ" cho biết số truy vấn mà cách cũ cần với cùng giỏ hàng.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.shop_pricing import MAIN_SHOP, ORGANIZATION_SHOP, PricingLine, PricingRules, quote
+
+
+_LEGACY_PASSES = 6
+
+
+def _legacy_discount(rules, lines, stock, shop):
+    """Cách tính cũ của calculate_shop_discount / calculate_organization_shop_discount."""
+    if rules.discount_percentage <= 0:
+        return Decimal('0')
+    total_profit = Decimal('0')
+    for line in lines:
+        if line.shop != shop or stock[line.stock_keys[0]] < line.quantity:
+            continue
+        if shop == ORGANIZATION_SHOP and line.organization_id != rules.organization_id:
+            continue
+        if line.cost_price:
+            total_profit += (line.unit_price - line.cost_price) * line.quantity
+    discount = total_profit * rules.discount_percentage / 100
+    return max(min(discount, rules.registration_fee), Decimal('0'))
+
+
+def _legacy_quote(rules, lines, stock):
+    """Tổng giỏ hàng, giảm giá từng shop, phí cuối cùng (tính lại cả hai) và tồn kho: 6 lượt duyệt."""
+    sum(line.unit_price * line.quantity for line in lines)
+    main_discount = _legacy_discount(rules, lines, stock, MAIN_SHOP)
+    org_discount = _legacy_discount(rules, lines, stock, ORGANIZATION_SHOP)
+    final_fee = max(
+        rules.registration_fee
+        - _legacy_discount(rules, lines, stock, MAIN_SHOP)
+        - _legacy_discount(rules, lines, stock, ORGANIZATION_SHOP),
+        Decimal('0'),
+    )
+    unavailable = [line for line in lines if stock[line.stock_keys[0]] < line.quantity]
+    return main_discount, org_discount, final_fee, len(unavailable)
+
+
+class Command(BaseCommand):
+    help = 'Đo thời gian tính phí đăng ký + giảm giá từ giỏ hàng theo số dòng giỏ hàng'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lines',
+            type=int,
+            nargs='+',
+            default=[5, 50, 500, 5000],
+            help='Danh sách số dòng giỏ hàng cần đo (mặc định: 5 50 500 5000)',
+        )
+        parser.add_argument('--repeat', type=int, default=200, help='Số lần lặp mỗi cỡ giỏ hàng (mặc định: 200)')
+        parser.add_argument('--seed', type=int, default=1, help='Seed ngẫu nhiên (mặc định: 1)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = max(1, options['repeat'])
+        rules = PricingRules(
+            registration_fee=Decimal('50000000'), discount_percentage=Decimal('12.5'), organization_id=1,
+        )
+        header = f"{'Số dòng':>7} | {'quote() (ms)':>12} | {'Cách cũ (ms)':>12} | {'Truy vấn cũ':>11} | {'Giảm giá':>12} | {'Thiếu hàng':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for line_count in options['lines']:
+            lines, stock = self._cart(rng, line_count)
+
+            result = quote(rules, lines, stock)
+            expected = _legacy_quote(rules, lines, stock)
+            actual = (result.main.discount, result.organization.discount, result.final_fee, len(result.unavailable_items))
+            if actual != expected:
+                raise CommandError(f'Kết quả khác cách tính cũ với {line_count} dòng: {actual} != {expected}')
+
+            engine_ms = self._time(lambda: quote(rules, lines, stock), repeat)
+            legacy_ms = self._time(lambda: _legacy_quote(rules, lines, stock), repeat)
+            self.stdout.write(
+                f"{line_count:>7} | {engine_ms:>12.3f} | {legacy_ms:>12.3f} | {_LEGACY_PASSES * (1 + line_count):>11} | "
+                f"{result.discount:>12,.0f} | {len(result.unavailable_items):>10}"
+            )
+
+    def _cart(self, rng, line_count):
+        """Mỗi dòng một sản phẩm riêng để kết quả so sánh được với cách tính cũ."""
+        lines = []
+        stock = {}
+        for index in range(line_count):
+            shop = MAIN_SHOP if index % 2 else ORGANIZATION_SHOP
+            key = (shop, 'product', index)
+            stock[key] = rng.randint(0, 20)
+            price = Decimal(rng.randrange(50000, 1000000, 1000))
+            lines.append(PricingLine(
+                shop=shop,
+                quantity=rng.randint(1, 5),
+                unit_price=price,
+                cost_price=price * Decimal('0.6') if rng.random() < 0.8 else None,
+                stock_keys=(key,),
+                organization_id=rng.choice((1, 1, 1, 2)) if shop == ORGANIZATION_SHOP else None,
+            ))
+        return lines, stock
+
+    def _time(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) * 1000 / repeat
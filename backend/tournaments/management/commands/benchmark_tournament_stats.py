@@ -0,0 +1,100 @@
+"""
+Management command đo số truy vấn SQL của trang chi tiết giải đấu theo số đội.
+
+Dữ liệu giả được tạo trong một transaction và rollback ngay sau khi đo,
+nên có thể chạy an toàn trên database thật.
+"""
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tournaments.models import Card, Goal, Group, Match, Player, Team, TeamRegistration, Tournament
+from tournaments.stats import TournamentStatsService
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Đo số truy vấn của khối thống kê và trang chi tiết giải đấu khi số đội tăng dần'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[4, 8, 16, 32],
+            help='Danh sách số đội cần đo (mặc định: 4 8 16 32)',
+        )
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Host dùng cho request giả (phải nằm trong ALLOWED_HOSTS)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'Số đội':>8} | {'Thống kê':>9} | {'Trang chi tiết':>14}")
+        self.stdout.write('-' * 38)
+        for size in options['sizes']:
+            stats_queries, page_queries = self._measure(size, options['host'])
+            self.stdout.write(f"{size:>8} | {stats_queries:>9} | {page_queries:>14}")
+
+    def _measure(self, team_count, host):
+        result = {}
+        try:
+            with transaction.atomic():
+                tournament = self._create_tournament(team_count)
+
+                with CaptureQueriesContext(connection) as ctx:
+                    TournamentStatsService(tournament).compute()
+                result['stats'] = len(ctx.captured_queries)
+
+                TournamentStatsService.invalidate(tournament.pk)
+                client = Client(HTTP_HOST=host)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = client.get(reverse('tournament_detail', kwargs={'pk': tournament.pk}))
+                result['page'] = len(ctx.captured_queries) if response.status_code == 200 else f'HTTP {response.status_code}'
+
+                TournamentStatsService.invalidate(tournament.pk)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return result['stats'], result['page']
+
+    def _create_tournament(self, team_count):
+        captain, _ = User.objects.get_or_create(username='__benchmark_captain__')
+        tournament = Tournament.objects.create(
+            name=f'Benchmark {team_count} đội',
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+        )
+        group = Group.objects.create(tournament=tournament, name='A')
+
+        teams = []
+        for i in range(team_count):
+            team = Team.objects.create(name=f'Benchmark {team_count}-{i}', captain=captain, transfer_value=1)
+            TeamRegistration.objects.create(team=team, tournament=tournament, group=group, payment_status='PAID')
+            teams.append(team)
+
+        players = {
+            team.id: Player.objects.create(team=team, full_name=f'Cầu thủ {team.id}', jersey_number=9, position='FW')
+            for team in teams
+        }
+
+        kickoff = datetime.now() - timedelta(days=1)
+        for home, away in zip(teams[::2], teams[1::2]):
+            match = Match.objects.create(
+                tournament=tournament, team1=home, team2=away, match_time=kickoff,
+                team1_score=3, team2_score=1,
+            )
+            for minute in (10, 20, 30):
+                Goal.objects.create(match=match, team=home, player=players[home.id], minute=minute)
+            Goal.objects.create(match=match, team=away, player=players[away.id], minute=40)
+            Card.objects.create(match=match, team=away, player=players[away.id], card_type='YELLOW', minute=50)
+        return tournament
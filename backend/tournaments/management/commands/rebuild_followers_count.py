@@ -0,0 +1,21 @@
+"""
+Management command để đếm lại số người theo dõi đã lưu (Tournament.followers_count)
+"""
+from django.core.management.base import BaseCommand
+from tournaments.homepage import refresh_followers_count
+
+
+class Command(BaseCommand):
+    help = 'Đếm lại số người theo dõi của các giải đấu (dùng để xếp hạng trên trang chủ)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tournament',
+            type=int,
+            action='append',
+            help='ID của giải đấu cần đếm lại, có thể lặp lại (nếu không chỉ định sẽ đếm lại tất cả)',
+        )
+
+    def handle(self, *args, **options):
+        updated = refresh_followers_count(options.get('tournament'))
+        self.stdout.write(self.style.SUCCESS(f'Đã đếm lại số người theo dõi cho {updated} giải đấu.'))
@@ -0,0 +1,31 @@
+"""
+Management command để tính lại thống kê cầu thủ đã lưu (PlayerCareerStats) từ lịch sử bàn thắng, thẻ và đội hình
+"""
+from django.core.management.base import BaseCommand
+from tournaments.career_stats import rebuild_player_stats
+from tournaments.models import Player
+
+
+class Command(BaseCommand):
+    help = 'Tính lại toàn bộ thống kê cầu thủ đã lưu (theo giải và tổng sự nghiệp)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--player',
+            type=int,
+            action='append',
+            help='ID của cầu thủ cần tính lại, có thể lặp lại (nếu không chỉ định sẽ tính lại tất cả)',
+        )
+
+    def handle(self, *args, **options):
+        player_ids = options.get('player')
+
+        players = None
+        if player_ids:
+            players = list(Player.objects.filter(pk__in=player_ids).values_list('pk', flat=True))
+            if not players:
+                self.stdout.write(self.style.WARNING('Không có cầu thủ nào cần tính lại.'))
+                return
+
+        row_count = rebuild_player_stats(players)
+        self.stdout.write(self.style.SUCCESS(f'Đã tính lại thống kê cầu thủ: {row_count} dòng.'))
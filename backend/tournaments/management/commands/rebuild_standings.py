@@ -0,0 +1,34 @@
+"""
+Management command để tính lại bảng xếp hạng đã lưu (TeamStanding) từ lịch sử trận đấu
+"""
+from django.core.management.base import BaseCommand
+from tournaments.models import Tournament
+from tournaments.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Tính lại toàn bộ bảng xếp hạng đã lưu từ các trận đấu đã có kết quả'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tournament',
+            type=int,
+            help='ID của giải đấu cần tính lại (nếu không chỉ định sẽ tính lại tất cả)',
+        )
+
+    def handle(self, *args, **options):
+        tournament_id = options.get('tournament')
+
+        tournaments = Tournament.objects.all()
+        if tournament_id:
+            tournaments = tournaments.filter(pk=tournament_id)
+
+        if not tournaments.exists():
+            self.stdout.write(self.style.WARNING('Không có giải đấu nào cần tính lại.'))
+            return
+
+        for tournament in tournaments:
+            row_count = rebuild_standings(tournament)
+            self.stdout.write(f'{tournament.name}: {row_count} đội')
+
+        self.stdout.write(self.style.SUCCESS(f'Đã tính lại BXH cho {tournaments.count()} giải đấu.'))
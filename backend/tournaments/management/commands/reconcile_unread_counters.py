@@ -0,0 +1,49 @@
+"""
+Management command đối soát bộ đếm thông báo/tin tức chưa đọc (UserBadgeCounter)
+với dữ liệu gốc và sửa các dòng bị sai lệch. Nên chạy định kỳ (ví dụ cron mỗi đêm).
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from tournaments.unread_counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Tính lại bộ đếm thông báo/tin tức chưa đọc của người dùng và sửa các sai lệch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            help='ID người dùng cần đối soát (nếu không chỉ định sẽ đối soát tất cả)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Số người dùng xử lý mỗi lượt (mặc định: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Chỉ báo cáo sai lệch, không ghi vào database',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        if options.get('user'):
+            user_ids = user_ids.filter(pk__in=options['user'])
+        user_ids = list(user_ids)
+
+        batch_size = options['batch_size']
+        drift_count = 0
+        for start in range(0, len(user_ids), batch_size):
+            drift = reconcile(user_ids[start:start + batch_size], dry_run=options['dry_run'])
+            for user_id, current, expected in drift:
+                self.stdout.write(f'Người dùng {user_id}: {current or "chưa có"} -> {expected}')
+            drift_count += len(drift)
+
+        action = 'Phát hiện' if options['dry_run'] else 'Đã sửa'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {drift_count} bộ đếm sai lệch trên {len(user_ids)} người dùng.'
+        ))
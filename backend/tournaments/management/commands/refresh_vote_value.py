@@ -0,0 +1,24 @@
+"""
+Management command để đếm lại người dùng và cập nhật giá trị phiếu bầu / giá trị thị trường của cầu thủ.
+Có thể chạy định kỳ bằng cron (ví dụ mỗi giờ).
+"""
+from django.core.management.base import BaseCommand
+from tournaments.valuation import refresh_vote_value
+
+
+class Command(BaseCommand):
+    help = 'Tính lại giá trị một phiếu bầu và market_value của cầu thủ nếu số người dùng đã vượt ngưỡng'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Luôn tính lại market_value của mọi cầu thủ kể cả khi giá trị phiếu bầu không đổi',
+        )
+
+    def handle(self, *args, **options):
+        state = refresh_vote_value(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f"1 phiếu = {state['value']} (phiên bản {state['version']}, "
+            f"giữ nguyên tới khi có {state['next_user_count']} người dùng)."
+        ))
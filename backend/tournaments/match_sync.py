@@ -0,0 +1,109 @@
+# backend/tournaments/match_sync.py
+"""
+Đồng bộ diễn biến trận theo phiên bản cho phòng điều khiển trực tiếp.
+
+Mỗi lần bàn thắng, thẻ, thay người, sự kiện trận hoặc đội hình được lưu/xóa
+(receiver trong signals.py), Match.version được tăng nguyên tử và một dòng
+MatchChange ghi lại bản tóm tắt của đối tượng (hoặc đánh dấu đã xóa).
+
+Phòng điều khiển gọi `/match/<pk>/control/sync/?since=<version>` và chỉ nhận
+các thay đổi sau phiên bản đã có: một truy vấn lấy trận (theo khóa chính) và
+một truy vấn MatchChange theo chỉ mục (match, version).
+Lần tải đầu (không có `since`) trả về toàn bộ diễn biến hiện tại.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Card, Goal, Lineup, Match, MatchChange, MatchEvent, Substitution
+
+KIND_BY_MODEL = {
+    Goal: MatchChange.Kind.GOAL,
+    Card: MatchChange.Kind.CARD,
+    Substitution: MatchChange.Kind.SUBSTITUTION,
+    MatchEvent: MatchChange.Kind.MATCH_EVENT,
+    Lineup: MatchChange.Kind.LINEUP,
+}
+
+
+def serialize(instance):
+    """Tóm tắt một bàn thắng/thẻ/thay người/sự kiện/đội hình để gửi cho phòng điều khiển."""
+    if isinstance(instance, Lineup):
+        return {'id': instance.pk, 'player_id': instance.player_id, 'team_id': instance.team_id, 'status': instance.status}
+    if isinstance(instance, MatchEvent):
+        return {
+            'id': instance.pk, 'event_type': instance.event_type, 'text': instance.text,
+            'created_at': instance.created_at.isoformat(),
+        }
+
+    data = {
+        'id': instance.pk, 'minute': instance.minute, 'team_id': instance.team_id,
+        'team_name': instance.team.name, 'created_at': instance.created_at.isoformat(),
+    }
+    if isinstance(instance, Goal):
+        data.update(player_id=instance.player_id, player_name=instance.player.full_name, is_own_goal=instance.is_own_goal)
+    elif isinstance(instance, Card):
+        data.update(player_id=instance.player_id, player_name=instance.player.full_name, card_type=instance.card_type)
+    elif isinstance(instance, Substitution):
+        data.update(
+            player_in_id=instance.player_in_id, player_in_name=instance.player_in.full_name,
+            player_out_id=instance.player_out_id, player_out_name=instance.player_out.full_name,
+        )
+    return data
+
+
+def record_change(instance, deleted=False):
+    """Tăng Match.version và ghi MatchChange cho đối tượng vừa lưu/xóa. Trả về phiên bản mới."""
+    kind = KIND_BY_MODEL[type(instance)]
+    data = {'id': instance.pk} if deleted else serialize(instance)
+    with transaction.atomic():
+        # UPDATE giữ khóa dòng của trận tới hết transaction nên đọc lại phiên bản là an toàn
+        if not Match.objects.filter(pk=instance.match_id).update(version=F('version') + 1):
+            return None
+        version = Match.objects.filter(pk=instance.match_id).values_list('version', flat=True).get()
+        MatchChange.objects.create(
+            match_id=instance.match_id, version=version, kind=kind,
+            object_id=instance.pk, deleted=deleted, data=data,
+        )
+    return version
+
+
+def _snapshot(match):
+    """Toàn bộ diễn biến hiện tại (dùng cho lần tải đầu hoặc khi phiên bản phía client không hợp lệ)."""
+    querysets = {
+        MatchChange.Kind.GOAL: match.goals.select_related('player', 'team'),
+        MatchChange.Kind.CARD: match.cards.select_related('player', 'team'),
+        MatchChange.Kind.SUBSTITUTION: match.substitutions.select_related('player_in', 'player_out', 'team'),
+        MatchChange.Kind.MATCH_EVENT: match.events.all(),
+        MatchChange.Kind.LINEUP: match.lineups.all(),
+    }
+    return [
+        {'kind': kind, 'deleted': False, 'data': serialize(instance)}
+        for kind, queryset in querysets.items()
+        for instance in queryset
+    ]
+
+
+def changes_since(match, since):
+    """
+    Trả về dict: version, full (True nếu là toàn bộ diễn biến), changes, scores.
+    `match` phải được lấy từ database trong request này (để có version hiện tại).
+    """
+    full = since is None or since < 0 or since > match.version
+    if full:
+        changes = _snapshot(match)
+    elif since == match.version:
+        changes = []
+    else:
+        changes = [
+            {'version': version, 'kind': kind, 'deleted': deleted, 'data': data}
+            for version, kind, deleted, data in MatchChange.objects.filter(
+                match=match, version__gt=since
+            ).values_list('version', 'kind', 'deleted', 'data')
+        ]
+    return {
+        'version': match.version,
+        'full': full,
+        'changes': changes,
+        'scores': {'team1_score': match.team1_score, 'team2_score': match.team2_score},
+    }
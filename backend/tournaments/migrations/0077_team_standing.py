@@ -0,0 +1,40 @@
+# Generated by Django 4.2.13 on 2026-10-18 00:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0076_alter_tournament_shop_discount_percentage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.IntegerField(default=0, verbose_name='Số trận')),
+                ('wins', models.IntegerField(default=0, verbose_name='Thắng')),
+                ('draws', models.IntegerField(default=0, verbose_name='Hòa')),
+                ('losses', models.IntegerField(default=0, verbose_name='Thua')),
+                ('goals_for', models.IntegerField(default=0, verbose_name='Bàn thắng')),
+                ('goals_against', models.IntegerField(default=0, verbose_name='Bàn thua')),
+                ('points', models.IntegerField(default=0, verbose_name='Điểm')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='standings', to='tournaments.group', verbose_name='Bảng đấu')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.team', verbose_name='Đội')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.tournament', verbose_name='Giải đấu')),
+            ],
+            options={
+                'verbose_name': 'Bảng xếp hạng',
+                'verbose_name_plural': 'Bảng xếp hạng',
+                'indexes': [models.Index(fields=['tournament', 'group'], name='tournaments_tournam_646652_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='teamstanding',
+            constraint=models.UniqueConstraint(fields=('tournament', 'team'), name='uniq_standing_team_in_tournament'),
+        ),
+    ]
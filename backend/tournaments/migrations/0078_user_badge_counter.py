@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-18 00:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tournaments', '0077_team_standing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBadgeCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='badge_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_notifications', models.IntegerField(default=0, verbose_name='Thông báo chưa đọc')),
+                ('unread_announcements', models.IntegerField(default=0, verbose_name='Tin tức chưa đọc')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Bộ đếm chưa đọc',
+                'verbose_name_plural': 'Bộ đếm chưa đọc',
+            },
+        ),
+    ]
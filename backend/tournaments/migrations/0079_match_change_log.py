@@ -0,0 +1,41 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0078_user_badge_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Phiên bản diễn biến'),
+        ),
+        migrations.CreateModel(
+            name='MatchChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='Phiên bản')),
+                ('kind', models.CharField(choices=[('goal', 'Bàn thắng'), ('card', 'Thẻ phạt'), ('substitution', 'Thay người'), ('match_event', 'Sự kiện trận'), ('lineup', 'Đội hình')], max_length=20, verbose_name='Loại')),
+                ('object_id', models.PositiveIntegerField()),
+                ('deleted', models.BooleanField(default=False, verbose_name='Đã xóa')),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='tournaments.match')),
+            ],
+            options={
+                'verbose_name': 'Thay đổi diễn biến trận',
+                'verbose_name_plural': 'Các thay đổi diễn biến trận',
+                'ordering': ['version'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='matchchange',
+            constraint=models.UniqueConstraint(fields=('match', 'version'), name='unique_match_change_version'),
+        ),
+    ]
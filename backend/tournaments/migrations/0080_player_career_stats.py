@@ -0,0 +1,42 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0079_match_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerCareerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('goals', models.IntegerField(default=0, verbose_name='Bàn thắng')),
+                ('own_goals', models.IntegerField(default=0, verbose_name='Bàn phản lưới')),
+                ('yellow_cards', models.IntegerField(default=0, verbose_name='Thẻ vàng')),
+                ('red_cards', models.IntegerField(default=0, verbose_name='Thẻ đỏ')),
+                ('matches_played', models.IntegerField(default=0, verbose_name='Số trận')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_stats', to='tournaments.player', verbose_name='Cầu thủ')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tournaments.team', verbose_name='Đội')),
+                ('tournament', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='tournaments.tournament', verbose_name='Giải đấu')),
+            ],
+            options={
+                'verbose_name': 'Thống kê cầu thủ',
+                'verbose_name_plural': 'Thống kê cầu thủ',
+                'indexes': [models.Index(fields=['tournament', '-goals'], name='player_stats_top_scorer'), models.Index(fields=['tournament', '-matches_played'], name='player_stats_most_played')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='playercareerstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('tournament__isnull', False)), fields=('player', 'tournament'), name='uniq_player_stats_in_tournament'),
+        ),
+        migrations.AddConstraint(
+            model_name='playercareerstats',
+            constraint=models.UniqueConstraint(condition=models.Q(('tournament__isnull', True)), fields=('player',), name='uniq_player_career_stats'),
+        ),
+    ]
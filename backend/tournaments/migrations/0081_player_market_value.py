@@ -0,0 +1,34 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0080_player_career_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteValueState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveIntegerField(verbose_name='Giá trị một phiếu bầu (VNĐ)')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Phiên bản')),
+                ('user_count', models.PositiveIntegerField(default=0, verbose_name='Số người dùng khi tính')),
+                ('min_user_count', models.PositiveIntegerField(default=0)),
+                ('next_user_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Giá trị phiếu bầu',
+                'verbose_name_plural': 'Giá trị phiếu bầu',
+            },
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='market_value',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False, verbose_name='Giá trị thị trường (VNĐ)'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0081_player_market_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['full_name', 'id'], name='player_name_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-votes', '-id'], name='player_votes_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='playertransfer',
+            index=models.Index(fields=['status', '-updated_at', '-id'], name='transfer_history_keyset'),
+        ),
+    ]
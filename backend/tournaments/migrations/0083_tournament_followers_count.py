@@ -0,0 +1,35 @@
+# Generated by Django 4.2.13 on 2026-10-18 01:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_followers_count(apps, schema_editor):
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    Follow = Tournament.followers.through
+    counts = (
+        Follow.objects.filter(tournament_id=OuterRef('pk'))
+        .order_by().values('tournament_id').annotate(total=Count('pk')).values('total')
+    )
+    Tournament.objects.update(followers_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0082_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Số người theo dõi'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['-followers_count', '-start_date'], name='tournament_followers_rank'),
+        ),
+        migrations.RunPython(fill_followers_count, migrations.RunPython.noop),
+    ]
@@ -65,114 +65,58 @@ class Tournament(models.Model):
         help_text="Dán đường link chia sẻ của album ảnh Google Drive hoặc Google Photos tại đây."
     )
     followers = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='followed_tournaments', blank=True, verbose_name="Người theo dõi")
+    # Số người theo dõi, cập nhật khi theo dõi/bỏ theo dõi (xem signals.py) để trang chủ xếp hạng không cần COUNT
+    followers_count = models.PositiveIntegerField("Số người theo dõi", default=0, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["-followers_count", "-start_date"], name="tournament_followers_rank")]
+
     def __str__(self):
         return self.name
 
     def get_absolute_url(self):
         return reverse('tournament_detail', kwargs={'pk': self.pk})
     
+    def _shop_quote(self, cart_items=None, org_cart_items=None):
+        """Tính giảm giá/tồn kho cho các dòng giỏ hàng đã có (xem shop_pricing.py)"""
+        from .shop_pricing import MAIN_SHOP, ORGANIZATION_SHOP, cart_lines, quote, rules_for
+
+        lines, stock = cart_lines(MAIN_SHOP, cart_items or [])
+        org_lines, org_stock = cart_lines(ORGANIZATION_SHOP, org_cart_items or [])
+        return quote(rules_for(self), lines + org_lines, {**stock, **org_stock})
+
     def calculate_shop_discount(self, cart_items):
         """
         Tính toán số tiền giảm giá từ tiền lãi của sản phẩm trong cart (Global Shop)
         """
-        if self.shop_discount_percentage <= 0:
-            return 0
-        
-        total_profit = 0
-        for item in cart_items:
-            # Kiểm tra tồn kho trước khi tính discount
-            if item.product.stock_quantity < item.quantity:
-                # Không đủ hàng, không tính discount cho item này
-                continue
-                
-            if item.product.cost_price:
-                profit_per_item = item.product.profit_amount
-                total_profit += profit_per_item * item.quantity
-        
-        # Tính phần trăm tiền lãi được trừ vào phí đăng ký
-        from decimal import Decimal
-        discount_amount = total_profit * (Decimal(self.shop_discount_percentage) / Decimal(100))
-        # Giới hạn giảm giá tối đa bằng phí đăng ký
-        max_discount = self.registration_fee
-        return min(discount_amount, max_discount)
+        return self._shop_quote(cart_items=cart_items).main.discount
     
     def calculate_organization_shop_discount(self, org_cart_items):
         """
         Tính toán số tiền giảm giá từ tiền lãi của sản phẩm trong Organization Shop cart
         """
-        if self.shop_discount_percentage <= 0:
-            return 0
-        
-        # Chỉ tính khuyến mãi nếu cart thuộc về cùng organization với tournament
-        if not self.organization:
-            return 0
-        
-        total_profit = 0
-        for item in org_cart_items:
-            # Kiểm tra item thuộc về cùng organization
-            if item.product.organization == self.organization and item.product.cost_price:
-                # Kiểm tra tồn kho trước khi tính discount
-                if item.product.stock_quantity < item.quantity:
-                    # Không đủ hàng, không tính discount cho item này
-                    continue
-                    
-                profit_per_item = item.product.profit_amount
-                total_profit += profit_per_item * item.quantity
-        
-        # Tính phần trăm tiền lãi được trừ vào phí đăng ký
-        from decimal import Decimal
-        discount_amount = total_profit * (Decimal(self.shop_discount_percentage) / Decimal(100))
-        # Giới hạn giảm giá tối đa bằng phí đăng ký
-        max_discount = self.registration_fee
-        return min(discount_amount, max_discount)
+        return self._shop_quote(org_cart_items=org_cart_items).organization.discount
     
     def get_final_registration_fee(self, cart_items=None, org_cart_items=None):
         """
         Tính phí đăng ký cuối cùng sau khi trừ giảm giá từ shop
         Hỗ trợ cả Global Shop và Organization Shop
         """
-        discount = 0
-        
-        # Tính khuyến mãi từ Global Shop
-        if cart_items:
-            discount += self.calculate_shop_discount(cart_items)
-        
-        # Tính khuyến mãi từ Organization Shop
-        if org_cart_items:
-            discount += self.calculate_organization_shop_discount(org_cart_items)
-        
-        final_fee = self.registration_fee - discount
-        return max(final_fee, 0)  # Không âm
+        return self._shop_quote(cart_items, org_cart_items).final_fee
     
     def check_cart_stock_availability(self, cart_items):
         """
         Kiểm tra tồn kho của các sản phẩm trong cart
         Trả về danh sách các sản phẩm không đủ hàng
         """
-        unavailable_items = []
-        for item in cart_items:
-            if item.product.stock_quantity < item.quantity:
-                unavailable_items.append({
-                    'product': item.product,
-                    'requested': item.quantity,
-                    'available': item.product.stock_quantity
-                })
-        return unavailable_items
+        return self._shop_quote(cart_items=cart_items).unavailable_items
     
     def check_org_cart_stock_availability(self, org_cart_items):
         """
         Kiểm tra tồn kho của các sản phẩm trong Organization cart
         Trả về danh sách các sản phẩm không đủ hàng
         """
-        unavailable_items = []
-        for item in org_cart_items:
-            if item.product.stock_quantity < item.quantity:
-                unavailable_items.append({
-                    'product': item.product,
-                    'requested': item.quantity,
-                    'available': item.product.stock_quantity
-                })
-        return unavailable_items
+        return self._shop_quote(org_cart_items=org_cart_items).unavailable_items
     
     def has_organization_shop(self):
         """
@@ -205,38 +149,10 @@ class Group(models.Model):
 
     def get_standings(self):
         """
-        Tính toán và trả về bảng xếp hạng cho bảng đấu này.
+        Trả về bảng xếp hạng cho bảng đấu này (đọc từ bảng TeamStanding đã tổng hợp sẵn).
         """
-        from .models import Team  # Import model Team để tránh lỗi circular import
-        standings = {}
-        # Lấy danh sách các đội thuộc bảng đấu này thông qua model TeamRegistration
-        teams_in_group = Team.objects.filter(registrations__group=self)
-        for team in teams_in_group:
-            standings[team.id] = {'played': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'gf': 0, 'ga': 0, 'gd': 0, 'points': 0, 'team_obj': team}
-        matches_in_group = self.tournament.matches.filter(
-            team1__in=teams_in_group, team2__in=teams_in_group,
-            team1_score__isnull=False, team2_score__isnull=False
-        )
-        for match in matches_in_group:
-            team1_id, team2_id, score1, score2 = match.team1.id, match.team2.id, match.team1_score, match.team2_score
-            if team1_id in standings and team2_id in standings:
-                standings[team1_id]['played'] += 1; standings[team2_id]['played'] += 1
-                standings[team1_id]['gf'] += score1; standings[team1_id]['ga'] += score2
-                standings[team2_id]['gf'] += score2; standings[team2_id]['ga'] += score1
-                if score1 > score2:
-                    standings[team1_id]['wins'] += 1; standings[team1_id]['points'] += 3
-                    standings[team2_id]['losses'] += 1
-                elif score2 > score1:
-                    standings[team2_id]['wins'] += 1; standings[team2_id]['points'] += 3
-                    standings[team1_id]['losses'] += 1
-                else:
-                    standings[team1_id]['draws'] += 1; standings[team1_id]['points'] += 1
-                    standings[team2_id]['draws'] += 1; standings[team2_id]['points'] += 1
-        sorted_standings = list(standings.values())
-        for stats in sorted_standings:
-            stats['gd'] = stats['gf'] - stats['ga']
-        sorted_standings.sort(key=lambda x: (x['points'], x['gd'], x['gf']), reverse=True)
-        return sorted_standings
+        from .standings import get_group_standings  # Tránh lỗi circular import
+        return get_group_standings(self)
 
 class Team(models.Model):
     PAYMENT_STATUS_CHOICES = [('UNPAID', 'Chưa thanh toán'), ('PENDING', 'Chờ xác nhận'), ('PAID', 'Đã thanh toán'), ('REJECTED', 'Từ chối')]
@@ -299,6 +215,25 @@ class Team(models.Model):
         new_image = ContentFile(buffer.getvalue(), name=file_name)
         return new_image
 
+class VoteValueState(models.Model):
+    """
+    Giá trị hiện tại của một phiếu bầu (một dòng duy nhất, xem tournaments/valuation.py).
+    Được tính lại khi số người dùng ra khỏi khoảng [min_user_count, next_user_count).
+    """
+    value = models.PositiveIntegerField("Giá trị một phiếu bầu (VNĐ)")
+    version = models.PositiveIntegerField("Phiên bản", default=1)
+    user_count = models.PositiveIntegerField("Số người dùng khi tính", default=0)
+    min_user_count = models.PositiveIntegerField(default=0)
+    next_user_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Giá trị phiếu bầu"
+        verbose_name_plural = "Giá trị phiếu bầu"
+
+    def __str__(self):
+        return f"1 phiếu = {self.value} (v{self.version})"
+
 class Player(models.Model):
     FOOT_CHOICES = [('RIGHT', 'Phải'), ('LEFT', 'Trái'), ('BOTH', 'Cả hai')]
     POSITION_CHOICES = [('GK', 'Thủ môn'), ('DF', 'Hậu vệ'), ('MF', 'Tiền vệ'), ('FW', 'Tiền đạo')]
@@ -316,6 +251,8 @@ class Player(models.Model):
     specialty_position = models.CharField("Vị trí sở trường", max_length=100, blank=True, help_text="Ví dụ: Tiền đạo cắm, Hậu vệ cánh trái...")
     agent_contact = models.CharField("Thông tin liên hệ (đại diện)", max_length=200, blank=True, help_text="Số điện thoại hoặc email của người đại diện.")
     votes = models.PositiveIntegerField("Số phiếu bình chọn", default=0)
+    # transfer_value + votes * giá trị phiếu bầu hiện tại, cập nhật trong save() và tournaments/valuation.py
+    market_value = models.PositiveBigIntegerField("Giá trị thị trường (VNĐ)", default=0, db_index=True, editable=False)
     edit_count = models.PositiveIntegerField("Số lần chỉnh sửa", default=0, editable=False)
 
     # === THÊM 2 TRƯỜNG MỚI VÀO ĐÂY ===
@@ -361,6 +298,11 @@ class Player(models.Model):
             models.UniqueConstraint(fields=["team", "jersey_number"], name="uniq_jersey_per_team"),
             models.CheckConstraint(check=Q(jersey_number__gte=1) & Q(jersey_number__lte=99), name="jersey_between_1_99"),
         ]
+        # Phân trang theo khóa trên thị trường chuyển nhượng (market_value đã có db_index)
+        indexes = [
+            models.Index(fields=["full_name", "id"], name="player_name_keyset"),
+            models.Index(fields=["-votes", "-id"], name="player_votes_keyset"),
+        ]
 
     def __str__(self):
         return f"{self.full_name} (#{self.jersey_number})"
@@ -378,9 +320,22 @@ class Player(models.Model):
                 # === SỬA LỖI TẠI ĐÂY ===
                 file_name = os.path.basename(self.avatar.name)
                 self.avatar = ContentFile(buffer.getvalue(), name=file_name)
-        
+
+        from .valuation import get_vote_value, market_value_expression
+        vote_value = get_vote_value()
+        # votes/transfer_value có thể là biểu thức F() (cộng phiếu nguyên tử): tính lại sau khi lưu
+        has_expression = any(hasattr(value, 'resolve_expression') for value in (self.votes, self.transfer_value))
+        if not has_expression:
+            self.market_value = self.transfer_value + self.votes * vote_value
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'votes', 'transfer_value'} & set(update_fields):
+                kwargs['update_fields'] = set(update_fields) | {'market_value'}
+
         super().save(*args, **kwargs)
 
+        if has_expression:
+            Player.objects.filter(pk=self.pk).update(market_value=market_value_expression(vote_value))
+
     def clean(self):
         if self.team_id and self.jersey_number is not None:
             exists = Player.objects.filter(team_id=self.team_id, jersey_number=self.jersey_number)
@@ -416,6 +371,8 @@ class Match(models.Model):
     # League metadata
     round_number = models.PositiveIntegerField("Vòng", null=True, blank=True)
     leg = models.PositiveSmallIntegerField("Lượt", null=True, blank=True, help_text="1 = lượt đi, 2 = lượt về")
+    # Tăng mỗi khi bàn thắng/thẻ/thay người/sự kiện/đội hình thay đổi (xem tournaments/match_sync.py)
+    version = models.PositiveIntegerField("Phiên bản diễn biến", default=0, editable=False)
     # === BẮT ĐẦU THÊM 2 TRƯỜNG MỚI TẠI ĐÂY ===
     cover_photo = models.ImageField(
         "Ảnh bìa trận đấu",
@@ -434,6 +391,16 @@ class Match(models.Model):
     def get_absolute_url(self):
         return reverse("match_detail", kwargs={"pk": self.pk})
 
+    def save(self, *args, **kwargs):
+        # version chỉ được tăng bằng UPDATE nguyên tử (match_sync.record_change);
+        # không ghi đè bằng giá trị cũ đang nằm trong bộ nhớ khi lưu trận.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'version'
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.team1.name} vs {self.team2.name}"
 
@@ -536,6 +503,83 @@ class Card(models.Model):
     def __str__(self):
         return f"{self.get_card_type_display()} for {self.player.full_name} in {self.match}"
 
+class TeamStanding(models.Model):
+    """
+    Bảng xếp hạng đã được tổng hợp sẵn: mỗi dòng là thành tích của một đội trong một giải.
+    Được cập nhật dần qua signal của Match (xem tournaments/standings.py),
+    có thể tính lại từ đầu bằng lệnh `python manage.py rebuild_standings`.
+    """
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='standings', verbose_name="Giải đấu")
+    group = models.ForeignKey(Group, on_delete=models.SET_NULL, null=True, blank=True, related_name='standings', verbose_name="Bảng đấu")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='standings', verbose_name="Đội")
+    played = models.IntegerField("Số trận", default=0)
+    wins = models.IntegerField("Thắng", default=0)
+    draws = models.IntegerField("Hòa", default=0)
+    losses = models.IntegerField("Thua", default=0)
+    goals_for = models.IntegerField("Bàn thắng", default=0)
+    goals_against = models.IntegerField("Bàn thua", default=0)
+    points = models.IntegerField("Điểm", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["tournament", "team"], name="uniq_standing_team_in_tournament")]
+        indexes = [models.Index(fields=["tournament", "group"])]
+        verbose_name = "Bảng xếp hạng"
+        verbose_name_plural = "Bảng xếp hạng"
+
+    def __str__(self):
+        return f"{self.team} @ {self.tournament}: {self.points} điểm"
+
+    @property
+    def goal_difference(self):
+        return self.goals_for - self.goals_against
+
+    def as_dict(self):
+        """Định dạng dict mà các template/BXH cũ đang sử dụng."""
+        return {
+            'played': self.played, 'wins': self.wins, 'draws': self.draws, 'losses': self.losses,
+            'gf': self.goals_for, 'ga': self.goals_against, 'gd': self.goal_difference,
+            'points': self.points,
+        }
+
+class PlayerCareerStats(models.Model):
+    """
+    Thống kê cầu thủ đã được tổng hợp sẵn: dòng có `tournament` là thành tích trong
+    một giải, dòng không có `tournament` là tổng sự nghiệp.
+    Được cập nhật dần qua signal của Goal/Card/Lineup (xem tournaments/career_stats.py),
+    có thể tính lại từ đầu bằng lệnh `python manage.py rebuild_player_stats`.
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='career_stats', verbose_name="Cầu thủ")
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, null=True, blank=True, related_name='player_stats', verbose_name="Giải đấu")
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Đội")
+    goals = models.IntegerField("Bàn thắng", default=0)
+    own_goals = models.IntegerField("Bàn phản lưới", default=0)
+    yellow_cards = models.IntegerField("Thẻ vàng", default=0)
+    red_cards = models.IntegerField("Thẻ đỏ", default=0)
+    matches_played = models.IntegerField("Số trận", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["player", "tournament"], condition=Q(tournament__isnull=False),
+                name="uniq_player_stats_in_tournament",
+            ),
+            models.UniqueConstraint(
+                fields=["player"], condition=Q(tournament__isnull=True),
+                name="uniq_player_career_stats",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["tournament", "-goals"], name="player_stats_top_scorer"),
+            models.Index(fields=["tournament", "-matches_played"], name="player_stats_most_played"),
+        ]
+        verbose_name = "Thống kê cầu thủ"
+        verbose_name_plural = "Thống kê cầu thủ"
+
+    def __str__(self):
+        return f"{self.player} @ {self.tournament or 'Sự nghiệp'}: {self.goals} bàn"
+
 class HomeBanner(models.Model):
     title = models.CharField(max_length=120)
     subtitle = models.CharField(max_length=200, blank=True)
@@ -616,6 +660,40 @@ class TournamentPhoto(models.Model):
 
         super().save(*args, **kwargs)
 
+class NotificationQuerySet(models.QuerySet):
+    """
+    bulk_create/update/delete không gửi signal, nên tự cập nhật bộ đếm
+    thông báo chưa đọc (UserBadgeCounter) của những người dùng bị ảnh hưởng.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .unread_counters import add_notifications, recount_notifications
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+            # Không biết dòng nào thực sự được chèn -> đếm lại
+            recount_notifications({obj.user_id for obj in objs})
+        else:
+            add_notifications([obj.user_id for obj in objs if not obj.is_read])
+        return objs
+
+    def update(self, **kwargs):
+        from .unread_counters import recount_notifications
+
+        user_ids = set(self.values_list('user_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        recount_notifications(user_ids)
+        return rows
+
+    def delete(self):
+        from .unread_counters import recount_notifications
+
+        user_ids = set(self.values_list('user_id', flat=True).distinct())
+        result = super().delete()
+        recount_notifications(user_ids)
+        return result
+
+
 # === BẮT ĐẦU THÊM MODEL MỚI ===
 class Notification(models.Model):
     """
@@ -649,6 +727,8 @@ class Notification(models.Model):
     related_player = models.ForeignKey('Player', on_delete=models.CASCADE, null=True, blank=True, related_name='claim_notifications')
     related_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='claim_request_notifications')
 
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         # === BẮT ĐẦU THÊM MỚI ===
@@ -660,6 +740,26 @@ class Notification(models.Model):
     def __str__(self):
         return f"Thông báo cho {self.user.username}: {self.title}"
 
+
+class UserBadgeCounter(models.Model):
+    """
+    Bộ đếm "chưa đọc" của từng người dùng (badge trên thanh điều hướng).
+    Được cập nhật khi thông báo/tin tức thay đổi (xem tournaments/unread_counters.py),
+    nên hiển thị badge chỉ cần đọc một dòng theo khóa chính thay vì COUNT(*).
+    Lệnh `reconcile_unread_counters` tính lại từ dữ liệu gốc để sửa sai lệch.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='badge_counter')
+    unread_notifications = models.IntegerField("Thông báo chưa đọc", default=0)
+    unread_announcements = models.IntegerField("Tin tức chưa đọc", default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Bộ đếm chưa đọc"
+        verbose_name_plural = "Bộ đếm chưa đọc"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_notifications} thông báo, {self.unread_announcements} tin tức"
+
 # === THÊM MODEL MỚI VÀO CUỐI FILE ===
 class TeamAchievement(models.Model):
     """
@@ -750,6 +850,36 @@ class MatchEvent(models.Model):
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.match}"        
 
+class MatchChange(models.Model):
+    """
+    Nhật ký thay đổi diễn biến của trận theo phiên bản (Match.version).
+    Phòng điều khiển chỉ cần lấy các dòng có version lớn hơn phiên bản đã có.
+    """
+    class Kind(models.TextChoices):
+        GOAL = 'goal', 'Bàn thắng'
+        CARD = 'card', 'Thẻ phạt'
+        SUBSTITUTION = 'substitution', 'Thay người'
+        MATCH_EVENT = 'match_event', 'Sự kiện trận'
+        LINEUP = 'lineup', 'Đội hình'
+
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='changes')
+    version = models.PositiveIntegerField("Phiên bản")
+    kind = models.CharField("Loại", max_length=20, choices=Kind.choices)
+    object_id = models.PositiveIntegerField()
+    deleted = models.BooleanField("Đã xóa", default=False)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['version']
+        constraints = [models.UniqueConstraint(fields=['match', 'version'], name='unique_match_change_version')]
+        verbose_name = "Thay đổi diễn biến trận"
+        verbose_name_plural = "Các thay đổi diễn biến trận"
+
+    def __str__(self):
+        return f"{self.match_id} v{self.version}: {self.kind} #{self.object_id}{' (xóa)' if self.deleted else ''}"
+
+
 class VoteRecord(models.Model):
     """Lưu lại lịch sử một lượt bỏ phiếu để đảm bảo minh bạch và chống gian lận."""
     voter = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='votes_cast', verbose_name="Người bỏ phiếu")
@@ -929,6 +1059,9 @@ class PlayerTransfer(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=["status", "-updated_at", "-id"], name="transfer_history_keyset"),
+        ]
         verbose_name = "Lời mời Chuyển nhượng"
         verbose_name_plural = "Các lời mời Chuyển nhượng"
 
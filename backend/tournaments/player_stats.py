@@ -0,0 +1,157 @@
+# backend/tournaments/player_stats.py
+"""
+Thống kê từng cầu thủ trong từng trận (stat line): bàn thắng, phản lưới, thẻ vàng,
+thẻ đỏ và số phút thi đấu.
+
+Bàn thắng và thẻ được đếm bằng truy vấn GROUP BY theo cầu thủ (một truy vấn cho
+Goal, một cho Card), số phút tính từ danh sách thay người và thẻ đỏ. Số truy vấn
+vì vậy không phụ thuộc số cầu thủ trong đội hình.
+
+Dùng cho trang chi tiết trận, trang in biên bản trận và hồ sơ cầu thủ.
+"""
+
+from django.db.models import Count, Q
+
+from .models import Card, Goal, Lineup, Substitution
+
+MATCH_MINUTES = 90  # Thời lượng tính phút thi đấu khi trận không có phút kết thúc riêng
+
+_STAT_FIELDS = ('goals', 'own_goals', 'yellow_cards', 'red_cards')
+
+
+def _empty_line():
+    return dict.fromkeys(_STAT_FIELDS, 0)
+
+
+def _count_events(goals, cards, key):
+    """
+    Đếm bàn thắng/thẻ theo `key` ('player_id' hoặc 'match_id').
+    Trả về dict: giá trị key -> dict các chỉ số.
+    """
+    lines = {}
+    for row in goals.values(key).annotate(
+        goals=Count('id', filter=Q(is_own_goal=False)),
+        own_goals=Count('id', filter=Q(is_own_goal=True)),
+    ).order_by():
+        lines.setdefault(row[key], _empty_line()).update(goals=row['goals'], own_goals=row['own_goals'])
+    for row in cards.values(key).annotate(
+        yellow_cards=Count('id', filter=Q(card_type='YELLOW')),
+        red_cards=Count('id', filter=Q(card_type='RED')),
+    ).order_by():
+        lines.setdefault(row[key], _empty_line()).update(yellow_cards=row['yellow_cards'], red_cards=row['red_cards'])
+    return lines
+
+
+def minutes_played(status, sub_in_minute=None, sub_out_minute=None, red_card_minute=None, subbed_in=False):
+    """
+    Số phút thi đấu của một cầu thủ trong trận.
+    Cầu thủ dự bị chưa vào sân: 0. Phút vào/ra không rõ được coi là đầu/cuối trận.
+    """
+    if status != 'STARTER' and not subbed_in:
+        return 0
+    start = (sub_in_minute or 0) if status != 'STARTER' else 0
+    end = MATCH_MINUTES
+    for minute in (sub_out_minute, red_card_minute):
+        if minute is not None:
+            end = min(end, minute)
+    return max(min(end, MATCH_MINUTES) - min(start, MATCH_MINUTES), 0)
+
+
+def _match_minutes(match_id_filter, player_filter=None):
+    """
+    Phút vào sân, rời sân và nhận thẻ đỏ theo (match_id, player_id).
+    Trả về ba dict: subbed_in, subbed_out, sent_off.
+    """
+    substitutions = Substitution.objects.filter(**match_id_filter)
+    red_cards = Card.objects.filter(card_type='RED', **match_id_filter)
+    if player_filter is not None:
+        substitutions = substitutions.filter(Q(player_in=player_filter) | Q(player_out=player_filter))
+        red_cards = red_cards.filter(player=player_filter)
+
+    subbed_in, subbed_out, sent_off = {}, {}, {}
+    for match_id, player_in_id, player_out_id, minute in substitutions.values_list(
+        'match_id', 'player_in_id', 'player_out_id', 'minute'
+    ):
+        subbed_in.setdefault((match_id, player_in_id), minute)
+        subbed_out.setdefault((match_id, player_out_id), minute)
+    for match_id, player_id, minute in red_cards.values_list('match_id', 'player_id', 'minute'):
+        sent_off.setdefault((match_id, player_id), minute)
+    return subbed_in, subbed_out, sent_off
+
+
+def _minutes_for(match_id, player_id, status, subbed_in, subbed_out, sent_off):
+    key = (match_id, player_id)
+    return minutes_played(
+        status,
+        sub_in_minute=subbed_in.get(key),
+        sub_out_minute=subbed_out.get(key),
+        red_card_minute=sent_off.get(key),
+        subbed_in=key in subbed_in,
+    )
+
+
+def match_stat_lines(match):
+    """
+    Đội hình hai đội kèm thống kê của từng cầu thủ trong trận.
+
+    Trả về dict: team_id -> {'starters': [...], 'substitutes': [...]}, mỗi phần tử là
+    dict: player, lineup, status (tên hiển thị), is_captain, goals, own_goals,
+    yellow_cards, red_cards, minutes (None nếu trận chưa có kết quả).
+    """
+    lineups = list(
+        Lineup.objects.filter(match=match).select_related('player').order_by('player__jersey_number', 'pk')
+    )
+    counts = _count_events(Goal.objects.filter(match=match), Card.objects.filter(match=match), 'player_id')
+    has_result = match.team1_score is not None and match.team2_score is not None
+    if has_result:
+        subbed_in, subbed_out, sent_off = _match_minutes({'match_id': match.pk})
+
+    captains = {match.team1_id: match.team1.captain_id, match.team2_id: match.team2.captain_id}
+    teams = {team_id: {'starters': [], 'substitutes': []} for team_id in captains}
+    for entry in lineups:
+        player = entry.player
+        line = {
+            'player': player,
+            'lineup': entry,
+            'status': entry.get_status_display(),
+            'is_captain': bool(player.user_id) and player.user_id == captains.get(entry.team_id),
+            **counts.get(player.pk, _empty_line()),
+            'minutes': (
+                _minutes_for(match.pk, player.pk, entry.status, subbed_in, subbed_out, sent_off)
+                if has_result else None
+            ),
+        }
+        group = 'starters' if entry.status == 'STARTER' else 'substitutes'
+        teams.setdefault(entry.team_id, {'starters': [], 'substitutes': []})[group].append(line)
+    return teams
+
+
+def player_match_lines(player, matches):
+    """
+    Thống kê của `player` trong từng trận của `matches` (các trận cầu thủ có tên trong đội hình).
+
+    Trả về list dict theo thứ tự của `matches`: match, goals, own_goals, yellow_cards,
+    red_cards, minutes (None nếu trận chưa có kết quả).
+    """
+    matches = list(matches)
+    match_ids = [match.pk for match in matches]
+    counts = _count_events(
+        Goal.objects.filter(player=player, match_id__in=match_ids),
+        Card.objects.filter(player=player, match_id__in=match_ids),
+        'match_id',
+    )
+    statuses = dict(Lineup.objects.filter(player=player, match_id__in=match_ids).values_list('match_id', 'status'))
+    subbed_in, subbed_out, sent_off = _match_minutes({'match_id__in': match_ids}, player_filter=player)
+
+    lines = []
+    for match in matches:
+        has_result = match.team1_score is not None and match.team2_score is not None
+        lines.append({
+            'match': match,
+            **counts.get(match.pk, _empty_line()),
+            'minutes': (
+                _minutes_for(match.pk, player.pk, statuses.get(match.pk), subbed_in, subbed_out, sent_off)
+                if has_result else None
+            ),
+        })
+    return lines
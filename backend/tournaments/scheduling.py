@@ -0,0 +1,331 @@
+# backend/tournaments/scheduling.py
+"""
+Bộ máy xếp lịch thi đấu vòng tròn (vòng bảng / league).
+
+Module thuần Python, không truy vấn database: nhận danh sách đội (ID) theo bảng
+và các ràng buộc, trả về lịch đã xếp + các cặp chưa xếp được.
+
+1. Cặp đấu được sinh bằng phương pháp vòng tròn (circle method): mỗi vòng mọi đội
+   đá đúng một trận (hoặc được nghỉ nếu số đội lẻ), chủ/khách được luân phiên;
+   lượt về là lượt đi đảo chủ/khách.
+2. Xếp tham lam theo từng ngày/khung giờ/sân với các bộ đếm đánh chỉ mục theo
+   tuần (tổng trận, trận mỗi đội, trận mỗi bảng) và ngày thi đấu của từng đội,
+   nên mỗi lần kiểm tra ràng buộc là O(log n) thay vì duyệt lại cả lịch.
+3. (Tùy chọn) Bước tối ưu cục bộ: với mỗi cặp chưa xếp được, thử chèn vào các
+   slot còn trống; nếu không được thì thử dời một trận đang chiếm slot sang slot
+   trống khác để nhường chỗ (quay lui một bước).
+
+Ví dụ:
+    fixtures = build_fixtures({'A': ('Bảng A', [1, 2, 3, 4])}, legs=2)
+    result = ScheduleEngine(constraints).generate(fixtures)
+"""
+
+import bisect
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Hashable, List, Optional, Sequence, Set
+
+
+@dataclass(frozen=True)
+class Fixture:
+    """Một cặp đấu cần xếp lịch."""
+    group_key: Hashable
+    group_name: str
+    team1_id: int
+    team2_id: int
+    leg: int = 1
+    pairing_round: int = 1  # Vòng theo phương pháp vòng tròn (để ưu tiên thứ tự xếp)
+
+
+@dataclass
+class ScheduledMatch:
+    fixture: Fixture
+    match_time: datetime
+    location: str
+    round_number: int = 0  # Vòng hiển thị: đánh số theo ngày thi đấu trong từng bảng
+
+
+@dataclass
+class ScheduleConstraints:
+    start_date: date
+    weekdays: Set[int]
+    time_slots: Sequence[time]
+    locations: Sequence[str]
+    rest_days: int = 1
+    matches_per_week: Optional[int] = None
+    max_matches_per_team_per_week: Optional[int] = None
+    group_limits: Dict[str, int] = field(default_factory=dict)  # Tên bảng -> số trận tối đa mỗi tuần
+    strategy: str = 'PRIORITIZED'  # PRIORITIZED: theo thứ tự bảng; khác: trộn ngẫu nhiên mỗi slot
+    horizon_days: int = 365
+
+
+@dataclass
+class ScheduleResult:
+    scheduled: List[ScheduledMatch]
+    unscheduled: List[Fixture]
+
+
+def parse_time_slots(time_slots_str):
+    """['08:00', ' 9:30'] -> [time(8, 0), time(9, 30)] (bỏ qua giá trị không hợp lệ)."""
+    slots = []
+    for value in time_slots_str:
+        try:
+            hour, minute = value.strip().split(':')[:2]
+            slots.append(time.fromisoformat(f"{hour.zfill(2)}:{minute}"))
+        except ValueError:
+            continue
+    return slots
+
+
+def round_robin_rounds(team_ids, legs=1):
+    """
+    Sinh các vòng đấu theo phương pháp vòng tròn.
+    Trả về list các vòng, mỗi vòng là list (đội chủ nhà, đội khách, lượt).
+    """
+    teams = list(team_ids)
+    if len(teams) < 2:
+        return []
+    if len(teams) % 2:
+        teams.append(None)  # Đội "nghỉ"
+
+    n = len(teams)
+    first_leg = []
+    for round_index in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is None or away is None:
+                continue
+            # Luân phiên chủ/khách: đội cố định đổi sân mỗi vòng, các cặp khác đảo theo vị trí
+            if (i == 0 and round_index % 2) or (i > 0 and i % 2):
+                home, away = away, home
+            pairs.append((home, away, 1))
+        first_leg.append(pairs)
+        # Giữ cố định đội đầu tiên, xoay các đội còn lại
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+    rounds = first_leg
+    if legs >= 2:
+        rounds = rounds + [[(away, home, 2) for home, away, _ in pairs] for pairs in first_leg]
+    return rounds
+
+
+def build_fixtures(groups, legs=1, rng=None):
+    """
+    groups: {group_key: (tên bảng, [team_id, ...])}.
+    Trả về {group_key: [Fixture, ...]} theo thứ tự vòng đấu.
+    Thứ tự đội được xáo trộn (nếu có rng) để mỗi lần tạo cho ra lịch khác nhau.
+    """
+    fixtures = {}
+    for group_key, (group_name, team_ids) in groups.items():
+        team_ids = list(team_ids)
+        if rng is not None:
+            rng.shuffle(team_ids)
+        fixtures[group_key] = [
+            Fixture(group_key, group_name, home, away, leg, round_index + 1)
+            for round_index, pairs in enumerate(round_robin_rounds(team_ids, legs))
+            for home, away, leg in pairs
+        ]
+    return fixtures
+
+
+class _Calendar:
+    """Các bộ đếm đánh chỉ mục để kiểm tra ràng buộc nhanh."""
+
+    def __init__(self, constraints):
+        self.c = constraints
+        self.week_total = defaultdict(int)
+        self.team_week = defaultdict(int)
+        self.group_week = defaultdict(int)
+        self.team_days = defaultdict(list)  # team_id -> danh sách ngày thi đấu (đã sắp xếp)
+        self.team_times = defaultdict(set)  # team_id -> các thời điểm đang đá
+        self.slot_owner = {}  # (datetime, sân) -> ScheduledMatch
+
+    @staticmethod
+    def week_of(day):
+        return day.isocalendar()[:2]
+
+    def _rest_ok(self, team_id, day):
+        days = self.team_days[team_id]
+        if not days or not self.c.rest_days:
+            return True
+        i = bisect.bisect_left(days, day)
+        if i < len(days) and (days[i] - day).days < self.c.rest_days:
+            return False
+        if i > 0 and (day - days[i - 1]).days < self.c.rest_days:
+            return False
+        return True
+
+    def week_full(self, week):
+        return bool(self.c.matches_per_week) and self.week_total[week] >= self.c.matches_per_week
+
+    def group_full(self, fixture, week):
+        limit = self.c.group_limits.get(fixture.group_name)
+        return limit is not None and self.group_week[(fixture.group_key, week)] >= limit
+
+    def can_place(self, fixture, when):
+        day = when.date()
+        week = self.week_of(day)
+        if self.week_full(week) or self.group_full(fixture, week):
+            return False
+        per_team = self.c.max_matches_per_team_per_week
+        for team_id in (fixture.team1_id, fixture.team2_id):
+            if when in self.team_times[team_id]:
+                return False
+            if per_team and self.team_week[(team_id, week)] >= per_team:
+                return False
+            if not self._rest_ok(team_id, day):
+                return False
+        return True
+
+    def place(self, fixture, when, location):
+        return self.add(ScheduledMatch(fixture, when, location))
+
+    def add(self, match):
+        self._count(match, 1)
+        self.slot_owner[(match.match_time, match.location)] = match
+        return match
+
+    def remove(self, match):
+        self._count(match, -1)
+        del self.slot_owner[(match.match_time, match.location)]
+
+    def _count(self, match, sign):
+        fixture, when = match.fixture, match.match_time
+        day = when.date()
+        week = self.week_of(day)
+        self.week_total[week] += sign
+        self.group_week[(fixture.group_key, week)] += sign
+        for team_id in (fixture.team1_id, fixture.team2_id):
+            self.team_week[(team_id, week)] += sign
+            if sign > 0:
+                bisect.insort(self.team_days[team_id], day)
+                self.team_times[team_id].add(when)
+            else:
+                self.team_days[team_id].remove(day)
+                self.team_times[team_id].discard(when)
+
+
+class ScheduleEngine:
+    def __init__(self, constraints, rng=None, optimize=True, max_repair_steps=20000):
+        self.c = constraints
+        self.rng = rng or random.Random()
+        self.optimize = optimize
+        self.max_repair_steps = max_repair_steps
+
+    def _days(self):
+        for offset in range(self.c.horizon_days + 1):
+            day = self.c.start_date + timedelta(days=offset)
+            if day.weekday() in self.c.weekdays:
+                yield day
+
+    def _slots(self, day):
+        for slot_time in sorted(self.c.time_slots):
+            when = datetime.combine(day, slot_time)
+            for location in self.c.locations:
+                yield when, location
+
+    def generate(self, fixtures_by_group):
+        calendar = _Calendar(self.c)
+        pending = {key: list(fixtures) for key, fixtures in fixtures_by_group.items() if fixtures}
+        groups = list(pending)
+        scheduled = []
+
+        # 1. Xếp tham lam theo thứ tự thời gian
+        for day in self._days():
+            if not pending:
+                break
+            week = calendar.week_of(day)
+            for when, location in self._slots(day):
+                if not pending or calendar.week_full(week):
+                    break
+                group_pool = groups if self.c.strategy == 'PRIORITIZED' else self.rng.sample(groups, len(groups))
+                for group_key in group_pool:
+                    fixtures = pending.get(group_key)
+                    if not fixtures:
+                        continue
+                    index = next((i for i, f in enumerate(fixtures) if calendar.can_place(f, when)), None)
+                    if index is None:
+                        continue
+                    scheduled.append(calendar.place(fixtures.pop(index), when, location))
+                    if not fixtures:
+                        del pending[group_key]
+                    break
+
+        unscheduled = [fixture for fixtures in pending.values() for fixture in fixtures]
+
+        # 2. Tối ưu cục bộ cho các cặp còn sót
+        if unscheduled and self.optimize:
+            scheduled, unscheduled = self._repair(calendar, scheduled, unscheduled)
+
+        self._assign_round_numbers(scheduled)
+        return ScheduleResult(scheduled, unscheduled)
+
+    def _repair(self, calendar, scheduled, unscheduled):
+        all_slots = [slot for day in self._days() for slot in self._slots(day)]
+        steps = 0
+        still_unscheduled = []
+        scheduled = list(scheduled)
+
+        for fixture in unscheduled:
+            placed = False
+            # a) Chèn vào slot trống
+            for when, location in all_slots:
+                steps += 1
+                if (when, location) not in calendar.slot_owner and calendar.can_place(fixture, when):
+                    scheduled.append(calendar.place(fixture, when, location))
+                    placed = True
+                    break
+                if steps >= self.max_repair_steps:
+                    break
+
+            # b) Dời một trận đang chiếm slot sang slot trống khác để nhường chỗ
+            if not placed and steps < self.max_repair_steps:
+                placed = self._place_by_moving(calendar, scheduled, fixture, all_slots)
+                steps += len(all_slots)
+
+            if not placed:
+                still_unscheduled.append(fixture)
+        return scheduled, still_unscheduled
+
+    def _place_by_moving(self, calendar, scheduled, fixture, all_slots):
+        free_slots = [slot for slot in all_slots if slot not in calendar.slot_owner]
+        for when, location in all_slots:
+            blocker = calendar.slot_owner.get((when, location))
+            if blocker is None:
+                continue
+            calendar.remove(blocker)
+            if calendar.can_place(fixture, when):
+                new_match = calendar.place(fixture, when, location)
+                for free_when, free_location in free_slots:
+                    if (free_when, free_location) not in calendar.slot_owner and calendar.can_place(blocker.fixture, free_when):
+                        moved = calendar.place(blocker.fixture, free_when, free_location)
+                        scheduled[scheduled.index(blocker)] = moved
+                        scheduled.append(new_match)
+                        return True
+                calendar.remove(new_match)
+            # Không dời được: trả trận về chỗ cũ
+            calendar.add(blocker)
+        return False
+
+    @staticmethod
+    def _assign_round_numbers(scheduled):
+        """Đánh số vòng theo ngày thi đấu trong từng bảng (ngày đầu tiên = vòng 1)."""
+        scheduled.sort(key=lambda m: (m.match_time, str(m.location)))
+        last_day = {}
+        round_number = defaultdict(int)
+        for match in scheduled:
+            group_key = match.fixture.group_key
+            day = match.match_time.date()
+            if last_day.get(group_key) != day:
+                round_number[group_key] += 1
+                last_day[group_key] = day
+            match.round_number = round_number[group_key]
+
+
+def generate_schedule(groups, constraints, legs=1, rng=None, optimize=True):
+    """Tiện ích: sinh cặp đấu và xếp lịch trong một lần gọi."""
+    rng = rng or random.Random()
+    return ScheduleEngine(constraints, rng=rng, optimize=optimize).generate(build_fixtures(groups, legs, rng))
@@ -0,0 +1,87 @@
+# backend/tournaments/scoring.py
+"""
+Cập nhật tỉ số trận đấu trong lúc trận diễn ra (phòng điều khiển trực tiếp).
+
+Tỉ số được thay đổi bằng UPDATE với biểu thức F() trong khi giữ khóa dòng của trận
+(select_for_update), nên hai người nhập bàn thắng cùng lúc không làm mất cập nhật.
+Không gọi match.save(), vì vậy các receiver post_save nặng của Match (thông báo,
+trao thưởng...) không chạy theo từng bàn thắng; thay vào đó phát tín hiệu nhẹ
+`score_changed` (receiver trong signals.py chỉ làm mới cache/thống kê).
+BXH được cộng/trừ trực tiếp tại đây theo tỉ số trước và sau khi đổi.
+
+Thông báo kết quả được gửi khi trận có sự kiện "Trận đấu kết thúc" đầu tiên: do phòng
+điều khiển ghi, hoặc do record_final_result() tạo khi BTC nhập kết quả chung cuộc
+(lưu nhanh/lưu tất cả tỉ số ở trang quản lý giải, admin).
+"""
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
+
+from .models import Match, MatchEvent
+from .standings import apply_result
+
+# Tham số: match_id, tournament_id, team1_score, team2_score
+score_changed = Signal()
+
+_SNAPSHOT_FIELDS = ('tournament_id', 'match_round', 'team1_id', 'team2_id', 'team1_score', 'team2_score')
+
+
+def _update_score(match_id, **values):
+    with transaction.atomic():
+        matches = Match.objects.filter(pk=match_id)
+        old = matches.select_for_update().values_list(*_SNAPSHOT_FIELDS).get()
+        matches.update(**values)
+        new = matches.values_list(*_SNAPSHOT_FIELDS).get()
+        if old != new:
+            apply_result(old, -1)
+            apply_result(new, 1)
+
+    tournament_id, team1_score, team2_score = new[0], new[4], new[5]
+    if old != new:
+        score_changed.send(
+            sender=Match, match_id=match_id, tournament_id=tournament_id,
+            team1_score=team1_score, team2_score=team2_score,
+        )
+    return team1_score, team2_score
+
+
+def adjust_score(match_id, team1_delta=0, team2_delta=0):
+    """
+    Cộng/trừ tỉ số (tỉ số trống được tính là 0, không xuống dưới 0).
+    Trả về (team1_score, team2_score) sau khi cập nhật.
+    """
+    return _update_score(
+        match_id,
+        team1_score=Greatest(Coalesce(F('team1_score'), Value(0)) + team1_delta, Value(0)),
+        team2_score=Greatest(Coalesce(F('team2_score'), Value(0)) + team2_delta, Value(0)),
+    )
+
+
+def set_score(match_id, team1_score, team2_score):
+    """Đặt tỉ số cụ thể (None = chưa có tỉ số). Trả về (team1_score, team2_score)."""
+    return _update_score(match_id, team1_score=team1_score, team2_score=team2_score)
+
+
+def record_final_result(match):
+    """
+    BTC nhập kết quả chung cuộc (không qua phòng điều khiển): ghi sự kiện "Trận đấu kết
+    thúc" nếu trận đã đủ tỉ số và chưa có sự kiện này, để thông báo kết quả được gửi
+    đúng một lần (receiver finalize_match_on_match_end trong signals.py).
+    Trả về True nếu vừa ghi sự kiện.
+    """
+    if match.team1_score is None or match.team2_score is None:
+        return False
+    with transaction.atomic():
+        # Khóa dòng của trận: hai lần lưu cùng lúc không cùng ghi sự kiện kết thúc
+        Match.objects.select_for_update().filter(pk=match.pk).exists()
+        ended = MatchEvent.objects.filter(match_id=match.pk, event_type=MatchEvent.EventType.MATCH_END)
+        if ended.exists():
+            return False
+        MatchEvent.objects.create(
+            match=match,
+            event_type=MatchEvent.EventType.MATCH_END,
+            text=f"Trận đấu kết thúc. Tỉ số chung cuộc là {match.team1_score} - {match.team2_score}.",
+        )
+    return True
@@ -0,0 +1,225 @@
+# backend/tournaments/shop_pricing.py
+"""
+Tính phí đăng ký giải sau khi trừ giảm giá từ giỏ hàng (Shop chính / Shop BTC).
+
+Đội trưởng mua hàng kèm khi đóng lệ phí được giảm một phần trăm tiền lãi
+(giá hiện tại - giá vốn) của các sản phẩm còn đủ hàng, tối đa bằng phí đăng ký.
+Trước đây calculate_shop_discount, calculate_organization_shop_discount,
+get_final_registration_fee và check_*_stock_availability mỗi hàm duyệt lại giỏ
+hàng (và tải lại sản phẩm) riêng; view gọi lần lượt 3-4 hàm.
+
+1. Phần lõi (quote) thuần Python, không truy vấn database: nhận các dòng giỏ hàng
+   đã chuẩn hóa (PricingLine) và tồn kho, trả về trong một lượt duyệt: tình trạng
+   tồn kho từng dòng, tổng tiền/tiền lãi/giảm giá từng shop, phí cuối cùng.
+   Đo hiệu năng: `python manage.py benchmark_shop_pricing`.
+2. quote_registration(tournament, user) tải giỏ hàng kèm sản phẩm, size và tồn
+   kho biến thể (2-4 truy vấn, không phụ thuộc số dòng) rồi gọi quote().
+
+Tồn kho được kiểm tra giống lúc đặt hàng (shop/stock.py): dòng có size dùng tồn
+kho biến thể (Shop chính dùng thêm tồn kho tổng của sản phẩm), và các dòng cùng
+sản phẩm dùng chung số hàng còn lại.
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+MAIN_SHOP = 'main'
+ORGANIZATION_SHOP = 'organization'
+
+ZERO = Decimal('0')
+
+
+@dataclass(frozen=True)
+class PricingRules:
+    """Điều kiện giảm giá của giải đấu."""
+    registration_fee: Decimal
+    discount_percentage: Decimal
+    organization_id: Optional[int] = None  # BTC của giải; None = giải của Admin
+
+
+@dataclass(frozen=True)
+class PricingLine:
+    """Một dòng giỏ hàng. `stock_keys`: các dòng tồn kho mà dòng này trừ vào khi đặt hàng."""
+    shop: str
+    quantity: int
+    unit_price: Decimal
+    cost_price: Optional[Decimal]
+    stock_keys: Tuple[Hashable, ...]
+    organization_id: Optional[int] = None  # BTC sở hữu sản phẩm (Shop BTC)
+    product: Any = None  # Đối tượng sản phẩm để hiển thị; phần tính toán không dùng tới
+    size_name: Optional[str] = None
+
+
+class LineQuote:
+    """Kết quả của một dòng: số hàng còn lại cho dòng này, thành tiền, tiền lãi được tính giảm giá."""
+    __slots__ = ('line', 'available', 'total', 'profit')
+
+    def __init__(self, line, available, total, profit):
+        self.line = line
+        self.available = available
+        self.total = total
+        self.profit = profit
+
+    @property
+    def in_stock(self):
+        return self.available >= self.line.quantity
+
+
+@dataclass
+class ShopQuote:
+    total_items: int = 0
+    subtotal: Decimal = ZERO
+    profit: Decimal = ZERO  # Tiền lãi được tính giảm giá (dòng đủ hàng, đúng BTC)
+    discount: Decimal = ZERO
+
+
+@dataclass
+class RegistrationQuote:
+    rules: PricingRules
+    lines: List[LineQuote] = field(default_factory=list)
+    shops: Dict[str, ShopQuote] = field(default_factory=dict)
+    discount: Decimal = ZERO
+    final_fee: Decimal = ZERO
+
+    @property
+    def main(self):
+        return self.shops[MAIN_SHOP]
+
+    @property
+    def organization(self):
+        return self.shops[ORGANIZATION_SHOP]
+
+    @property
+    def unavailable_items(self):
+        """Các dòng không đủ hàng, dạng dict như check_cart_stock_availability trước đây."""
+        return [
+            {'product': item.line.product, 'size': item.line.size_name,
+             'requested': item.line.quantity, 'available': item.available}
+            for item in self.lines if not item.in_stock
+        ]
+
+
+def quote(rules, lines, stock):
+    """
+    Tính phí đăng ký cho các dòng `lines` với tồn kho `stock` ({stock_key: số lượng}).
+    Một lượt duyệt, không truy vấn database.
+    """
+    fee = Decimal(rules.registration_fee)
+    percentage = Decimal(rules.discount_percentage or 0)
+    remaining = dict(stock)
+    get_remaining = remaining.get
+    # Cộng dồn vào list cục bộ [số lượng, tạm tính, tiền lãi] thay vì thuộc tính ShopQuote
+    totals = {MAIN_SHOP: [0, ZERO, ZERO], ORGANIZATION_SHOP: [0, ZERO, ZERO]}
+    # Shop BTC: chỉ sản phẩm của chính BTC tổ chức giải được tính giảm giá
+    organization_id = rules.organization_id if rules.organization_id is not None else object()
+
+    quoted = []
+    append = quoted.append
+    for line in lines:
+        quantity = line.quantity
+        keys = line.stock_keys
+        if len(keys) == 1:
+            available = get_remaining(keys[0], 0)
+        else:
+            available = min(get_remaining(key, 0) for key in keys) if keys else 0
+        unit_price = line.unit_price
+        total = unit_price * quantity
+        profit = ZERO
+        shop_totals = totals[line.shop]
+        shop_totals[0] += quantity
+        shop_totals[1] += total
+        if available >= quantity:
+            for key in keys:
+                remaining[key] -= quantity
+            cost_price = line.cost_price
+            if cost_price and (line.shop == MAIN_SHOP or line.organization_id == organization_id):
+                profit = (unit_price - cost_price) * quantity
+                shop_totals[2] += profit
+        append(LineQuote(line, available, total, profit))
+
+    shops = {
+        name: ShopQuote(total_items=items, subtotal=subtotal, profit=profit)
+        for name, (items, subtotal, profit) in totals.items()
+    }
+    result = RegistrationQuote(rules, lines=quoted, shops=shops)
+    if percentage > 0:
+        for shop in shops.values():
+            # Giảm giá của mỗi shop không âm và tối đa bằng phí đăng ký
+            shop.discount = max(min(shop.profit * percentage / 100, fee), ZERO)
+    result.discount = sum((shop.discount for shop in result.shops.values()), ZERO)
+    result.final_fee = max(fee - result.discount, ZERO)
+    return result
+
+
+def rules_for(tournament):
+    return PricingRules(
+        registration_fee=tournament.registration_fee,
+        discount_percentage=tournament.shop_discount_percentage,
+        organization_id=tournament.organization_id,
+    )
+
+
+def cart_lines(shop, items, variant_stock=None):
+    """
+    Chuyển các dòng giỏ hàng (đã select_related product, size) thành PricingLine.
+    variant_stock=None: chỉ xét tồn kho tổng của sản phẩm. Trả về (lines, stock).
+    """
+    from shop import stock as shop_stock
+
+    policy = shop_stock.MAIN_SHOP if shop == MAIN_SHOP else shop_stock.ORGANIZATION_SHOP
+    lines = []
+    stock = {}
+    for item in items:
+        product = item.product
+        product_key = (shop, 'product', product.pk)
+        stock[product_key] = product.stock_quantity
+        keys = (product_key,)
+        if variant_stock is not None and product.has_sizes and item.size_id:
+            variant_key = (shop, 'variant', product.pk, item.size_id)
+            stock[variant_key] = variant_stock.get((product.pk, item.size_id), 0)
+            keys = (variant_key, product_key) if policy.sized_lines_use_product_stock else (variant_key,)
+        lines.append(PricingLine(
+            shop=shop,
+            quantity=item.quantity,
+            unit_price=product.current_price,
+            cost_price=product.cost_price,
+            stock_keys=keys,
+            organization_id=getattr(product, 'organization_id', None),
+            product=product,
+            size_name=item.size.name if item.size_id else None,
+        ))
+    return lines, stock
+
+
+def _load_cart(shop, items, variant_model):
+    items = list(items.select_related('product', 'size'))
+    sized = {(item.product_id, item.size_id) for item in items if item.product.has_sizes and item.size_id}
+    variant_stock = {}
+    if sized:
+        variant_stock = {
+            (product_id, size_id): quantity
+            for product_id, size_id, quantity in variant_model.objects.filter(
+                product_id__in={product_id for product_id, _ in sized},
+                size_id__in={size_id for _, size_id in sized},
+            ).values_list('product_id', 'size_id', 'stock_quantity')
+        }
+    return cart_lines(shop, items, variant_stock)
+
+
+def quote_registration(tournament, user):
+    """
+    RegistrationQuote cho đội trưởng `user`: giải của BTC dùng giỏ hàng Shop BTC của
+    BTC đó, giải của Admin dùng giỏ hàng Shop chính.
+    """
+    if tournament.organization_id:
+        from shop.organization_models import OrganizationCartItem, OrganizationProductVariant
+        lines, stock = _load_cart(
+            ORGANIZATION_SHOP,
+            OrganizationCartItem.objects.filter(cart__user=user, cart__organization_id=tournament.organization_id),
+            OrganizationProductVariant,
+        )
+    else:
+        from shop.models import CartItem, ProductVariant
+        lines, stock = _load_cart(MAIN_SHOP, CartItem.objects.filter(cart__user=user), ProductVariant)
+    return quote(rules_for(tournament), lines, stock)
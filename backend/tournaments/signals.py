@@ -1,18 +1,267 @@
 # backend/tournaments/signals.py
 
-from django.core.cache import cache
-from django.db.models.signals import post_save, post_delete, pre_delete
+from dbpsports_core import cache_namespaces
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
 from django.urls import reverse
-from django.db.models import F
-from .models import HomeBanner, Tournament, Group, Match, Team, Notification, TeamAchievement, Player, TeamRegistration
+from django.db.models import F, QuerySet
+from .models import HomeBanner, Tournament, Group, Match, Team, Notification, TeamAchievement, Player, TeamRegistration, Goal, Card, Announcement, Substitution, MatchEvent, Lineup, Comment
 from .utils import send_schedule_notification
+from .standings import apply_result, snapshot_match, sync_registration_group
+from .career_stats import apply_event, snapshot_event
+from .stats import TournamentStatsService
+from .bulk_fixtures import schedule_created
+from .scoring import score_changed
+from . import homepage, live_feed, match_sync, unread_counters, valuation
 from organizations.models import JobPosting
+from dbpsports_core import search
+
+# Chỉ mục tìm kiếm (dbpsports_core/search.py): trường -> trọng số
+search.register('player', Player, {'full_name': 10})
+search.register('team', Team, {'name': 10})
+search.register('tournament', Tournament, {'name': 10, 'location_detail': 2})
+search.register(
+    'job', JobPosting,
+    {'title': 10, 'description': 1, 'tournament.name': 3, 'stadium.stadium_name': 3},
+    select_related=('tournament', 'stadium'),
+)
+search.register('user', User, {'username': 10, 'first_name': 5, 'last_name': 5, 'email': 3})
 from .models import Sponsorship
 
-@receiver([post_save, post_delete], sender=[HomeBanner, Tournament, Match, Group, JobPosting, TeamRegistration])
-def clear_cache_on_data_change(sender, instance, **kwargs):
-    cache.clear()
+@receiver([post_save, post_delete], sender=HomeBanner)
+@receiver([post_save, post_delete], sender=Tournament)
+@receiver([post_save, post_delete], sender=Match)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=JobPosting)
+@receiver([post_save, post_delete], sender=TeamRegistration)
+@receiver([post_save, post_delete], sender=Team)
+@receiver([post_save, post_delete], sender=Player)
+@receiver([post_save, post_delete], sender=TeamAchievement)
+@receiver([post_save, post_delete], sender=Goal)
+@receiver([post_save, post_delete], sender=Card)
+@receiver([post_save, post_delete], sender=Substitution)
+@receiver([post_save, post_delete], sender=MatchEvent)
+@receiver([post_save, post_delete], sender=Lineup)
+@receiver([post_save, post_delete], sender=Comment)
+def bump_cache_namespaces_on_data_change(sender, instance, **kwargs):
+    """
+    Chỉ làm mất hiệu lực cache của phần dữ liệu bị thay đổi (thay cho cache.clear()),
+    để cache thời tiết, rate-limit, nhạc... và các trang khác không bị xóa theo.
+    Các namespace cũng là surrogate key của trang đã cache (dbpsports_core/page_cache.py).
+    """
+    if sender is HomeBanner:
+        cache_namespaces.bump(cache_namespaces.HOMEPAGE_BANNERS)
+    elif sender is Tournament:
+        cache_namespaces.bump(
+            cache_namespaces.tournament_namespace(instance.pk),
+            cache_namespaces.TOURNAMENT_LISTS,
+            cache_namespaces.HOMEPAGE_TOURNAMENTS,
+        )
+    elif sender is Match:
+        live_feed.forget_state(instance.pk)
+        cache_namespaces.bump(
+            cache_namespaces.match_namespace(instance.pk),
+            cache_namespaces.tournament_namespace(instance.tournament_id),
+            cache_namespaces.LIVESTREAM,
+            *_team_namespaces(instance.team1_id, instance.team2_id),
+        )
+    elif sender is Group:
+        cache_namespaces.bump(cache_namespaces.tournament_namespace(instance.tournament_id))
+    elif sender is TeamRegistration:
+        cache_namespaces.bump(
+            cache_namespaces.tournament_namespace(instance.tournament_id),
+            cache_namespaces.TOURNAMENT_LISTS,
+            cache_namespaces.HOMEPAGE_TOURNAMENTS,
+            cache_namespaces.team_namespace(instance.team_id),
+        )
+    elif sender is JobPosting:
+        cache_namespaces.bump(cache_namespaces.JOBS)
+    elif sender is Team:
+        # Tên/logo đội hiện trên trang giải, trang chủ và danh sách giải của các giải đã đăng ký
+        tournament_ids = TeamRegistration.objects.filter(team_id=instance.pk).values_list('tournament_id', flat=True)
+        cache_namespaces.bump(
+            cache_namespaces.team_namespace(instance.pk),
+            *(cache_namespaces.tournament_namespace(tournament_id) for tournament_id in set(tournament_ids)),
+            cache_namespaces.TOURNAMENT_LISTS,
+            cache_namespaces.HOMEPAGE_TOURNAMENTS,
+        )
+    elif sender is Player:
+        old = getattr(instance, '_audience_snapshot', None)
+        cache_namespaces.bump(*_team_namespaces(instance.team_id, old[1] if old else None))
+    elif sender is TeamAchievement:
+        cache_namespaces.bump(cache_namespaces.team_namespace(instance.team_id))
+    elif sender is Comment:
+        cache_namespaces.bump(cache_namespaces.match_namespace(instance.match_id))
+    else:
+        # Diễn biến trận đấu: bàn thắng, thẻ, thay người, sự kiện, đội hình
+        cache_namespaces.bump(
+            cache_namespaces.match_namespace(instance.match_id),
+            *_team_namespaces(getattr(instance, 'team_id', None)),
+        )
+
+def _team_namespaces(*team_ids):
+    return [cache_namespaces.team_namespace(team_id) for team_id in team_ids if team_id]
+
+@receiver(score_changed)
+def refresh_caches_on_score_change(sender, match_id, tournament_id, **kwargs):
+    """Tỉ số đổi qua scoring.py (không qua match.save()): chỉ làm mới cache và thống kê."""
+    team_ids = Match.objects.filter(pk=match_id).values_list('team1_id', 'team2_id').first() or ()
+    live_feed.forget_state(match_id)
+    cache_namespaces.bump(
+        cache_namespaces.match_namespace(match_id),
+        cache_namespaces.tournament_namespace(tournament_id),
+        cache_namespaces.LIVESTREAM,
+        *_team_namespaces(*team_ids),
+    )
+    TournamentStatsService.invalidate(tournament_id)
+
+def _is_user_deletion(origin):
+    """Xóa dây chuyền từ việc xóa tài khoản: bỏ qua, lệnh reconcile_unread_counters sẽ sửa lại."""
+    if isinstance(origin, QuerySet):
+        return origin.model is User
+    return isinstance(origin, User)
+
+@receiver(post_save, sender=User)
+def refresh_vote_value_on_user_created(sender, instance, created, **kwargs):
+    if created:
+        valuation.check_user_count()
+
+@receiver(post_delete, sender=User)
+def refresh_vote_value_on_user_deleted(sender, instance, **kwargs):
+    valuation.check_user_count()
+
+@receiver(pre_delete, sender=User)
+def remember_followed_tournaments(sender, instance, **kwargs):
+    # Dòng theo dõi bị xóa dây chuyền (không có m2m_changed): ghi nhớ để đếm lại sau khi xóa
+    instance._followed_tournament_ids = set(instance.followed_tournaments.values_list('id', flat=True))
+
+@receiver(post_delete, sender=User)
+def update_followers_count_on_user_deleted(sender, instance, **kwargs):
+    tournament_ids = getattr(instance, '_followed_tournament_ids', None)
+    if tournament_ids:
+        homepage.refresh_followers_count(tournament_ids)
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter_on_notification_save(sender, instance, created, **kwargs):
+    if not created:
+        unread_counters.recount_notifications([instance.user_id])
+    elif not instance.is_read:
+        unread_counters.add_notifications([instance.user_id])
+
+@receiver(post_delete, sender=Notification)
+def update_unread_counter_on_notification_delete(sender, instance, origin=None, **kwargs):
+    if not instance.is_read and not _is_user_deletion(origin):
+        unread_counters.remove_notifications([instance.user_id])
+
+@receiver(pre_save, sender=Announcement)
+def remember_announcement_visibility(sender, instance, **kwargs):
+    instance._visibility_snapshot = None
+    if instance.pk:
+        instance._visibility_snapshot = Announcement.objects.filter(pk=instance.pk).values_list(
+            'tournament_id', 'audience', 'is_published'
+        ).first()
+
+@receiver(post_save, sender=Announcement)
+def update_unread_counters_on_announcement_save(sender, instance, **kwargs):
+    old = getattr(instance, '_visibility_snapshot', None)
+    new = (instance.tournament_id, instance.audience, instance.is_published)
+    if old == new:
+        return
+    if old and old[2]:
+        unread_counters.shift_announcement(instance.pk, old[0], old[1], -1)
+    if instance.is_published:
+        unread_counters.shift_announcement(instance.pk, instance.tournament_id, instance.audience, 1)
+    instance._visibility_snapshot = new
+
+@receiver(pre_delete, sender=Announcement)
+def update_unread_counters_on_announcement_delete(sender, instance, **kwargs):
+    # pre_delete: danh sách người đã đọc (read_by) vẫn còn
+    if instance.is_published:
+        unread_counters.shift_announcement(instance.pk, instance.tournament_id, instance.audience, -1)
+
+@receiver(m2m_changed, sender=Announcement.read_by.through)
+@receiver(m2m_changed, sender=Tournament.followers.through)
+def update_unread_counters_on_read_or_follow(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.read_announcements.add(...) / user.followed_tournaments.add(...)
+        user_ids = {instance.pk}
+    elif action == 'pre_clear':
+        # Ghi nhớ những ai sắp bị xóa khỏi danh sách để đếm lại sau khi xóa
+        field = 'read_by' if sender is Announcement.read_by.through else 'followers'
+        instance._cleared_user_ids = set(getattr(instance, field).values_list('id', flat=True))
+        return
+    elif action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_user_ids', set())
+    else:
+        user_ids = pk_set or set()
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        unread_counters.recount_announcements(user_ids)
+
+@receiver(m2m_changed, sender=Tournament.followers.through)
+def update_followers_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """Theo dõi/bỏ theo dõi giải (kể cả từ admin hoặc user.followed_tournaments) -> đếm lại followers_count."""
+    if not reverse:
+        tournament_ids = {instance.pk}
+    elif action == 'pre_clear':
+        instance._cleared_tournament_ids = set(instance.followed_tournaments.values_list('id', flat=True))
+        return
+    elif action == 'post_clear':
+        tournament_ids = getattr(instance, '_cleared_tournament_ids', set())
+    else:
+        tournament_ids = pk_set or set()
+    if action in ('post_add', 'post_remove', 'post_clear') and tournament_ids:
+        homepage.refresh_followers_count(tournament_ids)
+
+def _team_user_ids(team_id):
+    user_ids = set(Player.objects.filter(team_id=team_id).values_list('user_id', flat=True))
+    user_ids.update(Team.objects.filter(pk=team_id).values_list('captain_id', flat=True))
+    return user_ids
+
+@receiver(post_save, sender=TeamRegistration)
+def update_unread_announcements_on_registration_save(sender, instance, created, **kwargs):
+    """Đội đăng ký giải: đội trưởng và cầu thủ của đội thấy tin tức của giải."""
+    if created:
+        unread_counters.recount_announcements(_team_user_ids(instance.team_id))
+
+@receiver(pre_delete, sender=TeamRegistration)
+def remember_registration_audience(sender, instance, origin=None, **kwargs):
+    # Lấy danh sách trước khi xóa (khi xóa cả đội, cầu thủ sẽ bị gỡ khỏi đội)
+    instance._announcement_audience = () if _is_user_deletion(origin) else _team_user_ids(instance.team_id)
+
+@receiver(post_delete, sender=TeamRegistration)
+def update_unread_announcements_on_registration_delete(sender, instance, **kwargs):
+    unread_counters.recount_announcements(getattr(instance, '_announcement_audience', ()))
+
+@receiver(pre_save, sender=Team)
+@receiver(pre_save, sender=Player)
+def remember_announcement_audience_fields(sender, instance, **kwargs):
+    fields = ('captain_id',) if sender is Team else ('user_id', 'team_id')
+    instance._audience_snapshot = None
+    if instance.pk:
+        instance._audience_snapshot = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+
+@receiver(post_save, sender=Team)
+def update_unread_announcements_on_captain_change(sender, instance, created, **kwargs):
+    old = getattr(instance, '_audience_snapshot', None)
+    if old and old[0] != instance.captain_id:
+        unread_counters.recount_announcements({old[0], instance.captain_id})
+
+@receiver(post_save, sender=Player)
+def update_unread_announcements_on_player_change(sender, instance, created, **kwargs):
+    """Cầu thủ liên kết tài khoản hoặc chuyển đội -> đếm lại tin chưa đọc."""
+    old = getattr(instance, '_audience_snapshot', None)
+    if old == (instance.user_id, instance.team_id):
+        return
+    user_ids = {instance.user_id}
+    if old:
+        user_ids.add(old[0])
+    unread_counters.recount_announcements(user_ids)
+
+@receiver(post_delete, sender=Player)
+def update_unread_announcements_on_player_delete(sender, instance, origin=None, **kwargs):
+    if instance.team_id and not _is_user_deletion(origin):
+        unread_counters.recount_announcements([instance.user_id])
 
 @receiver(pre_delete, sender=Group)
 def delete_all_tournament_matches_on_group_delete(sender, instance, **kwargs):
@@ -23,14 +272,130 @@ def delete_all_tournament_matches_on_group_delete(sender, instance, **kwargs):
         print(f"Deleting group {group.name}. About to delete {matches_to_delete.count()} matches from tournament {tournament.name}.")
         matches_to_delete.delete()
 
+@receiver(pre_save, sender=Match)
+def remember_match_state_for_standings(sender, instance, **kwargs):
+    """Ghi nhớ kết quả cũ của trận để trừ ra khỏi BXH trước khi cộng kết quả mới."""
+    instance._standings_snapshot = None
+    if instance.pk:
+        old = Match.objects.filter(pk=instance.pk).values_list(
+            'tournament_id', 'match_round', 'team1_id', 'team2_id', 'team1_score', 'team2_score'
+        ).first()
+        instance._standings_snapshot = old
+
 @receiver(post_save, sender=Match)
-def create_match_result_notification(sender, instance, created, **kwargs):
+def update_standings_on_match_save(sender, instance, created, **kwargs):
+    old_snapshot = getattr(instance, '_standings_snapshot', None)
+    new_snapshot = snapshot_match(instance)
+    if old_snapshot == new_snapshot:
+        return
+    if old_snapshot:
+        apply_result(old_snapshot, -1)
+    apply_result(new_snapshot, 1)
+    instance._standings_snapshot = new_snapshot
+
+@receiver(post_delete, sender=Match)
+def update_standings_on_match_delete(sender, instance, **kwargs):
+    apply_result(snapshot_match(instance), -1)
+
+@receiver(post_save, sender=TeamRegistration)
+def update_standings_group_on_registration_save(sender, instance, **kwargs):
+    sync_registration_group(instance)
+
+@receiver(pre_save, sender=Goal)
+@receiver(pre_save, sender=Card)
+@receiver(pre_save, sender=Lineup)
+def remember_event_for_player_stats(sender, instance, **kwargs):
+    """Ghi nhớ bàn thắng/thẻ/đội hình cũ để trừ ra khỏi thống kê cầu thủ trước khi cộng giá trị mới."""
+    instance._player_stats_snapshot = None
+    if instance.pk:
+        old = sender.objects.filter(pk=instance.pk).first()
+        instance._player_stats_snapshot = snapshot_event(old) if old else None
+
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Card)
+@receiver(post_save, sender=Lineup)
+def update_player_stats_on_event_save(sender, instance, **kwargs):
+    old_snapshot = getattr(instance, '_player_stats_snapshot', None)
+    new_snapshot = snapshot_event(instance)
+    if old_snapshot == new_snapshot:
+        return
+    if old_snapshot:
+        apply_event(old_snapshot, -1)
+    apply_event(new_snapshot, 1)
+    instance._player_stats_snapshot = new_snapshot
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Card)
+@receiver(post_delete, sender=Lineup)
+def update_player_stats_on_event_delete(sender, instance, origin=None, **kwargs):
+    # Cầu thủ đang bị xóa: các dòng thống kê bị xóa theo
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is Player:
+        return
+    apply_event(snapshot_event(instance), -1)
+
+# Đăng ký riêng từng model: sender=[A, B] sẽ nối receiver với chính đối tượng list
+@receiver([post_save, post_delete], sender=Match)
+@receiver([post_save, post_delete], sender=TeamRegistration)
+def invalidate_tournament_stats_on_match_change(sender, instance, **kwargs):
+    TournamentStatsService.invalidate(instance.tournament_id)
+
+@receiver([post_save, post_delete], sender=Goal)
+@receiver([post_save, post_delete], sender=Card)
+def invalidate_tournament_stats_on_event_change(sender, instance, **kwargs):
+    tournament_id = Match.objects.filter(pk=instance.match_id).values_list('tournament_id', flat=True).first()
+    TournamentStatsService.invalidate(tournament_id)
+    if tournament_id:
+        # Trang giải đấu hiển thị thống kê (vua phá lưới, thẻ phạt)
+        cache_namespaces.bump(cache_namespaces.tournament_namespace(tournament_id))
+
+@receiver(post_save, sender=Goal)
+@receiver(post_save, sender=Card)
+@receiver(post_save, sender=Substitution)
+@receiver(post_save, sender=MatchEvent)
+@receiver(post_save, sender=Lineup)
+def record_match_change_on_save(sender, instance, **kwargs):
+    match_sync.record_change(instance)
+
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Card)
+@receiver(post_delete, sender=Substitution)
+@receiver(post_delete, sender=MatchEvent)
+@receiver(post_delete, sender=Lineup)
+def record_match_change_on_delete(sender, instance, origin=None, **kwargs):
+    # Trận đang bị xóa theo (xóa trận/giải/đội/tài khoản): không ghi nhật ký cho trận sắp biến mất
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (Match, Tournament, Team, User):
+        return
+    match_sync.record_change(instance, deleted=True)
+
+@receiver([post_save, post_delete], sender=Player)
+def invalidate_tournament_stats_on_player_change(sender, instance, **kwargs):
+    if instance.team_id:
+        for tournament_id in TeamRegistration.objects.filter(team_id=instance.team_id).values_list('tournament_id', flat=True):
+            TournamentStatsService.invalidate(tournament_id)
+
+@receiver(post_save, sender=MatchEvent)
+def finalize_match_on_match_end(sender, instance, created, **kwargs):
     """
-    Tự động tạo thông báo khi một trận đấu được cập nhật tỉ số,
+    Khi phòng điều khiển ghi sự kiện "Trận đấu kết thúc" (lần đầu): gửi thông báo kết quả
+    và trao danh hiệu nếu là trận Chung kết/Tranh Hạng Ba.
+    Tỉ số trong trận được cập nhật qua scoring.py nên không gửi thông báo theo từng bàn thắng.
+    """
+    if not created or instance.event_type != MatchEvent.EventType.MATCH_END:
+        return
+    if MatchEvent.objects.filter(match_id=instance.match_id, event_type=MatchEvent.EventType.MATCH_END).exclude(pk=instance.pk).exists():
+        return
+    match = Match.objects.select_related('tournament', 'team1__captain__profile', 'team2__captain__profile').get(pk=instance.match_id)
+    create_match_result_notification(match)
+    award_achievements_for_final_match(match)
+
+def create_match_result_notification(match):
+    """
+    Tạo thông báo kết quả trận đấu,
     CHỈ gửi cho những người dùng đã bật cài đặt này.
     """
-    if not created and instance.team1_score is not None and instance.team2_score is not None:
-        match = instance
+    if match.team1_score is not None and match.team2_score is not None:
         tournament = match.tournament
         
         user_ids_to_notify = set()
@@ -130,14 +495,27 @@ def create_schedule_notification_on_match_creation(sender, instance, created, **
                 'tournament_detail'
             )
 
+@receiver(schedule_created)
+def create_schedule_notification_on_bulk_creation(sender, tournament, title, message, **kwargs):
+    """Gửi MỘT thông báo cho cả lịch thi đấu tạo hàng loạt (bulk_create không phát post_save)."""
+    send_schedule_notification(
+        tournament,
+        Notification.NotificationType.SCHEDULE_CREATED,
+        title,
+        message,
+        'tournament_detail'
+    )
+
 @receiver(post_save, sender=Match)
 def award_achievements_on_final_match_save(sender, instance, created, **kwargs):
+    award_achievements_for_final_match(instance)
+
+def award_achievements_for_final_match(match):
     """
     Tự động trao danh hiệu, cộng phiếu bầu VÀ GỬI THÔNG BÁO
     khi một trận Chung kết hoặc Tranh Hạng Ba có kết quả.
+    Phiếu bầu chỉ được cộng khi danh hiệu được tạo lần đầu (lưu lại trận không cộng thêm).
     """
-    match = instance
-
     if not match.winner or not match.loser:
         return
 
@@ -147,15 +525,18 @@ def award_achievements_on_final_match_save(sender, instance, created, **kwargs):
         if not team or votes_to_add <= 0:
             return
             
-        TeamAchievement.objects.update_or_create(
+        _, created = TeamAchievement.objects.update_or_create(
             team=team, tournament=tournament, achievement_type=achievement_type,
             defaults={'description': f'{rank_name} giải {tournament.name} {tournament.start_date.year}'}
         )
+        if not created:
+            return
 
         players_with_users = Player.objects.filter(team=team, user__isnull=False)
         user_ids = list(players_with_users.values_list('user_id', flat=True))
 
         updated_count = Player.objects.filter(team=team).update(votes=F('votes') + votes_to_add)
+        valuation.sync_market_values(Player.objects.filter(team=team))
         print(f"Added {votes_to_add} votes to {updated_count} members of team {team.name}.")
 
         if user_ids:
@@ -0,0 +1,173 @@
+# backend/tournaments/standings.py
+"""
+Bảng xếp hạng được lưu sẵn (TeamStanding).
+
+Mỗi trận vòng bảng / league có kết quả sẽ được cộng (hoặc trừ) trực tiếp vào
+các dòng TeamStanding của hai đội thông qua signal của Match, nên các trang
+chỉ cần đọc các dòng đã tổng hợp thay vì duyệt lại toàn bộ lịch sử trận đấu.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Match, TeamRegistration, TeamStanding
+
+# Chỉ các vòng này mới được tính vào bảng xếp hạng
+STANDINGS_ROUNDS = ('GROUP', 'LEAGUE')
+
+
+def match_counts_for_standings(match_round, team1_score, team2_score):
+    """Trận có được tính điểm vào bảng xếp hạng hay không."""
+    return match_round in STANDINGS_ROUNDS and team1_score is not None and team2_score is not None
+
+
+def snapshot_match(match):
+    """Lưu lại các giá trị của trận ảnh hưởng tới BXH (dùng để so sánh trước/sau khi lưu)."""
+    return (match.tournament_id, match.match_round, match.team1_id, match.team2_id, match.team1_score, match.team2_score)
+
+
+def _result_deltas(goals_for, goals_against, sign):
+    """Trả về các giá trị cần cộng thêm cho một đội ứng với một kết quả."""
+    deltas = {
+        'played': sign,
+        'goals_for': sign * goals_for,
+        'goals_against': sign * goals_against,
+    }
+    if goals_for > goals_against:
+        deltas['wins'] = sign
+        deltas['points'] = 3 * sign
+    elif goals_for < goals_against:
+        deltas['losses'] = sign
+    else:
+        deltas['draws'] = sign
+        deltas['points'] = sign
+    return deltas
+
+
+def _ensure_row(tournament_id, team_id):
+    group_id = TeamRegistration.objects.filter(
+        tournament_id=tournament_id, team_id=team_id
+    ).values_list('group_id', flat=True).first()
+    TeamStanding.objects.get_or_create(
+        tournament_id=tournament_id, team_id=team_id,
+        defaults={'group_id': group_id},
+    )
+
+
+def apply_result(snapshot, sign):
+    """
+    Cộng (sign=1) hoặc trừ (sign=-1) kết quả của một trận vào BXH đã lưu.
+    `snapshot` là tuple trả về từ snapshot_match().
+    """
+    tournament_id, match_round, team1_id, team2_id, score1, score2 = snapshot
+    if not match_counts_for_standings(match_round, score1, score2):
+        return
+
+    with transaction.atomic():
+        for team_id, goals_for, goals_against in ((team1_id, score1, score2), (team2_id, score2, score1)):
+            if sign > 0:
+                _ensure_row(tournament_id, team_id)
+            # Khi trừ kết quả không tạo dòng mới (dòng có thể đang bị xóa theo giải/đội)
+            deltas = _result_deltas(goals_for, goals_against, sign)
+            TeamStanding.objects.filter(tournament_id=tournament_id, team_id=team_id).update(
+                **{field: F(field) + value for field, value in deltas.items()}
+            )
+
+
+def sync_registration_group(registration):
+    """Cập nhật bảng đấu của dòng BXH khi đơn đăng ký được xếp/đổi bảng."""
+    TeamStanding.objects.filter(
+        tournament_id=registration.tournament_id, team_id=registration.team_id
+    ).exclude(group_id=registration.group_id).update(group_id=registration.group_id)
+
+
+def rebuild_standings(tournament):
+    """Tính lại toàn bộ BXH đã lưu của một giải từ lịch sử trận đấu."""
+    totals = defaultdict(lambda: defaultdict(int))
+    finished_matches = Match.objects.filter(
+        tournament=tournament,
+        match_round__in=STANDINGS_ROUNDS,
+        team1_score__isnull=False,
+        team2_score__isnull=False,
+    ).values_list('team1_id', 'team2_id', 'team1_score', 'team2_score')
+
+    for team1_id, team2_id, score1, score2 in finished_matches:
+        for team_id, goals_for, goals_against in ((team1_id, score1, score2), (team2_id, score2, score1)):
+            for field, value in _result_deltas(goals_for, goals_against, 1).items():
+                totals[team_id][field] += value
+
+    registrations = dict(
+        TeamRegistration.objects.filter(tournament=tournament).values_list('team_id', 'group_id')
+    )
+    rows = [
+        TeamStanding(
+            tournament=tournament,
+            team_id=team_id,
+            group_id=registrations.get(team_id),
+            **totals.get(team_id, {}),
+        )
+        for team_id in set(registrations) | set(totals)
+    ]
+
+    with transaction.atomic():
+        TeamStanding.objects.filter(tournament=tournament).delete()
+        TeamStanding.objects.bulk_create(rows)
+    return len(rows)
+
+
+def _sort_standings(standings):
+    standings.sort(key=lambda x: (x['points'], x['gd'], x['gf']), reverse=True)
+    return standings
+
+
+def _build_rows(registrations, rows_by_team):
+    """Ghép các đội đã đăng ký với dòng BXH đã lưu (đội chưa đá trận nào = toàn 0)."""
+    standings = []
+    for registration in registrations:
+        row = rows_by_team.get(registration.team_id)
+        if row is None:
+            row = TeamStanding(team_id=registration.team_id)
+        stats = row.as_dict()
+        stats['team_obj'] = registration.team
+        standings.append(stats)
+    return standings
+
+
+def get_group_standings(group):
+    """BXH của một bảng đấu, cùng định dạng với Group.get_standings() trước đây."""
+    registrations = list(TeamRegistration.objects.filter(group=group).select_related('team'))
+    rows_by_team = {
+        row.team_id: row
+        for row in TeamStanding.objects.filter(
+            tournament_id=group.tournament_id,
+            team_id__in=[r.team_id for r in registrations],
+        )
+    }
+    return _sort_standings(_build_rows(registrations, rows_by_team))
+
+
+def get_tournament_standings(tournament, paid_only=True):
+    """
+    BXH của cả giải chỉ với 2 truy vấn.
+    - Thể thức League: {'LEAGUE': [...]}
+    - Thể thức Cúp: {group_id: [...]} cho mỗi bảng đấu
+    """
+    registrations = TeamRegistration.objects.filter(tournament=tournament).select_related('team')
+    if paid_only:
+        registrations = registrations.filter(payment_status='PAID')
+    registrations = list(registrations)
+    rows_by_team = {row.team_id: row for row in TeamStanding.objects.filter(tournament=tournament)}
+
+    standings_data = defaultdict(list)
+    if tournament.format == tournament.Format.LEAGUE:
+        standings_data['LEAGUE'] = _sort_standings(_build_rows(registrations, rows_by_team))
+    else:
+        by_group = defaultdict(list)
+        for registration in registrations:
+            if registration.group_id:
+                by_group[registration.group_id].append(registration)
+        for group in tournament.groups.all():
+            standings_data[group.id] = _sort_standings(_build_rows(by_group.get(group.id, []), rows_by_team))
+    return standings_data
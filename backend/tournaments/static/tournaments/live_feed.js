@@ -0,0 +1,46 @@
+// Theo dõi luồng sự kiện trực tiếp của trận đấu (xem tournaments/live_feed.py).
+// Cách dùng:
+//   DBPLiveFeed.subscribe('/match/12/live/', cursor, function (payload) {
+//     // payload.events: các sự kiện mới; payload.scores: tỉ số hiện tại
+//     // payload.reset: true nếu đã bỏ lỡ sự kiện, cần đồng bộ lại từ payload.scores
+//   });
+(function (window) {
+  'use strict';
+
+  function subscribe(url, cursor, onUpdate) {
+    var stopped = false;
+
+    function poll() {
+      if (stopped) return;
+      var separator = url.indexOf('?') === -1 ? '?' : '&';
+      var nextUrl = url + (cursor ? separator + 'since=' + encodeURIComponent(cursor) : '');
+
+      fetch(nextUrl, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+        .then(function (response) {
+          if (response.status === 404) {
+            stopped = true;
+            return null;
+          }
+          if (!response.ok) throw new Error('HTTP ' + response.status);
+          return response.json();
+        })
+        .then(function (payload) {
+          if (!payload) return;
+          cursor = payload.cursor;
+          onUpdate(payload);
+          // Máy chủ trả về ngay (hoặc đã giữ request chờ sự kiện nếu bật long-poll)
+          setTimeout(poll, 2000);
+        })
+        .catch(function () {
+          setTimeout(poll, 5000);
+        });
+    }
+
+    poll();
+    return {
+      stop: function () { stopped = true; }
+    };
+  }
+
+  window.DBPLiveFeed = { subscribe: subscribe };
+})(window);
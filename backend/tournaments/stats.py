@@ -0,0 +1,187 @@
+# backend/tournaments/stats.py
+"""
+Thống kê tổng hợp của một giải đấu (khối "Thống kê" trên trang chi tiết giải).
+
+Toàn bộ số liệu được tính bằng một số lượng cố định các truy vấn GROUP BY,
+không phụ thuộc vào số đội trong giải, và được cache theo từng giải.
+Cache bị xóa khi có Goal/Card/Match/TeamRegistration/Player thay đổi (xem signals.py).
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Tuple
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Card, Goal, Match, Player, Team
+
+STATS_CACHE_TIMEOUT = 60 * 30  # 30 phút; cache bị xóa ngay khi dữ liệu thay đổi
+
+
+@dataclass(frozen=True)
+class TournamentStats:
+    """Kết quả thống kê bất biến của một giải đấu."""
+    total_teams: int = 0
+    total_players: int = 0
+    finished_matches_count: int = 0
+    total_normal_goals: int = 0
+    total_own_goals: int = 0
+    total_yellow_cards: int = 0
+    total_red_cards: int = 0
+    avg_goals_per_match: float = 0
+    hattricks: int = 0
+    top_scorers: Tuple[Player, ...] = field(default_factory=tuple)
+    team_goal_stats: Tuple[dict, ...] = field(default_factory=tuple)
+    team_card_stats: Tuple[dict, ...] = field(default_factory=tuple)
+
+    def as_context(self):
+        """Trả về dict để đưa thẳng vào context của template."""
+        return {
+            'total_teams': self.total_teams,
+            'total_players': self.total_players,
+            'finished_matches_count': self.finished_matches_count,
+            'total_normal_goals': self.total_normal_goals,
+            'total_own_goals': self.total_own_goals,
+            'avg_goals_per_match': self.avg_goals_per_match,
+            'total_yellow_cards': self.total_yellow_cards,
+            'total_red_cards': self.total_red_cards,
+            'hattricks': self.hattricks,
+            'top_scorers': list(self.top_scorers),
+            'team_goal_stats': list(self.team_goal_stats),
+            'team_card_stats': list(self.team_card_stats),
+        }
+
+
+class TournamentStatsService:
+    """
+    Tính thống kê của một giải với số truy vấn cố định.
+
+    Cách dùng:
+        stats = TournamentStatsService(tournament).get()   # có cache
+        stats = TournamentStatsService(tournament).compute()  # luôn tính lại
+    """
+
+    def __init__(self, tournament, top_scorer_limit=5):
+        self.tournament = tournament
+        self.top_scorer_limit = top_scorer_limit
+
+    @staticmethod
+    def cache_key(tournament_id):
+        return f"tournament_stats:{tournament_id}"
+
+    @classmethod
+    def invalidate(cls, tournament_id):
+        if tournament_id:
+            cache.delete(cls.cache_key(tournament_id))
+
+    def get(self):
+        key = self.cache_key(self.tournament.pk)
+        stats = cache.get(key)
+        if stats is None:
+            stats = self.compute()
+            cache.set(key, stats, STATS_CACHE_TIMEOUT)
+        return stats
+
+    def compute(self):
+        tournament = self.tournament
+
+        # 1. Các đội của giải
+        teams = list(Team.objects.filter(registrations__tournament=tournament))
+        team_ids = [team.id for team in teams]
+
+        # 2. Tổng số cầu thủ
+        total_players = Player.objects.filter(team_id__in=team_ids).count()
+
+        # 3. Số trận đã kết thúc
+        finished_matches = Match.objects.filter(tournament=tournament, team1_score__isnull=False)
+        finished_matches_count = finished_matches.count()
+
+        # 4. Tổng bàn thắng / phản lưới (chỉ tính trận đã kết thúc)
+        goal_totals = Goal.objects.filter(match__in=finished_matches).aggregate(
+            normal=Count('id', filter=Q(is_own_goal=False)),
+            own=Count('id', filter=Q(is_own_goal=True)),
+        )
+
+        # 5. Tổng thẻ vàng / đỏ (chỉ tính trận đã kết thúc)
+        card_totals = Card.objects.filter(match__in=finished_matches).aggregate(
+            yellow=Count('id', filter=Q(card_type='YELLOW')),
+            red=Count('id', filter=Q(card_type='RED')),
+        )
+
+        tournament_goals = Goal.objects.filter(match__tournament=tournament, is_own_goal=False)
+
+        # 6. Vua phá lưới
+        top_scorers = tuple(
+            Player.objects.filter(
+                goals__match__tournament=tournament,
+                goals__is_own_goal=False,
+            ).annotate(
+                goal_count=Count('goals')
+            ).select_related('team').order_by('-goal_count')[:self.top_scorer_limit]
+        )
+
+        # 7. Số hat-trick (cầu thủ ghi >= 3 bàn trong một trận)
+        hattricks = tournament_goals.values('player_id', 'match_id').annotate(
+            goals_in_match=Count('id')
+        ).filter(goals_in_match__gte=3).count()
+
+        # 8. Bàn thắng / bàn thua theo đội: một truy vấn GROUP BY (đội ghi bàn, trận)
+        goals_for = defaultdict(int)
+        goals_against = defaultdict(int)
+        per_team_goals = tournament_goals.values(
+            'team_id', 'match__team1_id', 'match__team2_id'
+        ).annotate(n=Count('id'))
+        for row in per_team_goals:
+            scorer_id = row['team_id']
+            goals_for[scorer_id] += row['n']
+            for opponent_id in (row['match__team1_id'], row['match__team2_id']):
+                if opponent_id != scorer_id:
+                    goals_against[opponent_id] += row['n']
+
+        # 9. Thẻ phạt theo đội: một truy vấn GROUP BY (đội, loại thẻ)
+        cards = defaultdict(lambda: {'YELLOW': 0, 'RED': 0})
+        per_team_cards = Card.objects.filter(match__tournament=tournament).values(
+            'team_id', 'card_type'
+        ).annotate(n=Count('id'))
+        for row in per_team_cards:
+            cards[row['team_id']][row['card_type']] = row['n']
+
+        team_goal_stats = [
+            {
+                'team_obj': team,
+                'gf': goals_for[team.id],
+                'ga': goals_against[team.id],
+                'gd': goals_for[team.id] - goals_against[team.id],
+            }
+            for team in teams
+        ]
+        team_goal_stats.sort(key=lambda x: (x['gd'], x['gf']), reverse=True)
+
+        team_card_stats = [
+            {
+                'team_obj': team,
+                'yellow_cards': cards[team.id]['YELLOW'],
+                'red_cards': cards[team.id]['RED'],
+            }
+            for team in teams
+        ]
+        team_card_stats.sort(key=lambda x: (x['red_cards'], x['yellow_cards']), reverse=True)
+
+        total_normal_goals = goal_totals['normal']
+        avg_goals_per_match = round(total_normal_goals / finished_matches_count, 2) if finished_matches_count > 0 else 0
+
+        return TournamentStats(
+            total_teams=len(teams),
+            total_players=total_players,
+            finished_matches_count=finished_matches_count,
+            total_normal_goals=total_normal_goals,
+            total_own_goals=goal_totals['own'],
+            total_yellow_cards=card_totals['yellow'],
+            total_red_cards=card_totals['red'],
+            avg_goals_per_match=avg_goals_per_match,
+            hattricks=hattricks,
+            top_scorers=top_scorers,
+            team_goal_stats=tuple(team_goal_stats),
+            team_card_stats=tuple(team_card_stats),
+        )
@@ -0,0 +1,230 @@
+# backend/tournaments/unread_counters.py
+"""
+Bộ đếm "chưa đọc" của từng người dùng (UserBadgeCounter).
+
+Badge thông báo/tin tức trên thanh điều hướng chỉ đọc một dòng theo khóa chính,
+thay vì COUNT(*) trên toàn bộ lịch sử thông báo mỗi lần render trang.
+Các bộ đếm được cập nhật tại chỗ khi dữ liệu thay đổi:
+- Notification: NotificationQuerySet (bulk_create/update/delete) và signals.py.
+- Announcement: signals.py (đăng/gỡ tin, đánh dấu đã đọc, theo dõi giải,
+  thay đổi đội trưởng/cầu thủ/đăng ký giải).
+Lệnh `python manage.py reconcile_unread_counters` tính lại từ dữ liệu gốc
+để sửa mọi sai lệch (nên chạy định kỳ).
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F
+
+from dbpsports_core.user_chrome import bump_users
+
+from .models import Announcement, Notification, TeamRegistration, Tournament, UserBadgeCounter
+
+NOTIFICATIONS = 'unread_notifications'
+ANNOUNCEMENTS = 'unread_announcements'
+
+
+def _clean(user_ids):
+    return {user_id for user_id in user_ids if user_id}
+
+
+# --- Tính lại từ dữ liệu gốc (số truy vấn cố định, không phụ thuộc số người dùng) ---
+
+def count_unread_notifications(user_ids):
+    counts = dict.fromkeys(user_ids, 0)
+    rows = Notification.objects.filter(user_id__in=user_ids, is_read=False).values('user_id').annotate(n=Count('id'))
+    for row in rows:
+        counts[row['user_id']] = row['n']
+    return counts
+
+
+def count_unread_announcements(user_ids):
+    """
+    Số tin tức đã công khai mà người dùng chưa đọc, trong các giải họ làm đội trưởng,
+    là cầu thủ hoặc đang theo dõi (tin "Chỉ gửi cho Đội trưởng" chỉ tính cho đội trưởng).
+    """
+    captain_of = defaultdict(set)
+    member_of = defaultdict(set)
+    for user_id, tournament_id in TeamRegistration.objects.filter(
+        team__captain_id__in=user_ids
+    ).values_list('team__captain_id', 'tournament_id'):
+        captain_of[user_id].add(tournament_id)
+        member_of[user_id].add(tournament_id)
+    for user_id, tournament_id in TeamRegistration.objects.filter(
+        team__players__user_id__in=user_ids
+    ).values_list('team__players__user_id', 'tournament_id'):
+        member_of[user_id].add(tournament_id)
+    for user_id, tournament_id in Tournament.followers.through.objects.filter(
+        user_id__in=user_ids
+    ).values_list('user_id', 'tournament_id'):
+        member_of[user_id].add(tournament_id)
+
+    tournament_ids = set().union(*member_of.values())
+    announcements_by_tournament = defaultdict(list)
+    announcement_ids = []
+    for announcement_id, tournament_id, audience in Announcement.objects.filter(
+        tournament_id__in=tournament_ids, is_published=True
+    ).values_list('id', 'tournament_id', 'audience'):
+        announcements_by_tournament[tournament_id].append((announcement_id, audience))
+        announcement_ids.append(announcement_id)
+
+    read = set(Announcement.read_by.through.objects.filter(
+        user_id__in=user_ids, announcement_id__in=announcement_ids
+    ).values_list('user_id', 'announcement_id'))
+
+    counts = {}
+    for user_id in user_ids:
+        counts[user_id] = sum(
+            1
+            for tournament_id in member_of[user_id]
+            for announcement_id, audience in announcements_by_tournament[tournament_id]
+            if (audience == 'PUBLIC' or tournament_id in captain_of[user_id])
+            and (user_id, announcement_id) not in read
+        )
+    return counts
+
+
+def announcement_audience(tournament_id, audience):
+    """ID những người dùng nhìn thấy tin tức của giải này với đối tượng audience."""
+    registrations = TeamRegistration.objects.filter(tournament_id=tournament_id)
+    user_ids = set(registrations.values_list('team__captain_id', flat=True))
+    if audience != 'CAPTAINS_ONLY':
+        user_ids.update(registrations.values_list('team__players__user_id', flat=True))
+        user_ids.update(
+            Tournament.followers.through.objects.filter(tournament_id=tournament_id).values_list('user_id', flat=True)
+        )
+    return _clean(user_ids)
+
+
+# --- Ghi bộ đếm ---
+
+def ensure_counters(user_ids):
+    """Tạo dòng bộ đếm (đã tính đúng) cho những người dùng chưa có. Trả về tập ID vừa tạo."""
+    user_ids = _clean(user_ids)
+    if not user_ids:
+        return set()
+    missing = user_ids - set(UserBadgeCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    if missing:
+        notifications = count_unread_notifications(missing)
+        announcements = count_unread_announcements(missing)
+        UserBadgeCounter.objects.bulk_create(
+            [
+                UserBadgeCounter(
+                    user_id=user_id,
+                    unread_notifications=notifications[user_id],
+                    unread_announcements=announcements[user_id],
+                )
+                for user_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+        bump_users(*missing)
+    return missing
+
+
+def _add(field, deltas, create_missing=True):
+    """Cộng/trừ bộ đếm bằng F() (an toàn khi nhiều request cùng ghi)."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id and delta}
+    if not deltas:
+        return
+    # Dòng mới tạo đã được tính từ dữ liệu gốc (đã gồm thay đổi này)
+    created = ensure_counters(deltas) if create_missing else set()
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if user_id not in created:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        UserBadgeCounter.objects.filter(user_id__in=user_ids).update(**{field: F(field) + delta})
+    bump_users(*deltas)
+
+
+def _set(field, counts):
+    if not counts:
+        return
+    created = ensure_counters(counts)
+    rows = UserBadgeCounter.objects.filter(user_id__in=set(counts) - created)
+    changed = []
+    for row in rows:
+        if getattr(row, field) != counts[row.user_id]:
+            setattr(row, field, counts[row.user_id])
+            changed.append(row)
+    if changed:
+        UserBadgeCounter.objects.bulk_update(changed, [field])
+        bump_users(*(row.user_id for row in changed))
+
+
+def add_notifications(user_ids):
+    """Mỗi phần tử của user_ids là một thông báo chưa đọc mới của người dùng đó."""
+    _add(NOTIFICATIONS, Counter(user_ids))
+
+
+def remove_notifications(user_ids):
+    # Không tạo dòng mới: người dùng chưa có bộ đếm sẽ được tính đúng khi tạo
+    _add(NOTIFICATIONS, {user_id: -n for user_id, n in Counter(user_ids).items()}, create_missing=False)
+
+
+def recount_notifications(user_ids):
+    user_ids = _clean(user_ids)
+    if user_ids:
+        _set(NOTIFICATIONS, count_unread_notifications(user_ids))
+
+
+def recount_announcements(user_ids):
+    user_ids = _clean(user_ids)
+    if user_ids:
+        _set(ANNOUNCEMENTS, count_unread_announcements(user_ids))
+
+
+def shift_announcement(announcement_id, tournament_id, audience, delta):
+    """
+    Một tin tức bắt đầu (delta=1) hoặc thôi (delta=-1) hiển thị cho đối tượng của nó:
+    cộng/trừ bộ đếm của những người trong đối tượng chưa đọc tin này.
+    """
+    user_ids = announcement_audience(tournament_id, audience)
+    if announcement_id:
+        user_ids -= set(
+            Announcement.read_by.through.objects.filter(announcement_id=announcement_id).values_list('user_id', flat=True)
+        )
+    # Khi gỡ tin, người chưa có bộ đếm sẽ được tính đúng lúc tạo (không cần trừ)
+    _add(ANNOUNCEMENTS, dict.fromkeys(user_ids, delta), create_missing=delta > 0)
+
+
+# --- Đối soát định kỳ ---
+
+def reconcile(user_ids, dry_run=False):
+    """
+    Tính lại bộ đếm của các người dùng này từ dữ liệu gốc và sửa những dòng sai lệch.
+    Trả về danh sách (user_id, giá trị cũ, giá trị đúng) của các dòng bị sai.
+    """
+    user_ids = _clean(user_ids)
+    if not user_ids:
+        return []
+    notifications = count_unread_notifications(user_ids)
+    announcements = count_unread_announcements(user_ids)
+    existing = UserBadgeCounter.objects.in_bulk(user_ids)
+
+    drift = []
+    changed = []
+    missing = []
+    for user_id in sorted(user_ids):
+        expected = (notifications[user_id], announcements[user_id])
+        row = existing.get(user_id)
+        current = (row.unread_notifications, row.unread_announcements) if row else None
+        if current == expected:
+            continue
+        drift.append((user_id, current, expected))
+        if row:
+            row.unread_notifications, row.unread_announcements = expected
+            changed.append(row)
+        else:
+            missing.append(UserBadgeCounter(
+                user_id=user_id, unread_notifications=expected[0], unread_announcements=expected[1],
+            ))
+
+    if not dry_run:
+        if changed:
+            UserBadgeCounter.objects.bulk_update(changed, [NOTIFICATIONS, ANNOUNCEMENTS])
+        if missing:
+            UserBadgeCounter.objects.bulk_create(missing, ignore_conflicts=True)
+        bump_users(*(user_id for user_id, _, _ in drift))
+    return drift
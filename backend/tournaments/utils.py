@@ -1,10 +1,9 @@
-from django.core.mail import send_mail
+from dbpsports_core.outbox import queue_mail
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.contrib import messages # <--- THÊM DÒNG NÀY
 from .models import Notification
 from django.urls import reverse
-import math
 from django.contrib.auth.models import User  
 
 # === THAY ĐỔI: Thêm "request=None" vào tham số của hàm ===
@@ -17,15 +16,16 @@ def send_notification_email(subject, template_name, context, recipient_list, req
     try:
         html_message = render_to_string(template_name, context)
 
-        send_mail(
+        # Xếp vào hàng đợi, worker process_email_outbox sẽ gửi (không chờ máy chủ mail)
+        queue_mail(
             subject=subject,
             message='',
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=recipient_list,
             html_message=html_message,
-            fail_silently=False,
+            category='tournaments.notification',
         )
-        print(f"Email notification sent: '{subject}' to {recipient_list}")
+        print(f"Email notification queued: '{subject}' to {recipient_list}")
         return True # <-- THÊM DÒNG NÀY: Báo hiệu thành công
 
     except Exception as e:
@@ -73,24 +73,10 @@ def send_schedule_notification(tournament, notification_type, title, message, ur
 # Tính giá trị của một phiếu bầu dựa trên công thức logarit để tăng trưởng mượt mà
 def get_current_vote_value():
     """
-    Tính giá trị của một phiếu bầu dựa trên công thức logarit để tăng trưởng mượt mà.
+    Giá trị của một phiếu bầu (đọc từ cache, xem tournaments/valuation.py).
     """
-    user_count = User.objects.count()
-
-    # Tránh lỗi log(0) hoặc log(1)
-    if user_count < 2:
-        user_count = 2
-
-    # --- CÔNG THỨC LOGARIT ---
-    # Bạn có thể điều chỉnh 2 con số này để thay đổi "nền kinh tế"
-    base_value = 5000  # Giá trị khởi điểm
-    scaling_factor = 2500  # Hệ số ảnh hưởng, số càng lớn giá trị tăng càng nhanh
-
-    # Công thức: vote = base + factor * log(số người dùng)
-    vote_value = base_value + (scaling_factor * math.log(user_count))
-    
-    # Làm tròn đến hàng trăm gần nhất cho số đẹp
-    return round(vote_value / 100) * 100
+    from .valuation import get_vote_value
+    return get_vote_value()
 
 
 def user_can_manage_team(user, team):
@@ -0,0 +1,142 @@
+# backend/tournaments/valuation.py
+"""
+Giá trị một phiếu bầu và giá trị thị trường của cầu thủ.
+
+Giá trị phiếu bầu tăng theo logarit của số người dùng, làm tròn tới hàng trăm, nên
+chỉ đổi khi số người dùng vượt qua một ngưỡng. Giá trị hiện tại được lưu trong
+VoteValueState (kèm số phiên bản và khoảng số người dùng còn giữ nguyên giá trị)
+và cache dùng chung, nên các trang không phải đếm User mỗi lần.
+
+Giá trị được tính lại khi:
+    - cache hết hạn (VOTE_VALUE_REFRESH_SECONDS), hoặc chạy `python manage.py refresh_vote_value`;
+    - số người dùng vượt ra ngoài khoảng của giá trị hiện tại (receiver User trong signals.py).
+
+Player.market_value = transfer_value + votes * giá trị phiếu bầu được lưu sẵn (có chỉ mục)
+để thị trường chuyển nhượng sắp xếp theo cột thay vì tính biểu thức cho mọi cầu thủ.
+Player.save() tự cập nhật cột này; khi giá trị phiếu bầu đổi, toàn bộ cầu thủ được
+cập nhật bằng một câu UPDATE.
+"""
+
+import math
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+
+from .models import Player, VoteValueState
+
+CACHE_KEY = 'vote_value:state'
+
+# --- CÔNG THỨC LOGARIT ---
+# Có thể điều chỉnh 2 con số này để thay đổi "nền kinh tế"
+BASE_VALUE = 5000  # Giá trị khởi điểm
+SCALING_FACTOR = 2500  # Hệ số ảnh hưởng, số càng lớn giá trị tăng càng nhanh
+
+
+def compute_vote_value(user_count):
+    """Giá trị một phiếu bầu: base + factor * log(số người dùng), làm tròn tới hàng trăm."""
+    # Tránh lỗi log(0) hoặc log(1)
+    user_count = max(user_count, 2)
+    vote_value = BASE_VALUE + (SCALING_FACTOR * math.log(user_count))
+    return round(vote_value / 100) * 100
+
+
+def user_count_range(user_count):
+    """
+    Khoảng số người dùng [min, next) cho cùng giá trị phiếu bầu với `user_count`
+    (giá trị tăng dần theo số người dùng nên tìm nhị phân được).
+    """
+    value = compute_vote_value(user_count)
+
+    low, high = 0, user_count
+    while low < high:
+        middle = (low + high) // 2
+        if compute_vote_value(middle) < value:
+            low = middle + 1
+        else:
+            high = middle
+
+    upper = max(user_count, 2) * 2
+    while compute_vote_value(upper) == value:
+        upper *= 2
+    next_low, next_high = user_count + 1, upper
+    while next_low < next_high:
+        middle = (next_low + next_high) // 2
+        if compute_vote_value(middle) > value:
+            next_high = middle
+        else:
+            next_low = middle + 1
+    return low, next_low
+
+
+def market_value_expression(vote_value):
+    return F('transfer_value') + F('votes') * Value(vote_value)
+
+
+def sync_market_values(players, vote_value=None):
+    """Cập nhật market_value cho queryset cầu thủ (sau khi đổi votes/transfer_value bằng update())."""
+    if vote_value is None:
+        vote_value = get_vote_value()
+    return players.update(market_value=market_value_expression(vote_value))
+
+
+def _state(row):
+    return {
+        'value': row.value,
+        'version': row.version,
+        'min_user_count': row.min_user_count,
+        'next_user_count': row.next_user_count,
+    }
+
+
+def _cache_state(state):
+    cache.set(CACHE_KEY, state, getattr(settings, 'VOTE_VALUE_REFRESH_SECONDS', 3600))
+    return state
+
+
+def refresh_vote_value(force=False):
+    """
+    Đếm lại người dùng và cập nhật giá trị phiếu bầu nếu đã đổi (force=True: luôn cập
+    nhật lại market_value của mọi cầu thủ). Trả về dict: value, version, min_user_count, next_user_count.
+    """
+    user_count = User.objects.count()
+    value = compute_vote_value(user_count)
+    min_user_count, next_user_count = user_count_range(user_count)
+
+    with transaction.atomic():
+        row, created = VoteValueState.objects.select_for_update().get_or_create(
+            pk=1, defaults={'value': value, 'version': 1, 'user_count': user_count,
+                            'min_user_count': min_user_count, 'next_user_count': next_user_count},
+        )
+        if created or force or row.value != value:
+            if not created:
+                row.value = value
+                row.version += 1
+            row.user_count = user_count
+            row.min_user_count = min_user_count
+            row.next_user_count = next_user_count
+            row.save()
+            sync_market_values(Player.objects.all(), value)
+    return _cache_state(_state(row))
+
+
+def get_vote_state():
+    state = cache.get(CACHE_KEY)
+    if state is None:
+        state = refresh_vote_value()
+    return state
+
+
+def get_vote_value():
+    """Giá trị hiện tại của một phiếu bầu (đọc từ cache)."""
+    return get_vote_state()['value']
+
+
+def check_user_count():
+    """Tính lại giá trị phiếu bầu nếu số người dùng đã ra khỏi khoảng của giá trị hiện tại."""
+    state = get_vote_state()
+    user_count = User.objects.count()
+    if not state['min_user_count'] <= user_count < state['next_user_count']:
+        refresh_vote_value()
@@ -2,11 +2,9 @@
 
 # Standard library
 import json
-import random
 import os
 from collections import defaultdict
-from datetime import date, datetime, time, timedelta
-from itertools import combinations
+from datetime import date, datetime, timedelta
 from PIL import Image
 from io import BytesIO
 from django.core.files.base import ContentFile
@@ -28,24 +26,20 @@ def create_main_shop_order_from_registration(request, team, registration):
     """
     Tạo đơn hàng Main Shop tự động khi đội trưởng thanh toán lệ phí giải
     """
-    from shop.models import Cart, Order, OrderItem
+    from shop import stock
+    from shop.models import Cart, Order
     
     try:
         # Lấy cart của user
         try:
             cart = Cart.objects.get(user=request.user)
-            cart_items = cart.items.all()
+            cart_items = list(cart.items.select_related('product', 'size'))
         except Cart.DoesNotExist:
             return None
         
         if not cart_items:
             return None
         
-        # Kiểm tra tồn kho
-        for cart_item in cart_items:
-            if cart_item.product.stock_quantity < cart_item.quantity:
-                raise Exception(f'Sản phẩm "{cart_item.product.name}" không đủ hàng trong kho.')
-        
         # Lấy thông tin từ team captain
         captain = team.captain
         
@@ -55,6 +49,8 @@ def create_main_shop_order_from_registration(request, team, registration):
         
         # Tạo đơn hàng
         with transaction.atomic():
+            # Trừ tồn kho có điều kiện; không đủ hàng thì raise và không tạo đơn
+            stock.reserve(stock.MAIN_SHOP, cart_items)
             order = Order.objects.create(
                 user=request.user,
                 customer_name=captain.get_full_name() or captain.username,
@@ -72,17 +68,7 @@ def create_main_shop_order_from_registration(request, team, registration):
             )
             
             # Tạo order items
-            for cart_item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.current_price
-                )
-                
-                # Cập nhật tồn kho
-                cart_item.product.stock_quantity -= cart_item.quantity
-                cart_item.product.save()
+            stock.create_order_items(stock.MAIN_SHOP, order, cart_items)
             
             # Xóa cart
             cart.delete()
@@ -105,36 +91,26 @@ def create_organization_shop_order_from_registration(request, organization, team
     """
     Tạo đơn hàng Organization Shop tự động khi đội trưởng thanh toán lệ phí giải
     """
-    from shop.organization_models import OrganizationCart, OrganizationOrder, OrganizationOrderItem
+    from shop import stock
+    from shop.organization_models import OrganizationCart, OrganizationOrder
     
     try:
         # Lấy cart của user
         try:
             cart = OrganizationCart.objects.get(user=request.user, organization=organization)
-            cart_items = cart.items.all()
+            cart_items = list(cart.items.select_related('product', 'size'))
         except OrganizationCart.DoesNotExist:
             return None
         
         if not cart_items:
             return None
         
-        # Kiểm tra tồn kho và tính discount
-        total_profit = 0
-        for cart_item in cart_items:
-            if cart_item.product.stock_quantity < cart_item.quantity:
-                raise Exception(f'Sản phẩm "{cart_item.product.name}" không đủ hàng trong kho.')
-            
-            # Tính profit cho discount
-            if cart_item.product.cost_price:
-                profit_per_item = cart_item.product.profit_amount
-                total_profit += profit_per_item * cart_item.quantity
-        
         # Lấy thông tin từ team captain
         captain = team.captain
         
         # Tính discount và phí vận chuyển
         tournament = registration.tournament
-        discount_amount = tournament.calculate_organization_shop_discount(cart_items)
+        discount_amount = quote_registration(tournament, request.user).organization.discount
         
         subtotal = cart.total_price
         final_subtotal = subtotal - discount_amount
@@ -152,6 +128,8 @@ def create_organization_shop_order_from_registration(request, organization, team
         
         # Tạo đơn hàng
         with transaction.atomic():
+            # Trừ tồn kho có điều kiện; không đủ hàng thì raise và không tạo đơn
+            stock.reserve(stock.ORGANIZATION_SHOP, cart_items)
             order = OrganizationOrder.objects.create(
                 organization=organization,
                 user=request.user,
@@ -171,23 +149,7 @@ def create_organization_shop_order_from_registration(request, organization, team
             )
             
             # Tạo order items
-            for cart_item in cart_items:
-                OrganizationOrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.product.current_price
-                )
-                
-                # Cập nhật tồn kho
-                if cart_item.product.has_sizes and cart_item.size:
-                    variant = cart_item.product.variants.filter(size=cart_item.size).first()
-                    if variant:
-                        variant.stock_quantity -= cart_item.quantity
-                        variant.save()
-                else:
-                    cart_item.product.stock_quantity -= cart_item.quantity
-                    cart_item.product.save()
+            stock.create_order_items(stock.ORGANIZATION_SHOP, order, cart_items)
             
             # Xóa cart
             cart.delete()
@@ -279,7 +241,7 @@ from django.contrib.auth.models import User
 from django.core import serializers
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
-from django.db.models import Avg, Count, F, Prefetch, Q, Sum, Value
+from django.db.models import Avg, Count, F, OuterRef, Prefetch, Q, Subquery, Sum
 from django.db import models
 from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
@@ -289,6 +251,7 @@ from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_POST
 
 # Project apps
+from dbpsports_core import cache_namespaces, page_cache, pagination, search
 from organizations.forms import (
     CardForm,
     GoalForm,
@@ -355,7 +318,18 @@ from .models import (
     VoteRecord,
     SponsorshipPackage,
 )
+from shop.cart_summary import prefetch_items
 from shop.models import Cart
+from .standings import get_tournament_standings
+from . import live_feed, match_sync
+from .bulk_fixtures import create_fixtures
+from .career_stats import player_profile_stats
+from .homepage import HomepageSections
+from .player_stats import match_stat_lines, player_match_lines
+from .scheduling import ScheduleConstraints, generate_schedule, parse_time_slots
+from .scoring import adjust_score, set_score
+from .shop_pricing import quote_registration
+from .stats import TournamentStatsService
 from .utils import (
     get_current_vote_value,
     send_notification_email,
@@ -365,63 +339,16 @@ from .utils import (
 #==================================
 
 def home(request):
-    from django.db.models import Count
-    
-    # Lấy banner
-    banners = HomeBanner.objects.filter(is_active=True).order_by('order', 'id')
-    
-    # Giải đấu nổi bật - Kết hợp giải Super Admin + giải nhiều followers
-    # 1. Lấy giải của Super Admin trước (không có organization)
-    super_admin_tournaments = list(Tournament.objects.filter(
-        organization__isnull=True
-    ).exclude(status='FINISHED').annotate(
-        followers_count=Count('followers')
-    ).order_by('-followers_count', '-start_date'))
-    
-    # 2. Tính số giải còn thiếu để đủ 4 giải
-    remaining_count = 4 - len(super_admin_tournaments)
-    
-    # 3. Nếu còn thiếu, lấy thêm giải có nhiều followers nhất từ BTC khác
-    featured_tournaments = super_admin_tournaments
-    if remaining_count > 0:
-        # Lấy ID các giải đã có để loại trừ
-        existing_ids = [t.id for t in super_admin_tournaments]
-        
-        # Lấy thêm giải có nhiều followers từ BTC khác
-        additional_tournaments = list(Tournament.objects.exclude(
-            status='FINISHED'
-        ).exclude(
-            id__in=existing_ids
-        ).annotate(
-            followers_count=Count('followers')
-        ).filter(followers_count__gt=0).order_by('-followers_count')[:remaining_count])
-        
-        featured_tournaments.extend(additional_tournaments)
-    
-    # Giải nhiều người theo dõi nhất (loại trừ các giải đã ở featured)
-    featured_ids = [t.id for t in featured_tournaments]
-    most_followed_tournaments = Tournament.objects.exclude(
-        status='FINISHED'
-    ).exclude(
-        id__in=featured_ids
-    ).annotate(
-        followers_count=Count('followers')
-    ).filter(followers_count__gt=0).order_by('-followers_count')[:6]
-    
-    # Tất cả các giải đang hoạt động
-    all_active_tournaments = Tournament.objects.exclude(
-        status='FINISHED'
-    ).order_by('-start_date')
-
-    return render(
-        request,
-        'tournaments/home.html',
-        {
-            'banners': banners,
-            'featured_tournaments': featured_tournaments,
-            'most_followed_tournaments': most_followed_tournaments,
-            'all_active_tournaments': all_active_tournaments,
-        }
+    # Các khối được cache riêng và chỉ tính khi template dùng tới (xem homepage.py)
+    return render(request, 'tournaments/home.html', HomepageSections().as_context())
+
+def _match_surrogate_keys(match):
+    """Trang trận đấu hiển thị cả giải và hai đội: cache của trang bị làm mới khi chúng đổi."""
+    return (
+        cache_namespaces.match_namespace(match.pk),
+        cache_namespaces.tournament_namespace(match.tournament_id),
+        cache_namespaces.team_namespace(match.team1_id),
+        cache_namespaces.team_namespace(match.team2_id),
     )
 
 @never_cache
@@ -479,6 +406,7 @@ def livestream_view(request, pk=None):
     comment_form = CommentForm()
 
     if live_match:
+        page_cache.add_surrogate_keys(request, *_match_surrogate_keys(live_match))
         # Xử lý khi người dùng gửi bình luận mới (POST request)
         if request.method == 'POST' and request.user.is_authenticated:
             form = CommentForm(request.POST)
@@ -513,6 +441,7 @@ def livestream_view(request, pk=None):
         "ticker_text": ticker_text_to_display,
         "comments": comments, # Gửi comments ra template
         "comment_form": comment_form, # Gửi form ra template
+        "live_cursor": live_feed.current_cursor(live_match.pk) if live_match else None,
     }
     return render(request, "tournaments/livestream.html", context)
 
@@ -522,8 +451,9 @@ def tournament_detail(request, pk):
     tournament = get_object_or_404(
         Tournament.objects.prefetch_related(
             Prefetch('groups', queryset=Group.objects.order_by('name').prefetch_related(
-                Prefetch('registrations__team', queryset=Team.objects.select_related('captain'))
+                Prefetch('registrations', queryset=TeamRegistration.objects.select_related('team__captain').annotate(player_count=Count('team__players')))
             )),
+            Prefetch('registrations', queryset=TeamRegistration.objects.select_related('team__captain').annotate(player_count=Count('team__players'))),
             'photos',
             # Sửa dòng này để tối ưu hơn
             Prefetch('sponsorships', queryset=Sponsorship.objects.filter(is_active=True).select_related('package', 'sponsor__sponsor_profile'))
@@ -544,7 +474,9 @@ def tournament_detail(request, pk):
     ).distinct()
 
     # Lọc trận theo thể thức
-    group_matches = all_matches.filter(match_round=('LEAGUE' if tournament.format == Tournament.Format.LEAGUE else 'GROUP'))
+    group_matches = all_matches.filter(match_round=('LEAGUE' if tournament.format == Tournament.Format.LEAGUE else 'GROUP')).annotate(
+        team1_group_id=Subquery(TeamRegistration.objects.filter(team=OuterRef('team1'), tournament=tournament).values('group_id')[:1])
+    )
     # SỬA LỖI: Truy vấn các đội chưa được xếp bảng thông qua TeamRegistration
     unassigned_teams = Team.objects.filter(registrations__tournament=tournament, registrations__payment_status='PAID', registrations__group__isnull=True)
 
@@ -576,118 +508,11 @@ def tournament_detail(request, pk):
     }
     # === KẾT THÚC PHẦN CẬP NHẬT LOGIC KNOCKOUT ===
 
-    # Phần tính toán bảng xếp hạng
-    standings_data = defaultdict(list)
-    groups_with_teams = list(tournament.groups.all())
-
-    team_stats = {}
-    # SỬA LỖI: Lấy các đội đã đăng ký và được duyệt
-    registered_teams = Team.objects.filter(registrations__tournament=tournament, registrations__payment_status='PAID').prefetch_related('registrations')
-    for team in registered_teams:
-        team_stats[team.id] = {
-            'played': 0, 'wins': 0, 'draws': 0, 'losses': 0,
-            'gf': 0, 'ga': 0, 'gd': 0, 'points': 0, 'team_obj': team
-        }
-
-
-    finished_group_matches = group_matches.filter(team1_score__isnull=False, team2_score__isnull=False)
-
-    for match in finished_group_matches:
-        team1_id, team2_id = match.team1_id, match.team2_id
-        score1, score2 = match.team1_score, match.team2_score
-
-        if team1_id in team_stats and team2_id in team_stats:
-            team_stats[team1_id]['played'] += 1
-            team_stats[team2_id]['played'] += 1
-            team_stats[team1_id]['gf'] += score1; team_stats[team1_id]['ga'] += score2
-            team_stats[team2_id]['gf'] += score2; team_stats[team2_id]['ga'] += score1
-
-            if score1 > score2:
-                team_stats[team1_id]['wins'] += 1; team_stats[team1_id]['points'] += 3
-                team_stats[team2_id]['losses'] += 1
-            elif score2 > score1:
-                team_stats[team2_id]['wins'] += 1; team_stats[team2_id]['points'] += 3
-                team_stats[team1_id]['losses'] += 1
-            else:
-                team_stats[team1_id]['draws'] += 1; team_stats[team1_id]['points'] += 1
-                team_stats[team2_id]['draws'] += 1; team_stats[team2_id]['points'] += 1
-
-    if tournament.format == Tournament.Format.LEAGUE:
-        # League: một bảng duy nhất 'LEAGUE'
-        league_team_ids = tournament.registrations.filter(payment_status='PAID').values_list('team_id', flat=True)
-        league_standings = [team_stats[tid] for tid in league_team_ids if tid in team_stats]
-        for stats in league_standings:
-            stats['gd'] = stats['gf'] - stats['ga']
-        league_standings.sort(key=lambda x: (x['points'], x['gd'], x['gf']), reverse=True)
-        standings_data['LEAGUE'] = league_standings
-    else:
-        for group in groups_with_teams:
-            # SỬA LỖI: Lấy teams trong group thông qua registrations
-            teams_in_group_ids = TeamRegistration.objects.filter(group=group).values_list('team_id', flat=True)
-            group_standings = [team_stats[team_id] for team_id in teams_in_group_ids if team_id in team_stats]
-
-            for stats in group_standings:
-                stats['gd'] = stats['gf'] - stats['ga']
-
-            group_standings.sort(key=lambda x: (x['points'], x['gd'], x['gf']), reverse=True)
-            standings_data[group.id] = group_standings
-
-
-    # SỬA LỖI: Thay thế tournament.teams.all()
-    all_teams_in_tournament = Team.objects.filter(registrations__tournament=tournament)
-    total_teams = all_teams_in_tournament.count()
-    total_players = Player.objects.filter(team__in=all_teams_in_tournament).count()
-    finished_matches = all_matches.filter(team1_score__isnull=False)
-    finished_matches_count = finished_matches.count()
+    # Phần bảng xếp hạng: đọc từ bảng TeamStanding đã tổng hợp sẵn
+    standings_data = get_tournament_standings(tournament)
 
-    total_goals_obj = Goal.objects.filter(match__in=finished_matches)
-    total_own_goals = total_goals_obj.filter(is_own_goal=True).count()
-    total_normal_goals = total_goals_obj.filter(is_own_goal=False).count()
-
-    total_cards_obj = Card.objects.filter(match__in=finished_matches)
-    total_yellow_cards = total_cards_obj.filter(card_type='YELLOW').count()
-    total_red_cards = total_cards_obj.filter(card_type='RED').count()
-
-    avg_goals_per_match = round(total_normal_goals / finished_matches_count, 2) if finished_matches_count > 0 else 0
-
-    top_scorers = Player.objects.filter(
-        goals__match__tournament=tournament,
-        goals__is_own_goal=False
-    ).annotate(
-        goal_count=Count('goals')
-    ).select_related('team').order_by('-goal_count')[:5]
-
-    hattricks = Player.objects.filter(
-        goals__match__tournament=tournament,
-        goals__is_own_goal=False
-    ).values('full_name', 'team__name', 'goals__match_id').annotate(
-        goals_in_match=Count('id')
-    ).filter(goals_in_match__gte=3).count()
-
-    team_goal_stats = []
-    team_card_stats = []
-    for team in all_teams_in_tournament:
-        goals_for = Goal.objects.filter(team=team, is_own_goal=False).count()
-        goals_against_matches_as_team1 = Goal.objects.filter(match__team1=team, is_own_goal=False).exclude(team=team)
-        goals_against_matches_as_team2 = Goal.objects.filter(match__team2=team, is_own_goal=False).exclude(team=team)
-        goals_against = goals_against_matches_as_team1.count() + goals_against_matches_as_team2.count()
-        team_goal_stats.append({
-            'team_obj': team,
-            'gf': goals_for,
-            'ga': goals_against,
-            'gd': goals_for - goals_against
-        })
-
-        yellow_cards = Card.objects.filter(team=team, card_type='YELLOW').count()
-        red_cards = Card.objects.filter(team=team, card_type='RED').count()
-        team_card_stats.append({
-            'team_obj': team,
-            'yellow_cards': yellow_cards,
-            'red_cards': red_cards
-        })
-
-    team_goal_stats.sort(key=lambda x: (x['gd'], x['gf']), reverse=True)
-    team_card_stats.sort(key=lambda x: (x['red_cards'], x['yellow_cards']), reverse=True)
+    # Khối thống kê: số truy vấn cố định, cache theo giải (xem tournaments/stats.py)
+    tournament_stats = TournamentStatsService(tournament).get()
 
     # SỬA LỖI: Kiểm tra đội đã thanh toán qua TeamRegistration
     has_paid_teams = tournament.registrations.filter(payment_status='PAID').exists()
@@ -736,19 +561,7 @@ def tournament_detail(request, pk):
         'unassigned_teams': unassigned_teams,
         'standings_data': standings_data,
         'has_paid_teams': has_paid_teams,
-
-        'total_teams': total_teams,
-        'total_players': total_players,
-        'finished_matches_count': finished_matches_count,
-        'total_normal_goals': total_normal_goals,
-        'total_own_goals': total_own_goals,
-        'avg_goals_per_match': avg_goals_per_match,
-        'total_yellow_cards': total_yellow_cards,
-        'total_red_cards': total_red_cards,
-        'hattricks': hattricks,
-        'top_scorers': top_scorers,
-        'team_goal_stats': team_goal_stats,
-        'team_card_stats': team_card_stats,
+        **tournament_stats.as_context(),
         'matches_with_galleries': matches_with_galleries,
         'sorted_sponsorships': sorted_sponsorships,
         'has_organization_shop': has_organization_shop,
@@ -956,6 +769,7 @@ def match_detail(request, pk):
         Match.objects.select_related('tournament', 'team1', 'team2'),
         pk=pk
     )
+    page_cache.add_surrogate_keys(request, *_match_surrogate_keys(match))
 
     weather_data = None
     if match.match_time and timezone.now() < match.match_time < timezone.now() + timedelta(days=14):
@@ -971,30 +785,11 @@ def match_detail(request, pk):
         key=lambda x: x.created_at
     )
 
-    def get_team_lineup_with_stats(team):
-        lineup_entries = Lineup.objects.filter(match=match, team=team).select_related('player')
-        lineup_with_stats = []
-        for entry in lineup_entries:
-            player = entry.player
-            goals_in_this_match = all_goals_in_match.filter(player=player, is_own_goal=False).count()
-            yellow_cards_in_this_match = all_cards_in_match.filter(player=player, card_type='YELLOW').count()
-            red_cards_in_this_match = all_cards_in_match.filter(player=player, card_type='RED').count()
-            lineup_with_stats.append({
-                'player': player,
-                'status': entry.get_status_display(),
-                'goals': goals_in_this_match,
-                'yellow_cards': yellow_cards_in_this_match,
-                'red_cards': red_cards_in_this_match,
-            })
-        return lineup_with_stats
-
-    team1_lineup_full = get_team_lineup_with_stats(match.team1)
-    team2_lineup_full = get_team_lineup_with_stats(match.team2)
-
-    team1_starters = [p for p in team1_lineup_full if p['status'] == 'Đá chính']
-    team1_substitutes = [p for p in team1_lineup_full if p['status'] == 'Dự bị']
-    team2_starters = [p for p in team2_lineup_full if p['status'] == 'Đá chính']
-    team2_substitutes = [p for p in team2_lineup_full if p['status'] == 'Dự bị']
+    stat_lines = match_stat_lines(match)
+    team1_starters = stat_lines[match.team1_id]['starters']
+    team1_substitutes = stat_lines[match.team1_id]['substitutes']
+    team2_starters = stat_lines[match.team2_id]['starters']
+    team2_substitutes = stat_lines[match.team2_id]['substitutes']
 
     captain_team = None
     if request.user.is_authenticated:
@@ -1015,6 +810,7 @@ def match_detail(request, pk):
         'captain_team': captain_team,
         'weather_data': weather_data,
         'can_control_match': can_control_match,
+        'live_cursor': live_feed.current_cursor(match.pk) if match.is_live else None,
     }
     return render(request, 'tournaments/match_detail.html', context)
 
@@ -1067,14 +863,16 @@ def manage_lineup(request, match_pk, team_pk):
 
 
 def match_print_view(request, pk):
-    match = get_object_or_404(Match, pk=pk)
-    team1_lineup = Lineup.objects.filter(match=match, team=match.team1)
-    team2_lineup = Lineup.objects.filter(match=match, team=match.team2)
+    match = get_object_or_404(Match.objects.select_related('tournament', 'team1', 'team2'), pk=pk)
+    page_cache.add_surrogate_keys(request, *_match_surrogate_keys(match))
+    stat_lines = match_stat_lines(match)
 
     context = {
         'match': match,
-        'team1_lineup': team1_lineup,
-        'team2_lineup': team2_lineup,
+        'team1_starters': stat_lines[match.team1_id]['starters'],
+        'team1_substitutes': stat_lines[match.team1_id]['substitutes'],
+        'team2_starters': stat_lines[match.team2_id]['starters'],
+        'team2_substitutes': stat_lines[match.team2_id]['substitutes'],
     }
     return render(request, 'tournaments/match_print.html', context)
 
@@ -1091,40 +889,26 @@ def team_payment(request, pk):
     # Tách biệt logic theo loại giải đấu
     cart = None
     org_cart = None
-    cart_total = 0
-    org_cart_total = 0
-    main_discount = 0
-    org_discount = 0
-    discount_amount = 0
-    final_fee = tournament.registration_fee
-    
     if tournament.organization:
         # Giải của BTC: Chỉ sử dụng Organization Shop
         from shop.organization_models import OrganizationCart
-        try:
-            org_cart = OrganizationCart.objects.get(user=request.user, organization=tournament.organization)
-            org_cart_total = org_cart.total_price
-            org_discount = tournament.calculate_organization_shop_discount(org_cart.items.all())
-            discount_amount = org_discount
-            final_fee = tournament.get_final_registration_fee(None, org_cart.items.all())
-        except OrganizationCart.DoesNotExist:
-            pass
-        
-        # Kiểm tra tồn kho Organization Shop
+        org_cart = OrganizationCart.objects.filter(user=request.user, organization=tournament.organization).first()
         if org_cart:
-            unavailable_items = tournament.check_org_cart_stock_availability(org_cart.items.all())
-        else:
-            unavailable_items = []
+            prefetch_items(org_cart)
     else:
         # Giải của Admin: Chỉ sử dụng Main Shop
         cart, created = Cart.objects.get_or_create(user=request.user)
-        cart_total = cart.total_price
-        main_discount = tournament.calculate_shop_discount(cart.items.all())
-        discount_amount = main_discount
-        final_fee = tournament.get_final_registration_fee(cart.items.all(), None)
-        
-        # Kiểm tra tồn kho
-        unavailable_items = tournament.check_cart_stock_availability(cart.items.all())
+        prefetch_items(cart)
+
+    # Tổng giỏ hàng, giảm giá, phí cuối cùng và tồn kho tính trong một lượt
+    pricing = quote_registration(tournament, request.user)
+    cart_total = pricing.main.subtotal
+    org_cart_total = pricing.organization.subtotal
+    main_discount = pricing.main.discount
+    org_discount = pricing.organization.discount
+    discount_amount = pricing.discount
+    final_fee = pricing.final_fee
+    unavailable_items = pricing.unavailable_items
 
     if request.method == 'POST':
         form = PaymentProofForm(request.POST, request.FILES, instance=registration)
@@ -1381,30 +1165,28 @@ def generate_schedule_view(request, tournament_pk):
                 return redirect('generate_schedule', tournament_pk=tournament.pk)
 
             try:
-                with transaction.atomic():
-                    # Xóa lịch cũ theo thể thức
-                    round_code = 'GROUP' if tournament.format == Tournament.Format.CUP else 'LEAGUE'
-                    Match.objects.filter(tournament=tournament, match_round=round_code).delete()
-                    schedule_to_save = json.loads(schedule_preview_json)
-                    for match_data in schedule_to_save:
-                        Match.objects.create(
-                            tournament=tournament,
+                # Xóa lịch cũ theo thể thức và tạo lịch mới bằng một lần bulk_create
+                round_code = 'GROUP' if tournament.format == Tournament.Format.CUP else 'LEAGUE'
+                create_fixtures(
+                    tournament,
+                    [
+                        Match(
                             team1_id=match_data['team1_id'],
                             team2_id=match_data['team2_id'],
                             match_time=datetime.fromisoformat(match_data['match_time']),
                             location=match_data['location'],
-                            match_round=('GROUP' if tournament.format == Tournament.Format.CUP else 'LEAGUE'),
+                            match_round=round_code,
                             round_number=match_data.get('round_number'),
                             leg=match_data.get('leg')
                         )
+                        for match_data in json.loads(schedule_preview_json)
+                    ],
+                    replace_rounds=[round_code],
+                    title=f"Giải đấu '{tournament.name}' đã có lịch thi đấu",
+                    message="Lịch thi đấu vòng bảng đã được tạo. Hãy vào xem chi tiết.",
+                )
                 del request.session['schedule_preview_json']
                 messages.success(request, "Lịch thi đấu đã được tạo thành công!")
-                send_schedule_notification(
-                    tournament, Notification.NotificationType.SCHEDULE_CREATED,
-                    f"Giải đấu '{tournament.name}' đã có lịch thi đấu",
-                    "Lịch thi đấu vòng bảng đã được tạo. Hãy vào xem chi tiết.",
-                    'tournament_detail'
-                )
                 return redirect(reverse('tournament_detail', kwargs={'pk': tournament.pk}) + '?tab=schedule#schedule')
             except Exception as e:
                 messages.error(request, f"Lỗi khi lưu lịch thi đấu: {e}")
@@ -1428,130 +1210,45 @@ def generate_schedule_view(request, tournament_pk):
                         messages.error(request, "Định dạng 'Giới hạn trận đấu MỖI BẢNG' không hợp lệ. Ví dụ đúng: Bảng A:2, Bảng B:1")
                         return redirect('generate_schedule', tournament_pk=tournament.pk)
 
-                start_date = data['start_date']
-                time_slots_str = [t.strip() for t in data['time_slots'].split(',')]
-                locations = [loc.strip() for loc in data['locations'].split(',')]
-                rest_days = timedelta(days=data['rest_days'])
-                selected_weekdays = {int(d) for d in data['weekdays']}
-                matches_per_week = data.get('matches_per_week')
-                max_matches_per_team_per_week = data.get('max_matches_per_team_per_week')
+                constraints = ScheduleConstraints(
+                    start_date=data['start_date'],
+                    weekdays={int(d) for d in data['weekdays']},
+                    time_slots=parse_time_slots(data['time_slots'].split(',')),
+                    locations=[loc.strip() for loc in data['locations'].split(',')],
+                    rest_days=data['rest_days'],
+                    matches_per_week=data.get('matches_per_week'),
+                    max_matches_per_team_per_week=data.get('max_matches_per_team_per_week'),
+                    group_limits=group_limits,
+                    strategy=strategy,
+                )
 
-                all_pairings_by_group = {}
                 # Nguồn đội theo thể thức
                 if tournament.format == Tournament.Format.CUP:
-                    groups = sorted(list(tournament.groups.prefetch_related('registrations__team').all()), key=lambda g: g.name)
-                    group_to_teams = {g: [reg.team for reg in g.registrations.all()] for g in groups}
+                    groups = sorted(tournament.groups.prefetch_related('registrations__team'), key=lambda g: g.name)
+                    group_to_teams = {g.id: (g.name, [reg.team for reg in g.registrations.all()]) for g in groups}
                 else:
                     # LEAGUE: tất cả đội đã thanh toán, một bảng giả 'League'
                     league_teams = [reg.team for reg in tournament.registrations.select_related('team').filter(payment_status='PAID')]
-                    groups = ['LEAGUE']
-                    group_to_teams = {'LEAGUE': league_teams}
-
-                for group in groups:
-                    teams_in_group = group_to_teams[group]
-                    base_pairings = list(combinations(teams_in_group, 2))
-                    random.shuffle(base_pairings)
-
-                    # === THÊM HỖ TRỢ VÒNG TRÒN 2 LƯỢT: nhân đôi cặp và đảo chủ/khách ===
-                    legs = int(data.get('round_robin_legs') or 1)
-                    group_pairings = []
-                    for pair in base_pairings:
-                        team1, team2 = pair
-                        # Lượt đi
-                        group_pairings.append((team1, team2, 1))
-                        if legs == 2:
-                            # Lượt về (đảo chủ/khách)
-                            group_pairings.append((team2, team1, 2))
-
-                    # Trộn thứ tự để phân tán các lượt
-                    random.shuffle(group_pairings)
-                    display_name = group.name if hasattr(group, 'name') else str(group)
-                    all_pairings_by_group[group] = [{'pair': (p[0], p[1]), 'leg': p[2], 'group_name': display_name} for p in group_pairings]
-
-                scheduled_matches = []
-                team_last_played = {}
-                current_date = start_date
-                day_offset = 0
-                team_matches_this_week = defaultdict(int)
-                group_matches_this_week = defaultdict(int)
-                last_week_checked = start_date.isocalendar()[1]
-
-                while any(all_pairings_by_group.values()) and day_offset <= 365:
-                    current_week = current_date.isocalendar()[1]
-                    if current_week != last_week_checked:
-                        team_matches_this_week.clear()
-                        group_matches_this_week.clear()
-                        last_week_checked = current_week
-
-                    if current_date.weekday() in selected_weekdays:
-                        for time_str in time_slots_str:
-                            for location in locations:
-                                matches_this_week_count = sum(1 for m in scheduled_matches if datetime.fromisoformat(m['match_time']).isocalendar()[1] == current_week)
-                                if matches_per_week and matches_this_week_count >= matches_per_week: break
-
-                                try:
-                                    time_parts = time_str.split(':')
-                                    current_datetime = datetime.combine(current_date, time.fromisoformat(f"{time_parts[0].zfill(2)}:{time_parts[1]}"))
-                                except ValueError: continue
-
-                                group_pool = groups if strategy == 'PRIORITIZED' else random.sample(groups, len(groups))
-
-                                match_scheduled_in_slot = False
-                                for group in group_pool:
-                                    if match_scheduled_in_slot: break
-                                    if not all_pairings_by_group.get(group): continue
-
-                                    group_name = group.name if hasattr(group, 'name') else str(group)
-                                    group_limit = group_limits.get(group_name)
-                                    group_id = group.id if hasattr(group, 'id') else str(group)
-                                    if group_limit is not None and group_matches_this_week[group_id] >= group_limit: continue
-
-                                    for i, pairing_info in enumerate(all_pairings_by_group[group]):
-                                        team1, team2 = pairing_info['pair']
-
-                                        can_play1 = not team_last_played.get(team1.id) or (current_date - team_last_played[team1.id].date()) >= rest_days
-                                        can_play2 = not team_last_played.get(team2.id) or (current_date - team_last_played[team2.id].date()) >= rest_days
-                                        team1_weekly_ok = not max_matches_per_team_per_week or team_matches_this_week[team1.id] < max_matches_per_team_per_week
-                                        team2_weekly_ok = not max_matches_per_team_per_week or team_matches_this_week[team2.id] < max_matches_per_team_per_week
-
-                                        if can_play1 and can_play2 and team1_weekly_ok and team2_weekly_ok:
-                                            scheduled_matches.append({ 'team1_name': team1.name, 'team1_id': team1.id, 'team2_name': team2.name, 'team2_id': team2.id, 'match_time': current_datetime.isoformat(), 'location': location, 'group_name': group.name if hasattr(group, 'name') else str(group), 'leg': pairing_info.get('leg') })
-                                            team_last_played[team1.id] = team_last_played[team2.id] = current_datetime
-                                            team_matches_this_week[team1.id] += 1
-                                            team_matches_this_week[team2.id] += 1
-                                            group_matches_this_week[group_id] += 1
-                                            all_pairings_by_group[group].pop(i)
-                                            match_scheduled_in_slot = True
-                                            break
-
-                            if matches_per_week and matches_this_week_count >= matches_per_week: break
-
-                    day_offset += 1
-                    current_date = start_date + timedelta(days=day_offset)
-
-                unscheduled_matches = [p['pair'] for pairings in all_pairings_by_group.values() for p in pairings]
+                    group_to_teams = {'LEAGUE': ('LEAGUE', league_teams)}
+
+                teams_by_id = {team.id: team for _, teams in group_to_teams.values() for team in teams}
+                result = generate_schedule(
+                    {key: (name, [team.id for team in teams]) for key, (name, teams) in group_to_teams.items()},
+                    constraints,
+                    legs=int(data.get('round_robin_legs') or 1),
+                )
+
+                scheduled_matches = [{
+                    'team1_name': teams_by_id[m.fixture.team1_id].name, 'team1_id': m.fixture.team1_id,
+                    'team2_name': teams_by_id[m.fixture.team2_id].name, 'team2_id': m.fixture.team2_id,
+                    'match_time': m.match_time, 'location': m.location, 'group_name': m.fixture.group_name,
+                    'leg': m.fixture.leg, 'round_number': m.round_number,
+                } for m in result.scheduled]
+                unscheduled_matches = [(teams_by_id[f.team1_id], teams_by_id[f.team2_id]) for f in result.unscheduled]
 
                 schedule_by_group = defaultdict(list)
-                scheduled_matches.sort(key=lambda x: x['match_time'])
-                # Tính vòng: gom theo tuần-thứ tự để gán round_number tuần tự
-                for match in scheduled_matches:
-                    match['match_time'] = datetime.fromisoformat(match['match_time'])
-                schedule_by_group_intermediate = defaultdict(list)
                 for m in scheduled_matches:
-                    schedule_by_group_intermediate[m['group_name']].append(m)
-                for gname, mlist in schedule_by_group_intermediate.items():
-                    mlist.sort(key=lambda x: x['match_time'])
-                    round_counter = 1
-                    last_day = None
-                    for m in mlist:
-                        cur_day = m['match_time'].date()
-                        if last_day is None:
-                            last_day = cur_day
-                        elif cur_day != last_day:
-                            round_counter += 1
-                            last_day = cur_day
-                        m['round_number'] = round_counter
-                        schedule_by_group[gname].append(m)
+                    schedule_by_group[m['group_name']].append(m)
 
                 request.session['schedule_preview_json'] = json.dumps([{**m, 'match_time': m['match_time'].isoformat()} for m in scheduled_matches])
 
@@ -1571,16 +1268,20 @@ def player_detail(request, pk):
         today = date.today()
         age = today.year - player.date_of_birth.year - ((today.month, today.day) < (player.date_of_birth.month, player.date_of_birth.day))
 
-    teams_played_for_ids = Player.objects.filter(full_name__iexact=player.full_name).values_list('team_id', flat=True)
+    # Giải đấu của đội hiện tại dùng để xét danh hiệu "Vua phá lưới"/"Cột trụ đội bóng"
+    tournament_id = TeamRegistration.objects.filter(team_id=player.team_id).values_list('tournament_id', flat=True).first() if player.team_id else None
+    profile_stats = player_profile_stats(player, tournament_id)
+    career = profile_stats['career']
+
+    teams_played_for_ids = profile_stats['team_ids'] | ({player.team_id} if player.team_id else set())
     player_achievements = TeamAchievement.objects.filter(team_id__in=teams_played_for_ids).select_related('tournament').order_by('-achieved_at')
 
     current_vote_value = get_current_vote_value()
     value_from_votes = player.votes * current_vote_value
-    total_value = player.transfer_value + value_from_votes
+    total_value = player.market_value
 
-    total_goals = Goal.objects.filter(player=player, is_own_goal=False).count()
-    cards = Card.objects.filter(player=player).aggregate(yellow_cards=Count('id', filter=Q(card_type='YELLOW')), red_cards=Count('id', filter=Q(card_type='RED')))
     matches_played = Match.objects.filter(lineups__player=player).distinct().select_related('tournament', 'team1', 'team2').order_by('-match_time')
+    match_lines = player_match_lines(player, matches_played)
 
     # === BẮT ĐẦU KHỐI CODE MỚI ĐỂ KIỂM TRA QUYỀN VOTE ===
     can_vote = False
@@ -1596,26 +1297,18 @@ def player_detail(request, pk):
             can_vote = True
 
     stats = {
-        'total_goals': total_goals,
-        'yellow_cards': cards.get('yellow_cards', 0),
-        'red_cards': cards.get('red_cards', 0),
-        'matches_played': matches_played,
-        'matches_played_count': matches_played.count(),
+        'total_goals': career.goals if career else 0,
+        'yellow_cards': career.yellow_cards if career else 0,
+        'red_cards': career.red_cards if career else 0,
+        'matches_played': match_lines,
+        'matches_played_count': career.matches_played if career else 0,
     }
 
     badges = []
-    # SỬA LỖI: Lấy tournament từ registration
-    registration = TeamRegistration.objects.filter(team=player.team).first()
-    if registration:
-        tournament = registration.tournament
-        top_scorer_in_tourn = Player.objects.filter(team__registrations__tournament=tournament).annotate(goal_count=Count('goals', filter=Q(goals__is_own_goal=False, goals__match__tournament=tournament))).order_by('-goal_count').first()
-
-        if top_scorer_in_tourn and top_scorer_in_tourn.pk == player.pk and stats['total_goals'] > 0:
-            badges.append({'name': 'Vua phá lưới', 'icon': 'bi-trophy-fill', 'color': 'text-warning'})
-
-        most_played_in_tourn = Player.objects.filter(team__registrations__tournament=tournament).annotate(match_count=Count('lineups', filter=Q(lineups__match__tournament=tournament))).order_by('-match_count').first()
-        if most_played_in_tourn and most_played_in_tourn.pk == player.pk and stats['matches_played_count'] > 0:
-            badges.append({'name': 'Cột trụ đội bóng', 'icon': 'bi-gem', 'color': 'text-info'})
+    if profile_stats['is_top_scorer']:
+        badges.append({'name': 'Vua phá lưới', 'icon': 'bi-trophy-fill', 'color': 'text-warning'})
+    if profile_stats['is_most_played']:
+        badges.append({'name': 'Cột trụ đội bóng', 'icon': 'bi-gem', 'color': 'text-info'})
 
     if stats['yellow_cards'] == 0 and stats['red_cards'] == 0 and stats['matches_played_count'] > 0:
         badges.append({'name': 'Cầu thủ Fair-play', 'icon': 'bi-shield-check', 'color': 'text-primary'})
@@ -1846,7 +1539,7 @@ def toggle_follow_view(request, pk):
     tournament = get_object_or_404(Tournament, pk=pk)
     user = request.user
 
-    if user in tournament.followers.all():
+    if tournament.followers.filter(pk=user.pk).exists():
         tournament.followers.remove(user)
         is_following = False
     else:
@@ -1938,29 +1631,17 @@ def match_control_view(request, pk):
                 form = GoalForm(request.POST)
                 form.fields['player'].queryset = players_in_match_qs
                 if form.is_valid():
-                    instance = form.save(commit=False)
-                    instance.match = match
-                    instance.save()
-
-                    match.refresh_from_db()
-                    is_own_goal = form.cleaned_data.get('is_own_goal', False)
-                    goal_scoring_team = instance.player.team
-
-                    match.team1_score = match.team1_score or 0
-                    match.team2_score = match.team2_score or 0
-
-                    if is_own_goal:
-                        if goal_scoring_team == match.team1:
-                            match.team2_score += 1
-                        else:
-                            match.team1_score += 1
-                    else:
-                        if goal_scoring_team == match.team1:
-                            match.team1_score += 1
-                        else:
-                            match.team2_score += 1
-
-                    match.save()
+                    with transaction.atomic():
+                        instance = form.save(commit=False)
+                        instance.match = match
+                        instance.save()
+
+                        # Bàn phản lưới được tính cho đội đối phương
+                        is_own_goal = form.cleaned_data.get('is_own_goal', False)
+                        for_team1 = (instance.player.team_id == match.team1_id) != is_own_goal
+                        match.team1_score, match.team2_score = adjust_score(
+                            match.pk, team1_delta=1 if for_team1 else 0, team2_delta=0 if for_team1 else 1
+                        )
 
                     response_data = {
                         'status': 'success',
@@ -1978,6 +1659,7 @@ def match_control_view(request, pk):
                             'team2_score': match.team2_score
                         }
                     }
+                    live_feed.publish(match, 'goal', response_data['event'], response_data['new_scores'])
                     return JsonResponse(response_data)
 
             elif action == 'add_card':
@@ -1999,7 +1681,9 @@ def match_control_view(request, pk):
                 elif event_type == MatchEvent.EventType.MATCH_END: text = f"Trận đấu kết thúc. Tỉ số chung cuộc là {current_score}."
                 if text:
                     event = MatchEvent.objects.create(match=match, event_type=event_type, text=text)
-                    return JsonResponse({'status': 'success', 'event': {'type': 'match_event', 'id': event.pk, 'text': event.text, 'event_type': event.event_type, 'created_at': event.created_at.strftime('%H:%M')}})
+                    event_data = {'type': 'match_event', 'id': event.pk, 'text': event.text, 'event_type': event.event_type, 'created_at': event.created_at.strftime('%H:%M')}
+                    live_feed.publish(match, 'match_event', event_data)
+                    return JsonResponse({'status': 'success', 'event': event_data})
                 return JsonResponse({'status': 'error', 'message': 'Loại sự kiện không hợp lệ.'}, status=400)
 
             if form and form.is_valid():
@@ -2013,6 +1697,7 @@ def match_control_view(request, pk):
                 elif action == 'add_substitution':
                      response_data['event'].update({'type': 'substitution', 'player_in_name': instance.player_in.full_name, 'player_out_name': instance.player_out.full_name})
 
+                live_feed.publish(match, response_data['event']['type'], response_data['event'])
                 return JsonResponse(response_data)
             else:
                 error_str = ". ".join([f"{field}: {err[0]}" for field, err in form.errors.items()]) if form and form.errors else "Form không hợp lệ."
@@ -2023,10 +1708,12 @@ def match_control_view(request, pk):
                 score1_str = request.POST.get('team1_score')
                 score2_str = request.POST.get('team2_score')
 
-                match.team1_score = int(score1_str) if score1_str.isdigit() else None
-                match.team2_score = int(score2_str) if score2_str.isdigit() else None
-
-                match.save()
+                match.team1_score, match.team2_score = set_score(
+                    match.pk,
+                    int(score1_str) if score1_str.isdigit() else None,
+                    int(score2_str) if score2_str.isdigit() else None,
+                )
+                live_feed.publish_scores(match)
                 return JsonResponse({'status': 'success', 'message': 'Đã lưu tỉ số.'})
             except (ValueError, TypeError):
                 return JsonResponse({'status': 'error', 'message': 'Giá trị tỉ số không hợp lệ.'}, status=400)
@@ -2085,6 +1772,47 @@ def match_control_view(request, pk):
     }
     return render(request, 'tournaments/match_control.html', context)
 
+@login_required
+@never_cache
+def match_control_sync(request, pk):
+    """
+    JSON cho phòng điều khiển: các thay đổi diễn biến (bàn thắng, thẻ, thay người,
+    sự kiện, đội hình) sau phiên bản `since`. Không có `since` thì trả về toàn bộ.
+    """
+    match = get_object_or_404(Match.objects.select_related('tournament__organization'), pk=pk)
+    if not user_can_control_match(request.user, match):
+        return JsonResponse({'status': 'error', 'message': 'Bạn không có quyền truy cập phòng điều khiển này.'}, status=403)
+
+    try:
+        since = int(request.GET['since'])
+    except (KeyError, ValueError):
+        since = None
+    return JsonResponse({'status': 'success', **match_sync.changes_since(match, since)})
+
+@never_cache
+def match_live_feed(request, pk):
+    """
+    Trả về các sự kiện trực tiếp của trận sau `since` (cursor); chỉ chờ sự kiện mới
+    (long-poll) khi LIVE_FEED_WAIT_SECONDS > 0.
+    Chỉ đọc từ cache dùng chung (xem tournaments/live_feed.py).
+    """
+    try:
+        since = int(request.GET['since'])
+    except (KeyError, ValueError):
+        since = None
+
+    if live_feed.get_state(pk) is None:
+        return JsonResponse({'status': 'error', 'message': 'Không tìm thấy trận đấu.'}, status=404)
+
+    # Không có cursor: trả về ngay cursor hiện tại để bắt đầu theo dõi
+    cursor, events = live_feed.wait_for_events(pk, since, timeout=0 if since is None else None)
+    return JsonResponse({
+        'cursor': cursor,
+        'reset': events is None,
+        'events': events or [],
+        'scores': live_feed.get_state(pk),
+    })
+
 @login_required
 @require_POST
 def delete_match_event(request, event_type, pk):
@@ -2094,23 +1822,6 @@ def delete_match_event(request, event_type, pk):
 
             if event_type == 'goal':
                 event = get_object_or_404(Goal, pk=pk)
-                match = event.match
-
-                is_own_goal = event.is_own_goal
-                scoring_team = event.player.team
-
-                if (not is_own_goal and scoring_team == match.team1) or \
-                   (is_own_goal and scoring_team == match.team2):
-                    if match.team1_score > 0: match.team1_score -= 1
-                else:
-                    if match.team2_score > 0: match.team2_score -= 1
-
-                match.save()
-                response_data['new_scores'] = {
-                    'team1_score': match.team1_score,
-                    'team2_score': match.team2_score,
-                }
-
             elif event_type == 'card':
                 event = get_object_or_404(Card, pk=pk)
             elif event_type == 'substitution':
@@ -2124,7 +1835,20 @@ def delete_match_event(request, event_type, pk):
             if not request.user.is_staff and not is_organizer:
                 return HttpResponseForbidden("Bạn không có quyền thực hiện hành động này.")
 
+            if event_type == 'goal':
+                match = event.match
+                # Bàn phản lưới được tính cho đội đối phương
+                for_team1 = (event.player.team_id == match.team1_id) != event.is_own_goal
+                match.team1_score, match.team2_score = adjust_score(
+                    match.pk, team1_delta=-1 if for_team1 else 0, team2_delta=0 if for_team1 else -1
+                )
+                response_data['new_scores'] = {
+                    'team1_score': match.team1_score,
+                    'team2_score': match.team2_score,
+                }
+
             event.delete()
+            live_feed.publish(event.match, f'{event_type}_deleted', {'id': pk}, response_data.get('new_scores'))
             return JsonResponse(response_data)
 
     except Exception as e:
@@ -2215,15 +1939,9 @@ def player_voting_view(request, tournament_pk):
             except Exception as e:
                 messages.error(request, f"An error occurred: {e}")
 
-    players_list = list(Player.objects.filter(team__registrations__tournament=tournament).exclude(user=user).select_related('team'))
+    players_to_vote = Player.objects.filter(team__registrations__tournament=tournament).exclude(user=user).select_related('team').order_by('-market_value')
     current_vote_value = get_current_vote_value()
 
-    for player in players_list:
-        value_from_votes = player.votes * current_vote_value
-        player.market_value = player.transfer_value + value_from_votes
-
-    players_to_vote = sorted(players_list, key=lambda p: p.market_value, reverse=True)
-
     context = {
         'tournament': tournament,
         'players_to_vote': players_to_vote,
@@ -2370,7 +2088,7 @@ def job_market_view(request):
     
     # Base queryset cho jobs
     jobs = JobPosting.objects.filter(status=JobPosting.Status.OPEN).select_related(
-        'tournament', 'role_required', 'stadium'
+        'tournament', 'role_required', 'stadium', 'professional_user'
     )
     
     # Apply filters
@@ -2390,13 +2108,29 @@ def job_market_view(request):
         elif job_type_filter == 'stadium':
             jobs = jobs.filter(stadium__isnull=False)
     
+    job_ordering = ('-created_at', '-pk')
     if search_query:
-        jobs = jobs.filter(
-            models.Q(title__icontains=search_query) |
-            models.Q(description__icontains=search_query) |
-            models.Q(tournament__name__icontains=search_query) |
-            models.Q(stadium__stadium_name__icontains=search_query)
-        )
+        jobs = search.filter_queryset(jobs, 'job', search_query, ordered=False)
+        # Chỉ xếp theo độ liên quan khi query có từ tìm được (vd. "!!" thì không)
+        if search.has_terms(search_query):
+            job_ordering = ('-search_rank', '-pk')
+
+    job_count = None
+    if not pagination.wants_json(request):
+        job_count = jobs.count()
+    jobs = pagination.paginate(jobs, job_ordering, cursor=request.GET.get(pagination.CURSOR_PARAM))
+    if pagination.wants_json(request):
+        return pagination.json_page(jobs, lambda job: {
+            'id': job.pk,
+            'title': job.title,
+            'posted_by': job.posted_by,
+            'location_detail': job.location_detail,
+            'tournament': job.tournament.name if job.tournament else None,
+            'stadium': job.stadium.stadium_name if job.stadium else None,
+            'role': job.role_required.name if job.role_required else None,
+            'created_at': job.created_at.isoformat(),
+            'url': reverse('job_detail', args=[job.pk]),
+        })
     
     # Lấy professional rankings (top rated professionals)
     from users.models import CoachProfile, StadiumProfile
@@ -2436,15 +2170,14 @@ def job_market_view(request):
     search_users = None
     if search_query:
         # Tìm users theo username, first_name, last_name, email
-        search_users = User.objects.filter(
-            models.Q(username__icontains=search_query) |
-            models.Q(first_name__icontains=search_query) |
-            models.Q(last_name__icontains=search_query) |
-            models.Q(email__icontains=search_query)
-        ).select_related('profile').distinct()[:10]  # Limit 10 results
+        search_users = search.search(
+            'user', search_query, per_page=10, queryset=User.objects.select_related('profile')
+        ).object_list
     
     context = {
         'jobs': jobs,
+        'job_count': job_count,
+        **pagination.page_links(request, jobs),
         'search_users': search_users,
         'all_regions': Tournament.Region.choices,
         'all_roles': all_roles,
@@ -2679,56 +2412,10 @@ def commentator_notes_view(request, match_pk):
         is_active=True
     ).select_related('package', 'sponsor__sponsor_profile').order_by('package__order', 'order')
 
-    # 5. Bảng xếp hạng (logic tương tự tournament_detail)
+    # 5. Bảng xếp hạng (đọc từ bảng TeamStanding đã tổng hợp sẵn)
     standings_data = defaultdict(list)
-    groups = tournament.groups.prefetch_related('registrations__team').all()
-    if groups:
-        # Lấy tất cả các đội đã được duyệt trong giải đấu
-        paid_teams_in_tournament_ids = TeamRegistration.objects.filter(
-            tournament=tournament, payment_status='PAID'
-        ).values_list('team_id', flat=True)
-
-        # Lấy tất cả các trận đã kết thúc của giải đấu
-        finished_matches_in_tournament = Match.objects.filter(
-            tournament=tournament,
-            team1_score__isnull=False,
-            team2_score__isnull=False
-        )
-
-        team_stats = {team_id: {
-            'played': 0, 'wins': 0, 'draws': 0, 'losses': 0,
-            'gf': 0, 'ga': 0, 'gd': 0, 'points': 0,
-            'team_obj': None # Sẽ được điền sau
-        } for team_id in paid_teams_in_tournament_ids}
-        
-        teams_map = {team.id: team for team in Team.objects.filter(id__in=paid_teams_in_tournament_ids)}
-        for team_id in team_stats:
-            team_stats[team_id]['team_obj'] = teams_map.get(team_id)
-
-        for match in finished_matches_in_tournament:
-            t1_id, t2_id, s1, s2 = match.team1_id, match.team2_id, match.team1_score, match.team2_score
-            if t1_id in team_stats and t2_id in team_stats:
-                # Cập nhật các chỉ số... (giống hệt trong tournament_detail)
-                team_stats[t1_id]['played'] += 1; team_stats[t2_id]['played'] += 1
-                team_stats[t1_id]['gf'] += s1; team_stats[t1_id]['ga'] += s2
-                team_stats[t2_id]['gf'] += s2; team_stats[t2_id]['ga'] += s1
-                if s1 > s2:
-                    team_stats[t1_id]['wins'] += 1; team_stats[t1_id]['points'] += 3
-                    team_stats[t2_id]['losses'] += 1
-                elif s2 > s1:
-                    team_stats[t2_id]['wins'] += 1; team_stats[t2_id]['points'] += 3
-                    team_stats[t1_id]['losses'] += 1
-                else:
-                    team_stats[t1_id]['draws'] += 1; team_stats[t1_id]['points'] += 1
-                    team_stats[t2_id]['draws'] += 1; team_stats[t2_id]['points'] += 1
-
-        for group in groups:
-            group_team_ids = group.registrations.filter(payment_status='PAID').values_list('team_id', flat=True)
-            group_standings = [team_stats[team_id] for team_id in group_team_ids if team_id in team_stats]
-            for stats in group_standings:
-                stats['gd'] = stats['gf'] - stats['ga']
-            group_standings.sort(key=lambda x: (x['points'], x['gd'], x['gf']), reverse=True)
-            standings_data[group.id] = group_standings
+    if tournament.groups.exists():
+        standings_data = get_tournament_standings(tournament)
     # --- KẾT THÚC LOGIC MỚI ---
 
     context = {
@@ -2858,10 +2545,7 @@ def public_team_detail(request, pk):
     base_value = team.transfer_value
 
     # 2. Giá trị Đội hình (không đổi)
-    squad_value = 0
-    players_in_team = Player.objects.filter(team=team)
-    for player in players_in_team:
-        squad_value += player.transfer_value + (player.votes * get_current_vote_value())
+    squad_value = Player.objects.filter(team=team).aggregate(total=Sum('market_value'))['total'] or 0
 
     # 3. Thưởng Thành tích (nhân với hệ số)
     achievement_bonus_base = 0
@@ -3321,16 +3005,16 @@ def transfer_market_view(request):
     """
     current_vote_value = get_current_vote_value()
 
-    players_qs = Player.objects.select_related('team').annotate(
-        market_value=F('transfer_value') + (F('votes') * Value(current_vote_value))
-    )
+    # market_value được lưu sẵn và có chỉ mục (xem tournaments/valuation.py)
+    players_qs = Player.objects.select_related('team')
 
     region_filter = request.GET.get('region', '')
     location_filter = request.GET.get('location', '')
     position_filter = request.GET.get('position', '')
     team_filter = request.GET.get('team', '')
     search_query = request.GET.get('q', '')
-    sort_by = request.GET.get('sort', '-market_value')
+    # Khi tìm kiếm mà không chọn cách sắp xếp: xếp theo độ liên quan
+    sort_by = request.GET.get('sort', '' if search_query else '-market_value')
 
     filtered_qs_for_top = players_qs
     if region_filter:
@@ -3352,11 +3036,39 @@ def transfer_market_view(request):
     if team_filter:
         players_qs = players_qs.filter(team_id=team_filter)
     if search_query:
-        players_qs = players_qs.filter(full_name__icontains=search_query)
-
-    valid_sorts = ['market_value', '-market_value', 'full_name', '-votes']
-    if sort_by in valid_sorts:
-        players_qs = players_qs.order_by(sort_by)
+        players_qs = search.filter_queryset(players_qs, 'player', search_query)
+
+    # Phân trang theo khóa: mỗi cách sắp xếp kèm khóa chính để thứ tự ổn định giữa các trang
+    sort_orderings = {
+        'market_value': ('market_value', 'pk'),
+        '-market_value': ('-market_value', '-pk'),
+        'full_name': ('full_name', 'pk'),
+        '-votes': ('-votes', '-pk'),
+    }
+    if sort_by in sort_orderings:
+        ordering = sort_orderings[sort_by]
+    elif search_query and search.has_terms(search_query):
+        ordering = ('-search_rank', '-pk')
+    else:
+        ordering = ('-pk',)
+
+    player_count = None
+    if not pagination.wants_json(request):
+        player_count = players_qs.count()
+    players = pagination.paginate(players_qs, ordering, cursor=request.GET.get(pagination.CURSOR_PARAM))
+    if pagination.wants_json(request):
+        return pagination.json_page(players, lambda player: {
+            'id': player.pk,
+            'full_name': player.full_name,
+            'position': player.position,
+            'jersey_number': player.jersey_number,
+            'team': player.team.name if player.team else None,
+            'transfer_value': player.transfer_value,
+            'votes': player.votes,
+            'market_value': player.market_value,
+            'avatar': player.avatar.url if player.avatar else None,
+            'url': reverse('player_detail', args=[player.pk]),
+        })
 
     all_teams_with_players = Team.objects.filter(players__isnull=False).distinct().order_by('name')
     captained_teams = []
@@ -3364,7 +3076,9 @@ def transfer_market_view(request):
         captained_teams = Team.objects.filter(captain=request.user)
 
     context = {
-        'players': players_qs,
+        'players': players,
+        'player_count': player_count,
+        **pagination.page_links(request, players),
         'top_players': top_players,
         'looking_for_club_players': looking_for_club_players,
         'current_vote_value': current_vote_value,
@@ -3421,10 +3135,25 @@ def transfer_history_view(request):
         status=PlayerTransfer.Status.ACCEPTED
     ).select_related(
         'player', 'inviting_team', 'current_team'
-    ).order_by('-updated_at')
+    )
+    transfers = pagination.paginate(
+        completed_transfers, ('-updated_at', '-pk'), cursor=request.GET.get(pagination.CURSOR_PARAM)
+    )
+    if pagination.wants_json(request):
+        return pagination.json_page(transfers, lambda transfer: {
+            'id': transfer.pk,
+            'player': transfer.player.full_name,
+            'player_url': reverse('player_detail', args=[transfer.player_id]),
+            'from_team': transfer.current_team.name if transfer.current_team else None,
+            'to_team': transfer.inviting_team.name,
+            'transfer_type': transfer.transfer_type,
+            'offer_amount': transfer.offer_amount,
+            'completed_at': transfer.updated_at.isoformat(),
+        })
 
     context = {
-        'transfers': completed_transfers,
+        'transfers': transfers,
+        **pagination.page_links(request, transfers),
     }
     return render(request, 'tournaments/transfer_history.html', context)    
 
@@ -4270,24 +3999,22 @@ def calculate_shop_discount(request, tournament_pk):
     try:
         tournament = get_object_or_404(Tournament, pk=tournament_pk)
         
-        # Lấy cart của user
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        
-        # Tính tổng giá trị cart
-        cart_total = cart.total_price
-        
-        # Tính giảm giá từ tournament
-        discount_amount = tournament.calculate_shop_discount(cart.items.all())
-        final_fee = tournament.get_final_registration_fee(cart.items.all())
+        # Giỏ hàng của user (Shop BTC nếu là giải của BTC), giảm giá và phí cuối cùng
+        pricing = quote_registration(tournament, request.user)
         
         return JsonResponse({
             'success': True,
-            'cart_total': float(cart_total),
+            'cart_total': float(pricing.main.subtotal + pricing.organization.subtotal),
             'discount_percentage': float(tournament.shop_discount_percentage),
-            'discount_amount': float(discount_amount),
+            'discount_amount': float(pricing.discount),
             'original_fee': float(tournament.registration_fee),
-            'final_fee': float(final_fee),
-            'cart_items_count': cart.total_items,
+            'final_fee': float(pricing.final_fee),
+            'cart_items_count': pricing.main.total_items + pricing.organization.total_items,
+            'unavailable_items': [
+                {'product': item['product'].name, 'size': item['size'],
+                 'requested': item['requested'], 'available': item['available']}
+                for item in pricing.unavailable_items
+            ],
         })
         
     except Exception as e:
@@ -4343,10 +4070,12 @@ def payment_with_shop(request, pk):
     # Lấy cart của user
     cart, created = Cart.objects.get_or_create(user=request.user)
     
-    # Tính toán giảm giá
-    cart_total = cart.total_price
-    discount_amount = tournament.calculate_shop_discount(cart.items.all())
-    final_fee = tournament.get_final_registration_fee(cart.items.all())
+    # Tính toán giảm giá (giỏ hàng Shop BTC nếu là giải của BTC)
+    pricing = quote_registration(tournament, request.user)
+    cart_total = pricing.main.subtotal
+    org_cart_total = pricing.organization.subtotal
+    discount_amount = pricing.discount
+    final_fee = pricing.final_fee
 
     if request.method == 'POST':
         form = PaymentProofForm(request.POST, request.FILES, instance=registration)
@@ -1,9 +1,11 @@
 # backend/users/models.py
 from django.db import models
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 
+from dbpsports_core.user_chrome import bump_users
+
 class Role(models.Model):
     """Định nghĩa các vai trò khác nhau trong hệ thống."""
     ROLE_CHOICES = [
@@ -72,6 +74,16 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
 
+@receiver(m2m_changed, sender=Profile.roles.through)
+def bump_user_chrome_on_roles_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Cờ is_player_role/is_organizer_role trên thanh điều hướng được cache theo người dùng."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        bump_users(instance.user_id)
+    elif pk_set:
+        bump_users(*Profile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+
 
 class CoachProfile(models.Model):
     """Hồ sơ chi tiết dành cho Huấn luyện viên."""